@@ -23,13 +23,14 @@ subdirs = [dir for dir in os.listdir(dataset_path) if os.path.isdir(os.path.join
 # 테스트용 이미지 경로와 이름으로 레이블된 식품 이미지들을 저장할 딕셔너리 셋업
 labeled_images = {label: [] for label in subdirs}
 
-# 각 식품별 이미지 경로 저장
+# 각 식품별 이미지 경로 저장 (training.ingest의 샤드 하위 디렉토리 포함)
 for label in subdirs:
     image_folder = os.path.join(dataset_path, label)
 
-    for image in os.listdir(image_folder):
-        if image.lower().endswith(image_extension):
-            labeled_images[label].append(os.path.join(image_folder, image))
+    for root, _, images in os.walk(image_folder):
+        for image in sorted(images):
+            if image.lower().endswith(image_extension):
+                labeled_images[label].append(os.path.join(root, image))
 
 
 if __name__ == "__main__":
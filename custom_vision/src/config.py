@@ -11,31 +11,48 @@ from azure.cognitiveservices.vision.customvision.prediction import CustomVisionP
 ## OpenAPI Authentication
 from msrest.authentication import ApiKeyCredentials
 
-# Environment variable management
-## Keeps sensitive information out of the codebase
-from dotenv import load_dotenv
-
-# Operating system interactions and directory management
-## Used for environment variable access
+# Operating system interactions and module loading
+## Used to load the shared settings loader and rate limiter of the service
 import os
+import sys
+import importlib.machinery
+import importlib.util
+
+# Service clients package (food_classifier/src/service_ui/clients)
+SERVICE_CLIENTS_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "food_classifier", "src", "service_ui", "clients"))
+SERVICE_CLIENTS_PACKAGE = "food_classifier_clients"
+
+
+# Import a module of the service clients package
+## The package is loaded under its own name instead of adding the service tree to sys.path,
+## whose top-level names (clients, utils, ...) would shadow the modules of this project
+def import_service_module(name):
+    if SERVICE_CLIENTS_PACKAGE not in sys.modules:
+        spec = importlib.machinery.ModuleSpec(SERVICE_CLIENTS_PACKAGE, None, is_package=True)
+        spec.submodule_search_locations = [SERVICE_CLIENTS_DIR]
+        sys.modules[SERVICE_CLIENTS_PACKAGE] = importlib.util.module_from_spec(spec)
+    return importlib.import_module(f"{SERVICE_CLIENTS_PACKAGE}.{name}")
+
+
+# Shared settings loader and prediction rate limiter of the service
+## Keeps sensitive information out of the codebase, .env is parsed once per process
+get_settings = import_service_module("settings").get_settings
+rate_limiter = import_service_module("rate_limiter")
 
 
 # Retrieve Azure Custom Vision API Configurations
 def get_config():
 
-    config = dict()
-    
-    ## Load environment variables
-    load_dotenv()
-
-    ## Retrieve sensitive credentials from environment variables
-    ENDPOINT = os.getenv("AZURE_CUSTOM_VISION_ENDPOINT")
-    KEY = os.getenv("AZURE_CUSTOM_VISION_API_KEY")
-    PROJECT_ID  = os.getenv("AZURE_CUSTOM_VISION_PROJECT_ID")
-    MODEL_NAME = os.getenv("AZURE_CUSTOM_VISION_MODEL_NAME")
+    ## Retrieve validated credentials from the shared settings
+    settings = get_settings().validate("custom_vision")
 
     # Store sensitive data in a dictionary format
-    config.update({"ENDPOINT": ENDPOINT, "KEY": KEY, "PROJECT_ID": PROJECT_ID, "MODEL_NAME": MODEL_NAME})
+    config = {
+        "ENDPOINT": settings.custom_vision_endpoint,
+        "KEY": settings.custom_vision_api_key,
+        "PROJECT_ID": settings.custom_vision_project_id,
+        "MODEL_NAME": settings.custom_vision_model_name
+    }
 
     return config
 
@@ -46,3 +63,9 @@ def get_client(ENDPOINT, KEY):
     client  = CustomVisionPredictionClient(endpoint = ENDPOINT, credentials = credentials)
 
     return client
+
+
+# Prediction quota shared with the service workers of this machine
+## Batch callers (evaluation, notebooks) wait behind kiosk predictions
+def get_limiter():
+    return rate_limiter.create_prediction_limiter(get_settings())
@@ -14,8 +14,11 @@ class custom_vision_model():
         self.MODEL_NAME = configs["MODEL_NAME"]
         # 위 값들로 클라이언트 인증및 연동
         self.client = get_client(ENDPOINT=self.ENDPOINT, KEY=self.KEY)
+        # 서비스 워커와 같은 호출 한도를 배치 우선순위로 사용
+        self.limiter = get_limiter()
 
     def predict(self, image_path):
+        self.limiter.acquire("batch")
         with open(image_path, mode = "rb") as image_data:
             results = self.client.classify_image(self.PROJECT_ID, self.MODEL_NAME, image_data)
 
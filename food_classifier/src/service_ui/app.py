@@ -1,28 +1,152 @@
+import os
+import sys
+import hmac
+import argparse
 import gradio as gr
+from fastapi import Request
+from fastapi.responses import JSONResponse, FileResponse
 from components.interfaces.customer_interface import create_customer_interface
 from components.interfaces.nutrition_interface import create_nutrition_interface
-from components.utils.customer_session import CustomerSession
 
-def create_demo():
-    """Create Gradio demo with session management"""
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'components'))
+from utils.event_gate import gates_snapshot, thread_demand
+from utils.session_store import session_store
+from clients.settings import get_settings
+from clients.rate_limiter import limiters_snapshot
+from container import ServiceContainer
+from warmup import Warmup
+
+# Thread pool size of Gradio's sync event handlers (launch max_threads default)
+GRADIO_DEFAULT_THREADS = 40
+
+def create_demo(container=None):
+    """
+    Create Gradio demo with session management
+    Clients and processors are created lazily by the container on first use
+    """
+    container = container or ServiceContainer()
+    
     with gr.Blocks() as demo:
-        # Initialize session state
-        session_state = gr.State(CustomerSession())
+        # Initialize session state (only the session id, sessions are kept in session_store)
+        session_state = gr.State(session_store.new_session_id)
         
         # Create tab buttons
         with gr.Tabs() as tabs:
             with gr.Tab("고객 정보"):
-                customer_interface = create_customer_interface(session_state)
+                customer_interface = create_customer_interface(session_state, container)
             with gr.Tab("영양 정보"):
-                nutrition_interface = create_nutrition_interface(session_state)
+                nutrition_interface = create_nutrition_interface(session_state, container)
     
+    # Per-event concurrency limits are set on each event listener.
+    # Beyond queue_size events users get a "queue is full" error.
+    demo.queue(max_size=container.settings.queue_size, default_concurrency_limit=1)
     return demo
 
+def queue_metrics():
+    """Queue position and wait-time metrics of the gated event handlers"""
+    return gates_snapshot()
+
+def rate_limit_metrics():
+    """Custom Vision rate limiter of this worker: shared token level, acquired and rejected calls, waits"""
+    return limiters_snapshot()
+
+def liveness():
+    """Liveness probe: the worker process is serving requests"""
+    return {"status": "ok"}
+
+def create_readiness(warmup):
+    """Readiness probe: 200 once warm-up succeeded, 503 otherwise"""
+    def readiness():
+        snapshot = warmup.snapshot()
+        return JSONResponse(snapshot, status_code=200 if snapshot['ready'] else 503)
+    return readiness
+
+def is_admin(request, token):
+    """Admin requests carry the FOOD_CLASSIFIER_ADMIN_TOKEN in the X-Admin-Token header"""
+    supplied = request.headers.get('x-admin-token', '')
+    return bool(token) and hmac.compare_digest(supplied.encode(), token.encode())
+
+def create_memory_endpoint(diagnostics, token):
+    """Admin-only memory diagnostics (?snapshot=true samples now)"""
+    def memory(request: Request, snapshot: bool = False):
+        if not is_admin(request, token):
+            return JSONResponse({"error": "forbidden"}, status_code=403)
+        return diagnostics.report(take_sample=snapshot)
+    return memory
+
+def create_profile_endpoints(profiler, token):
+    """
+    Admin-only profiling control:
+    POST /admin/profile?count=N profiles the next N lookups/meal submissions of this worker,
+    GET /admin/profile lists the saved profiles, GET /admin/profile/{name} downloads one
+    """
+    def arm(request: Request, count: int = 1):
+        if not is_admin(request, token):
+            return JSONResponse({"error": "forbidden"}, status_code=403)
+        return {"armed": profiler.arm(count), "directory": profiler.directory}
+
+    def list_profiles(request: Request):
+        if not is_admin(request, token):
+            return JSONResponse({"error": "forbidden"}, status_code=403)
+        return {"profiles": profiler.list_profiles()}
+
+    def download(name: str, request: Request, summary: bool = False):
+        if not is_admin(request, token):
+            return JSONResponse({"error": "forbidden"}, status_code=403)
+        path = profiler.path(name, '.txt' if summary else '.prof')
+        if path is None:
+            return JSONResponse({"error": "not found"}, status_code=404)
+        return FileResponse(path, filename=os.path.basename(path))
+
+    return arm, list_profiles, download
+
+def parse_args():
+    """Parse server options (one worker per port in multi-worker mode)"""
+    parser = argparse.ArgumentParser(description="Food classifier Gradio app")
+    parser.add_argument('--port', type=int, default=get_settings().port,
+                        help="server port (default: FOOD_CLASSIFIER_PORT or 7860)")
+    parser.add_argument('--share', action=argparse.BooleanOptionalAction, default=True,
+                        help="generate public URL (disable for workers behind nginx)")
+    return parser.parse_args()
+
 # Run server
 if __name__ == "__main__":
-    demo = create_demo()
-    demo.launch(
+    # Fail fast on missing or invalid configuration
+    get_settings().validate()
+    args = parse_args()
+    container = ServiceContainer()
+    
+    # Warm up before the port opens, so nginx only reaches warm workers.
+    # Without the database or the catalog the worker cannot serve: exit and let systemd restart it
+    warmup = Warmup(container)
+    if not warmup.run():
+        failed = [name for name, step in warmup.snapshot()['steps'].items() if not step['ok']]
+        sys.exit(f"Warm-up failed ({', '.join(failed)}), not opening port {args.port}")
+    
+    demo = create_demo(container)
+    app, _, _ = demo.launch(
         server_name="0.0.0.0",  # Allow external connections
-        server_port=7860,       # Specify port
-        share=True              # Generate public URL
+        server_port=args.port,  # Specify port
+        share=args.share,       # Generate public URL
+        # Gated calls hold a thread while running and while waiting for a slot:
+        # room for all of them on top of Gradio's default pool for everything else
+        max_threads=GRADIO_DEFAULT_THREADS + thread_demand(),
+        prevent_thread_lock=True
     )
+    app.add_api_route("/metrics/queue", queue_metrics, methods=["GET"])
+    app.add_api_route("/metrics/rate-limit", rate_limit_metrics, methods=["GET"])
+    app.add_api_route("/health/live", liveness, methods=["GET"])
+    app.add_api_route("/health/ready", create_readiness(warmup), methods=["GET"])
+    
+    settings = container.settings
+    if settings.admin_token:
+        arm_profiling, list_profiles, download_profile = create_profile_endpoints(container.profiler, settings.admin_token)
+        app.add_api_route("/admin/profile", arm_profiling, methods=["POST"])
+        app.add_api_route("/admin/profile", list_profiles, methods=["GET"])
+        app.add_api_route("/admin/profile/{name}", download_profile, methods=["GET"])
+    if settings.diagnostics_enabled:
+        from diagnostics import MemoryDiagnostics
+        diagnostics = MemoryDiagnostics(session_store, interval=settings.diagnostics_interval)
+        diagnostics.start()
+        app.add_api_route("/admin/memory", create_memory_endpoint(diagnostics, settings.admin_token), methods=["GET"])
+    demo.block_thread()
@@ -0,0 +1,170 @@
+import os
+import stat
+import time
+import pickle
+import sqlite3
+import tempfile
+import itertools
+import threading
+# Relative: custom_vision/src/config.py loads this package under another name
+from .settings import get_settings
+
+# Shared memory on Linux, so every worker process on the VM sees the same cache.
+# /dev/shm is world-writable: the files live in a directory private to the service user.
+SHARED_MEMORY_DIR = '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+DEFAULT_CACHE_DIR = os.path.join(SHARED_MEMORY_DIR, f'food-classifier-{os.getuid()}')
+
+def check_private_path(path):
+    """
+    Make sure no other user can have created or can replace a shared file:
+    the default directory is created with mode 0700, the directory must be
+    owned by this user (or root) and not writable by others, and the file,
+    if it exists, must be a regular file owned by this user.
+    Cached values are unpickled, so a foreign file would run its author's code.
+
+    Raises:
+        PermissionError: if the path is not private
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    if directory == DEFAULT_CACHE_DIR:
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+
+    uid = os.getuid()
+    directory_stat = os.lstat(directory)
+    if (not stat.S_ISDIR(directory_stat.st_mode) or directory_stat.st_uid not in (uid, 0)
+            or directory_stat.st_mode & (stat.S_IWGRP | stat.S_IWOTH)):
+        raise PermissionError(f"{directory} must be a directory of this user, not writable by others")
+    try:
+        file_stat = os.lstat(path)
+    except FileNotFoundError:
+        return path
+    if not stat.S_ISREG(file_stat.st_mode) or file_stat.st_uid != uid:
+        raise PermissionError(f"{path} must be a regular file owned by this user")
+    return path
+
+class CacheClient:
+    """
+    Key-value cache shared by all worker processes on one machine.
+    Backed by an embedded SQLite file (in a private directory in /dev/shm by default),
+    values are pickled.
+    """
+
+    def __init__(self, path=None, max_entries=5000):
+        """
+        Initialize the cache client.
+        If no path is provided, use the cache_path setting or a file in shared memory.
+        """
+        self.path = (
+            path
+            or get_settings().cache_path
+            or os.path.join(DEFAULT_CACHE_DIR, 'food-classifier-cache.sqlite3')
+        )
+        check_private_path(self.path)
+        self.max_entries = max_entries
+        self._local = threading.local()
+        # Writes of all threads, next() of itertools.count is atomic
+        self._sets = itertools.count(1)
+
+    def _get_connection(self):
+        """
+        Get the SQLite connection of the current thread, creating the table on first use.
+        """
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=OFF")
+            connection.execute("""
+                CREATE TABLE IF NOT EXISTS cache (
+                    namespace TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    value BLOB NOT NULL,
+                    expires_at REAL,
+                    created_at REAL NOT NULL,
+                    PRIMARY KEY (namespace, key)
+                ) WITHOUT ROWID
+            """)
+            connection.execute("CREATE INDEX IF NOT EXISTS cache_created_at ON cache (created_at)")
+            self._local.connection = connection
+        return connection
+
+    def get(self, namespace, key):
+        """
+        Get a cached value, or None if it is missing or expired.
+        """
+        try:
+            row = self._get_connection().execute(
+                "SELECT value, expires_at FROM cache WHERE namespace = ? AND key = ?",
+                (namespace, key)
+            ).fetchone()
+        except sqlite3.Error as err:
+            print("Cache error:", str(err))
+            return None
+
+        if row is None:
+            return None
+        value, expires_at = row
+        if expires_at is not None and expires_at < time.time():
+            self.delete(namespace, key)
+            return None
+        return pickle.loads(value)
+
+    def set(self, namespace, key, value, ttl=None):
+        """
+        Store a value, optionally expiring after ttl seconds.
+        """
+        now = time.time()
+        try:
+            self._get_connection().execute(
+                "INSERT OR REPLACE INTO cache (namespace, key, value, expires_at, created_at) VALUES (?, ?, ?, ?, ?)",
+                (namespace, key, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL),
+                 now + ttl if ttl else None, now)
+            )
+        except sqlite3.Error as err:
+            print("Cache error:", str(err))
+            return False
+
+        # Check the size cap every 100 writes
+        if next(self._sets) % 100 == 0:
+            self._evict()
+        return True
+
+    def delete(self, namespace, key):
+        """
+        Delete a cached value.
+        """
+        try:
+            self._get_connection().execute(
+                "DELETE FROM cache WHERE namespace = ? AND key = ?", (namespace, key)
+            )
+        except sqlite3.Error as err:
+            print("Cache error:", str(err))
+
+    def clear(self, namespace=None):
+        """
+        Delete all values, or all values of one namespace.
+        """
+        try:
+            if namespace is None:
+                self._get_connection().execute("DELETE FROM cache")
+            else:
+                self._get_connection().execute("DELETE FROM cache WHERE namespace = ?", (namespace,))
+        except sqlite3.Error as err:
+            print("Cache error:", str(err))
+
+    def _evict(self):
+        """
+        Drop expired entries, then the oldest entries above max_entries.
+        """
+        try:
+            connection = self._get_connection()
+            connection.execute("DELETE FROM cache WHERE expires_at IS NOT NULL AND expires_at < ?", (time.time(),))
+            count = connection.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+            if count > self.max_entries:
+                connection.execute("""
+                    DELETE FROM cache WHERE (namespace, key) IN (
+                        SELECT namespace, key FROM cache ORDER BY created_at LIMIT ?
+                    )
+                """, (count - self.max_entries,))
+        except sqlite3.Error as err:
+            print("Cache error:", str(err))
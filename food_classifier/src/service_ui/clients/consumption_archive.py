@@ -0,0 +1,244 @@
+import os
+import uuid
+from datetime import date as date_type
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from clients.nutrients import to_number
+
+# Intake columns: nutrient value of the serving times the portion, in NUTRIENT_COLUMNS order
+INTAKE_KEYS = ('calories', 'carbohydrates', 'protein', 'fat', 'fiber', 'sodium')
+
+# Columns of the consumption rows read from the database (see DatabaseClient.get_consumption_after)
+EXPORT_COLUMNS = (
+    'id', 'customer_id', 'food_id', 'food_name', 'portion', 'time', 'date',
+    'Energy', 'Carbohydrates', 'Protein', 'Fat', 'Dietary_Fiber', 'Sodium'
+)
+
+# Schema of the part files; date is the partition key (date=YYYY-MM-DD directories)
+SCHEMA = pa.schema(
+    [
+        ('id', pa.int64()),
+        ('customer_id', pa.int64()),
+        ('food_id', pa.int64()),
+        ('food_name', pa.string()),
+        ('portion', pa.float64()),
+        ('time', pa.timestamp('s'))
+    ]
+    + [(key, pa.float64()) for key in INTAKE_KEYS]
+)
+
+PARTITIONING = ds.partitioning(pa.schema([('date', pa.date32())]), flavor='hive')
+
+PERIODS = ('day', 'week', 'month')
+
+def to_table(rows):
+    """
+    Database rows (EXPORT_COLUMNS tuples) -> (table of SCHEMA, date of each row)
+    Intake is computed on whole columns: nutrient per serving * portion.
+    """
+    columns = list(zip(*rows)) if rows else [()] * len(EXPORT_COLUMNS)
+    by_name = dict(zip(EXPORT_COLUMNS, columns))
+
+    portion = np.array([to_number(value) for value in by_name['portion']], dtype=np.float64)
+    nutrients = np.array(
+        [[to_number(value) for value in by_name[column]] for column in EXPORT_COLUMNS[7:]],
+        dtype=np.float64
+    ).reshape(len(INTAKE_KEYS), len(portion))
+    intake = nutrients * portion
+
+    table = pa.table(
+        {
+            'id': pa.array(by_name['id'], pa.int64()),
+            'customer_id': pa.array(by_name['customer_id'], pa.int64()),
+            'food_id': pa.array(by_name['food_id'], pa.int64()),
+            'food_name': pa.array(by_name['food_name'], pa.string()),
+            'portion': portion,
+            # Stored as recorded (KST wall clock), without time zone
+            'time': pa.array([value.replace(tzinfo=None) if value else None for value in by_name['time']],
+                             pa.timestamp('s')),
+            **{key: intake[idx] for idx, key in enumerate(INTAKE_KEYS)}
+        },
+        schema=SCHEMA
+    )
+    dates = np.array(by_name['date'], dtype='datetime64[D]')
+    return table, dates
+
+def period_start(dates, period):
+    """First day of the day/week (Monday)/month period of each datetime64[D] date"""
+    if period == 'day':
+        return dates
+    if period == 'week':
+        # 1970-01-01 is a Thursday: (days + 3) % 7 is the weekday with Monday = 0
+        days = dates.astype(np.int64)
+        return (days - (days + 3) % 7).astype('datetime64[D]')
+    if period == 'month':
+        return dates.astype('datetime64[M]').astype('datetime64[D]')
+    raise ValueError(f"period must be one of {PERIODS}, got {period!r}")
+
+class ConsumptionArchive:
+    """
+    Columnar copy of consumption joined with nutrition_info, for analytics off
+    the OLTP database.
+
+    Rows are kept in Parquet files partitioned by consumption date
+    (<root>/date=YYYY-MM-DD/part-<first id>.parquet). The export is
+    incremental on consumption.id: each run appends the rows not archived yet,
+    one file per date, each written atomically. Queries scan only the
+    partitions of the requested range and aggregate whole columns.
+    """
+
+    def __init__(self, root):
+        self.root = root
+
+    def dataset(self):
+        """The archive as a pyarrow dataset, or None while it is empty"""
+        if not os.path.isdir(self.root):
+            return None
+        dataset = ds.dataset(self.root, schema=SCHEMA.append(pa.field('date', pa.date32())),
+                             format='parquet', partitioning=PARTITIONING)
+        return dataset if dataset.files else None
+
+    def last_id(self):
+        """Largest archived consumption id (0 for an empty archive)"""
+        dataset = self.dataset()
+        if dataset is None:
+            return 0
+        last = pc.max(dataset.to_table(columns=['id'])['id']).as_py()
+        return last or 0
+
+    def archived_ids(self, first_id):
+        """Archived consumption ids from first_id on"""
+        dataset = self.dataset()
+        if dataset is None:
+            return np.array([], dtype=np.int64)
+        return dataset.to_table(columns=['id'], filter=ds.field('id') >= first_id)['id'].to_numpy()
+
+    def append(self, rows):
+        """
+        Append database rows (EXPORT_COLUMNS tuples, ascending id), skipping
+        the ids already archived
+
+        Returns:
+            int: number of rows appended
+        """
+        if not rows:
+            return 0
+        table, dates = to_table(rows)
+        new = ~np.isin(table['id'].to_numpy(), self.archived_ids(rows[0][0]))
+        table, dates = table.filter(pa.array(new)), dates[new]
+        for day in np.unique(dates):
+            part = table.filter(pa.array(dates == day))
+            directory = os.path.join(self.root, f"date={day}")
+            os.makedirs(directory, exist_ok=True)
+            path = os.path.join(directory, f"part-{part['id'][0].as_py():012d}.parquet")
+            # Hidden temporary name: dataset discovery skips files starting with '.'
+            temporary = os.path.join(directory, f".{uuid.uuid4().hex}.tmp")
+            pq.write_table(part, temporary, compression='zstd')
+            os.replace(temporary, path)
+        return table.num_rows
+
+    def compact(self, before=None):
+        """
+        Merge the part files of each partition into one (partitions before the
+        given date only, the current day may still receive rows)
+
+        Returns:
+            int: number of partitions compacted
+        """
+        compacted = 0
+        if not os.path.isdir(self.root):
+            return compacted
+        for entry in sorted(os.scandir(self.root), key=lambda entry: entry.name):
+            if not entry.is_dir() or not entry.name.startswith('date='):
+                continue
+            if before is not None and entry.name[len('date='):] >= before.isoformat():
+                continue
+            parts = sorted(name for name in os.listdir(entry.path) if name.endswith('.parquet'))
+            if len(parts) < 2:
+                continue
+            table = pa.concat_tables([pq.read_table(os.path.join(entry.path, name), schema=SCHEMA) for name in parts])
+            # Rows are unique by id: a compaction interrupted before removing the merged parts
+            # leaves duplicates, which the next compaction drops
+            _, first = np.unique(table['id'].to_numpy(), return_index=True)
+            table = table.take(first)
+            temporary = os.path.join(entry.path, f".{uuid.uuid4().hex}.tmp")
+            pq.write_table(table, temporary, compression='zstd')
+            os.replace(temporary, os.path.join(entry.path, parts[0]))
+            for name in parts[1:]:
+                os.remove(os.path.join(entry.path, name))
+            compacted += 1
+        return compacted
+
+    def scan(self, start, end, customer_ids=None, columns=None):
+        """
+        Rows consumed between start and end (inclusive dates), optionally of some customers
+
+        Returns:
+            pyarrow.Table: the requested columns (default all, with date)
+        """
+        dataset = self.dataset()
+        if dataset is None:
+            return SCHEMA.append(pa.field('date', pa.date32())).empty_table().select(
+                columns or SCHEMA.names + ['date']
+            )
+        condition = (ds.field('date') >= pa.scalar(start, pa.date32())) & (ds.field('date') <= pa.scalar(end, pa.date32()))
+        if customer_ids is not None:
+            condition &= ds.field('customer_id').isin(list(customer_ids))
+        return dataset.to_table(columns=columns, filter=condition)
+
+    def daily_totals(self, start, end, customer_ids=None):
+        """
+        Total intake per customer and day
+
+        Returns:
+            pyarrow.Table: customer_id, date and one column per INTAKE_KEYS
+        """
+        table = self.scan(start, end, customer_ids, columns=['customer_id', 'date', *INTAKE_KEYS])
+        totals = table.group_by(['customer_id', 'date']).aggregate([(key, 'sum') for key in INTAKE_KEYS])
+        totals = totals.rename_columns([name[:-len('_sum')] if name.endswith('_sum') else name for name in totals.column_names])
+        return totals.sort_by([('customer_id', 'ascending'), ('date', 'ascending')])
+
+    def _trend(self, totals, period):
+        """Average daily intake per period over the (customer, day) rows of totals"""
+        if totals.num_rows == 0:
+            return []
+        periods = period_start(totals['date'].to_numpy().astype('datetime64[D]'), period)
+        keys, index = np.unique(periods, return_inverse=True)
+        days = np.bincount(index, minlength=len(keys))
+        # Distinct customers per period: count the distinct (period, customer) pairs
+        pairs = np.unique(np.stack([index, totals['customer_id'].to_numpy()]), axis=1)
+        customers = np.bincount(pairs[0], minlength=len(keys))
+        averages = {
+            key: np.bincount(index, weights=totals[key].to_numpy(), minlength=len(keys)) / days
+            for key in INTAKE_KEYS
+        }
+        return [
+            {
+                'period': key.astype(date_type),
+                'customers': int(customers[idx]),
+                'days': int(days[idx]),
+                **{f'avg_{name}': round(float(values[idx]), 1) for name, values in averages.items()}
+            }
+            for idx, key in enumerate(keys)
+        ]
+
+    def customer_trend(self, customer_id, start, end, period='day'):
+        """
+        Average daily intake of one customer per day/week/month, over the days with records
+
+        Returns:
+            list: dicts with period (first day), days and avg_<nutrient> per INTAKE_KEYS
+        """
+        return self._trend(self.daily_totals(start, end, [customer_id]), period)
+
+    def facility_trend(self, start, end, period='day'):
+        """
+        Average daily intake per resident per day/week/month, over all residents with records
+
+        Returns:
+            list: dicts with period (first day), customers, resident-days and avg_<nutrient>
+        """
+        return self._trend(self.daily_totals(start, end), period)
@@ -1,54 +1,167 @@
-import os
+import threading
+import weakref
 import mysql.connector
+from mysql.connector.errors import PoolError
 from datetime import datetime, timedelta
-from pathlib import Path
 import pytz
+from clients.settings import get_settings
+from clients.nutrients import to_number, normalize_food_row
+from clients.records import CustomerRecord, FoodRecord, ConsumptionRecord
+
+# Hot queries, run as server-side prepared statements (see DatabaseClient._execute_prepared)
+CUSTOMER_BY_CODE_QUERY = (
+    "SELECT customer_id, code, name, gender, age, height, weight, photo_url, notes "
+    "FROM customer WHERE code = %s"
+)
+FOOD_BY_NAME_QUERY = (
+    "SELECT food_id, food_name, Energy, Carbohydrates, Protein, Fat, Dietary_Fiber, Sodium "
+    "FROM nutrition_info WHERE food_name = %s"
+)
+FOOD_BY_ID_QUERY = (
+    "SELECT food_id, food_name, Energy, Carbohydrates, Protein, Fat, Dietary_Fiber, Sodium "
+    "FROM nutrition_info WHERE food_id = %s"
+)
+TODAY_CONSUMPTION_QUERY = (
+    "SELECT id, customer_id, food_id, portion, time, date "
+    "FROM consumption WHERE customer_id = %s AND date = %s ORDER BY time DESC"
+)
+
+def to_food_record(row):
+    """nutrition_info row tuple -> FoodRecord with float nutrient values"""
+    if row is None:
+        return None
+    return FoodRecord(row[0], row[1], *(to_number(value) for value in row[2:]))
+
+def _first(rows):
+    return rows[0] if rows else None
 
 class DatabaseClient:
-    def __init__(self):
+    def __init__(self, settings=None):
         """
         Initialize the database client with connection parameters.
-        If no parameters are provided, use environment variables from .env file.
-        """
-        env_path = Path('/etc/food-classifier/.env')
-        
-        # Load environment variables from .env file
-        with open(env_path, 'r') as f:
-            for line in f:
-                if '=' in line:
-                    key, value = line.strip().split('=', 1)
-                    os.environ[key] = value.strip('"').strip("'")
-        
-        # Use environment variables
-        self.host = os.getenv('AZURE_MYSQL_HOST')
-        self.user = os.getenv('AZURE_MYSQL_USER')
-        self.password = os.getenv('AZURE_MYSQL_PASSWORD')
-        self.database = os.getenv('AZURE_MYSQL_DATABASE')
-        self.ssl_ca = os.getenv('AZURE_MYSQL_SSL_CA')
-        self.connection = None
+        If no settings are provided, use the process settings (see clients/settings.py).
+        """
+        settings = (settings or get_settings()).validate('mysql')
+        self.host = settings.mysql_host
+        self.user = settings.mysql_user
+        self.password = settings.mysql_password
+        self.database = settings.mysql_database
+        self.ssl_ca = settings.mysql_ssl_ca
+        self.pool_size = settings.mysql_pool_size
+        # One connection per thread, so concurrent event handlers sharing a client don't collide
+        self._local = threading.local()
+        # Prepared cursors by query, per underlying connection (dropped with the connection)
+        self._statements = weakref.WeakKeyDictionary()
+        self._statements_lock = threading.Lock()
+        if not mysql.connector.HAVE_CEXT:
+            print("mysql-connector C extension not available, using the pure Python protocol")
+
+    @property
+    def connection(self):
+        """Connection of the current thread"""
+        return getattr(self._local, 'connection', None)
+
+    @connection.setter
+    def connection(self, value):
+        self._local.connection = value
+
+    def _connection_params(self):
+        return dict(
+            host=self.host,
+            user=self.user,
+            password=self.password,
+            database=self.database,
+            ssl_ca=self.ssl_ca,
+            # C extension: protocol parsing and row conversion in C
+            use_pure=not mysql.connector.HAVE_CEXT,
+            # Every statement is its own transaction: reads leave no REPEATABLE READ snapshot
+            # open on a connection that returns to the pool without a session reset
+            autocommit=True
+        )
+
+    def _pool_params(self):
+        return dict(
+            pool_name='food_classifier',
+            pool_size=self.pool_size,
+            # Keep the session (and its prepared statements) when a connection returns to the pool;
+            # the service sets no session variables and runs in autocommit, so no transaction is carried over
+            pool_reset_session=False,
+            **self._connection_params()
+        )
 
     def connect(self):
         """
         Establish a connection to the Azure MySQL database.
+        Connections come from a per-process pool, so the TLS handshake is paid once
+        per pooled connection; close() hands the connection back to the pool.
         """
         try:
-            self.connection = mysql.connector.connect(
-                host=self.host,
-                user=self.user,
-                password=self.password,
-                database=self.database,
-                ssl_ca=self.ssl_ca
-            )
+            try:
+                self.connection = mysql.connector.connect(**self._pool_params())
+            except PoolError:
+                # Pool exhausted, fall back to a dedicated connection
+                self.connection = mysql.connector.connect(**self._connection_params())
         except mysql.connector.Error as err:
             print("Error connecting to database:", str(err))
             self.connection = None
 
+    def warm_up(self, count=1):
+        """
+        Open up to count pooled connections at once and hand them back,
+        so the first requests don't wait for TLS handshakes.
+
+        Returns:
+            int: number of connections opened
+        """
+        connections = []
+        try:
+            for _ in range(min(count, self.pool_size)):
+                connection = mysql.connector.connect(**self._pool_params())
+                cursor = connection.cursor()
+                cursor.execute("SELECT 1")
+                cursor.fetchall()
+                cursor.close()
+                connections.append(connection)
+        finally:
+            for connection in connections:
+                connection.close()
+        return len(connections)
+
+    def _execute_prepared(self, query, params):
+        """
+        Run one of the fixed hot queries as a server-side prepared statement.
+        The prepared cursor is reused for every later call on the same connection,
+        so each pooled connection prepares a statement once; parameters and rows
+        travel in the binary protocol.
+
+        Returns:
+            list: row tuples
+        """
+        raw_connection = getattr(self.connection, '_cnx', self.connection)
+        with self._statements_lock:
+            cursors = self._statements.setdefault(raw_connection, {})
+
+        for attempt in range(2):
+            cursor = cursors.get(query)
+            if cursor is None:
+                cursor = self.connection.cursor(prepared=True)
+                cursors[query] = cursor
+            try:
+                cursor.execute(query, params)
+                return cursor.fetchall()
+            except mysql.connector.Error:
+                # The statement is gone after a reconnect: prepare it again once
+                cursors.pop(query, None)
+                if attempt:
+                    raise
+
     def close(self):
         """
         Close the database connection.
         """
         if self.connection:
             self.connection.close()
+            self.connection = None
 
     def get_customer_basic_info(self, combined_code):
         """
@@ -59,18 +172,9 @@ class DatabaseClient:
             return None
 
         try:
-            cursor = self.connection.cursor(dictionary=True)
-            
             # Query for customer basic information
-            cursor.execute("""
-                SELECT customer_id, code, name, gender, age, height, weight, photo_url, notes 
-                FROM customer 
-                WHERE code = %s
-            """, (combined_code,))
-            customer_info = cursor.fetchone()
-            
-            cursor.close()
-            return customer_info
+            row = _first(self._execute_prepared(CUSTOMER_BY_CODE_QUERY, (combined_code,)))
+            return None if row is None else CustomerRecord(*row)
             
         except mysql.connector.Error as err:
             print("Database error:", str(err))
@@ -91,16 +195,16 @@ class DatabaseClient:
             # Query for recent 5 days nutritional intake
             five_days_ago = datetime.now() - timedelta(days=5)
             
-            # 쿼리 수정: date로 그룹화하여 일별 총량 계산
+            # 쿼리 수정: date로 그룹화하여 일별 총량 계산 (섭취량 배율 반영)
             cursor.execute("""
                 SELECT 
                     c.date,
-                    SUM(n.Energy) as total_calories,
-                    SUM(n.Carbohydrates) as total_carbohydrates,
-                    SUM(n.Protein) as total_protein,
-                    SUM(n.Fat) as total_fat,
-                    SUM(n.Dietary_Fiber) as total_fiber,
-                    SUM(n.Sodium) as total_sodium
+                    SUM(n.Energy * c.portion) as total_calories,
+                    SUM(n.Carbohydrates * c.portion) as total_carbohydrates,
+                    SUM(n.Protein * c.portion) as total_protein,
+                    SUM(n.Fat * c.portion) as total_fat,
+                    SUM(n.Dietary_Fiber * c.portion) as total_fiber,
+                    SUM(n.Sodium * c.portion) as total_sodium
                 FROM consumption c
                 JOIN nutrition_info n ON c.food_id = n.food_id
                 WHERE c.customer_id = %s AND c.date >= %s
@@ -108,6 +212,10 @@ class DatabaseClient:
                 ORDER BY c.date DESC
             """, (customer_id, five_days_ago))
             recent_nutrition = cursor.fetchall()
+            for row in recent_nutrition:
+                for key in row:
+                    if key.startswith('total_'):
+                        row[key] = to_number(row[key])
             
             # Query for recommended nutrition ranges
             cursor.execute("""
@@ -125,6 +233,7 @@ class DatabaseClient:
             
             cursor.close()
             
+            recommended = {key: to_number(value) for key, value in recommended.items()}
             return {
                 'recent_nutrition': recent_nutrition,
                 'recommended_nutrition': {
@@ -141,6 +250,104 @@ class DatabaseClient:
             print("Database error:", str(err))
             return None
 
+    def get_all_customers(self):
+        """
+        Query basic information of every customer.
+        """
+        if not self.connection:
+            print("No database connection.")
+            return None
+
+        try:
+            cursor = self.connection.cursor(dictionary=True)
+            
+            cursor.execute("""
+                SELECT customer_id, code, name, gender, age, notes
+                FROM customer
+                ORDER BY customer_id
+            """)
+            customers = cursor.fetchall()
+            
+            cursor.close()
+            return customers
+            
+        except mysql.connector.Error as err:
+            print("Database error:", str(err))
+            return None
+
+    def get_daily_nutrition_totals(self, date):
+        """
+        Query every customer's total nutritional intake on the given date
+        in a single grouped query.
+        """
+        if not self.connection:
+            print("No database connection.")
+            return None
+
+        try:
+            cursor = self.connection.cursor(dictionary=True)
+            
+            cursor.execute("""
+                SELECT 
+                    c.customer_id,
+                    SUM(n.Energy * c.portion) as total_calories,
+                    SUM(n.Carbohydrates * c.portion) as total_carbohydrates,
+                    SUM(n.Protein * c.portion) as total_protein,
+                    SUM(n.Fat * c.portion) as total_fat,
+                    SUM(n.Dietary_Fiber * c.portion) as total_fiber,
+                    SUM(n.Sodium * c.portion) as total_sodium
+                FROM consumption c
+                JOIN nutrition_info n ON c.food_id = n.food_id
+                WHERE c.date = %s
+                GROUP BY c.customer_id
+            """, (date,))
+            daily_totals = cursor.fetchall()
+            for row in daily_totals:
+                for key in row:
+                    if key.startswith('total_'):
+                        row[key] = to_number(row[key])
+            
+            cursor.close()
+            return daily_totals
+            
+        except mysql.connector.Error as err:
+            print("Database error:", str(err))
+            return None
+
+    def get_all_recommended_nutrition(self):
+        """
+        Query recommended nutrition ranges of every customer.
+        """
+        if not self.connection:
+            print("No database connection.")
+            return None
+
+        try:
+            cursor = self.connection.cursor(dictionary=True)
+            
+            cursor.execute("""
+                SELECT 
+                    customer_id,
+                    Energy_min, Energy_max,
+                    Carbohydrates_min, Carbohydrates_max,
+                    Protein_min, Protein_max,
+                    Fat_min, Fat_max,
+                    Dietary_Fiber_min, Dietary_Fiber_max,
+                    Sodium_min, Sodium_max
+                FROM recommended_nutrition
+            """)
+            recommended = [
+                {key: value if key == 'customer_id' else to_number(value) for key, value in row.items()}
+                for row in cursor.fetchall()
+            ]
+            
+            cursor.close()
+            return recommended
+            
+        except mysql.connector.Error as err:
+            print("Database error:", str(err))
+            return None
+
     def get_food_info_from_db(self, food_name):
         """
         Query the nutrition database for food information based on the food name.
@@ -150,19 +357,100 @@ class DatabaseClient:
             print("No database connection.")
             return None
 
+        try:
+            # Query for food information from nutrition_info table
+            return to_food_record(_first(self._execute_prepared(FOOD_BY_NAME_QUERY, (food_name,))))
+            
+        except mysql.connector.Error as err:
+            print("Database error:", str(err))
+            return None
+
+    def get_food_infos_from_db(self, food_names):
+        """
+        Query the nutrition database for several foods in one query.
+        Returns a dict of nutrition_info rows by food_name (unknown names are missing).
+        """
+        if not self.connection:
+            print("No database connection.")
+            return None
+
+        food_names = list(dict.fromkeys(food_names))
+        if not food_names:
+            return {}
+
         try:
             cursor = self.connection.cursor(dictionary=True)
             
-            # Query for food information from nutrition_info table
-            cursor.execute("""
+            placeholders = ", ".join(["%s"] * len(food_names))
+            cursor.execute(f"""
                 SELECT food_id, food_name, Energy, Carbohydrates, Protein, Fat, Dietary_Fiber, Sodium
                 FROM nutrition_info 
-                WHERE food_name = %s
-            """, (food_name,))
-            food_info = cursor.fetchone()
+                WHERE food_name IN ({placeholders})
+            """, tuple(food_names))
+            food_infos = {row['food_name']: normalize_food_row(row) for row in cursor.fetchall()}
+            
+            cursor.close()
+            return food_infos
+            
+        except mysql.connector.Error as err:
+            print("Database error:", str(err))
+            return None
+
+    def get_all_food_info(self):
+        """
+        Query every row of the nutrition_info table.
+        Used to build the in-memory nutrition catalog.
+        """
+        if not self.connection:
+            print("No database connection.")
+            return None
+
+        try:
+            cursor = self.connection.cursor(dictionary=True)
+            
+            cursor.execute("""
+                SELECT food_id, food_name, Energy, Carbohydrates, Protein, Fat, Dietary_Fiber, Sodium
+                FROM nutrition_info
+            """)
+            food_infos = [normalize_food_row(row) for row in cursor.fetchall()]
             
             cursor.close()
-            return food_info
+            return food_infos
+            
+        except mysql.connector.Error as err:
+            print("Database error:", str(err))
+            return None
+
+    def get_consumption_after(self, last_id, limit=50000):
+        """
+        Query consumption rows with id above last_id joined with their nutrition_info
+        serving values, in id order, for the analytics export (see clients/consumption_archive.py).
+
+        Returns:
+            list: tuples of consumption_archive.EXPORT_COLUMNS
+        """
+        if not self.connection:
+            print("No database connection.")
+            return None
+
+        try:
+            cursor = self.connection.cursor()
+            
+            # LEFT JOIN keeps records of foods removed from nutrition_info (zero intake)
+            cursor.execute("""
+                SELECT 
+                    c.id, c.customer_id, c.food_id, n.food_name, c.portion, c.time, c.date,
+                    n.Energy, n.Carbohydrates, n.Protein, n.Fat, n.Dietary_Fiber, n.Sodium
+                FROM consumption c
+                LEFT JOIN nutrition_info n ON c.food_id = n.food_id
+                WHERE c.id > %s
+                ORDER BY c.id
+                LIMIT %s
+            """, (last_id, limit))
+            rows = cursor.fetchall()
+            
+            cursor.close()
+            return rows
             
         except mysql.connector.Error as err:
             print("Database error:", str(err))
@@ -194,15 +482,21 @@ class DatabaseClient:
             recommended = cursor.fetchone()
             
             cursor.close()
+            if recommended:
+                recommended = {key: to_number(value) for key, value in recommended.items()}
             return recommended
             
         except mysql.connector.Error as err:
             print("Database error:", str(err))
             return None
 
-    def record_food_consumption(self, customer_id, food_id):
+    def record_food_consumption(self, customer_id, food_id, portion=1.0):
         """
         Record food consumption in the database with KST (Korea Standard Time)
+        portion is the serving multiplier (1.0 = one nutrition_info serving)
+
+        Returns:
+            int: id of the consumption row, False on error
         """
         if not self.connection:
             print("No database connection.")
@@ -217,13 +511,61 @@ class DatabaseClient:
             
             # Insert consumption record with KST
             cursor.execute("""
-                INSERT INTO consumption (customer_id, food_id, time, date)
-                VALUES (%s, %s, %s, %s)
-            """, (customer_id, food_id, now, now.date()))
+                INSERT INTO consumption (customer_id, food_id, portion, time, date)
+                VALUES (%s, %s, %s, %s, %s)
+            """, (customer_id, food_id, portion, now, now.date()))
+            consumption_id = cursor.lastrowid
             
             self.connection.commit()
             cursor.close()
-            return True
+            return consumption_id
+            
+        except mysql.connector.Error as err:
+            print(f"Error recording food consumption: {str(err)}")
+            return False
+         
+    def record_food_consumptions(self, customer_id, food_ids, portions=None):
+        """
+        Record several foods eaten together (one tray) in a single transaction
+        portions are the serving multipliers aligned with food_ids (default 1.0)
+
+        Returns:
+            list: ids of the consumption rows aligned with food_ids, False on error
+        """
+        if not self.connection:
+            print("No database connection.")
+            return False
+        if not food_ids:
+            return []
+
+        try:
+            cursor = self.connection.cursor()
+            
+            # Get current time in KST
+            kst = pytz.timezone('Asia/Seoul')
+            now = datetime.now(kst)
+            
+            portions = portions or [1.0] * len(food_ids)
+            
+            # One row per insert: the ids of a multi-row insert need not be consecutive
+            # (interleaved auto-increment, auto_increment_increment > 1), lastrowid of each row is exact.
+            # The connection runs in autocommit, the tray is recorded all or nothing
+            self.connection.start_transaction()
+            try:
+                consumption_ids = []
+                for food_id, portion in zip(food_ids, portions):
+                    cursor.execute("""
+                        INSERT INTO consumption (customer_id, food_id, portion, time, date)
+                        VALUES (%s, %s, %s, %s, %s)
+                    """, (customer_id, food_id, portion, now, now.date()))
+                    consumption_ids.append(cursor.lastrowid)
+                self.connection.commit()
+            except BaseException:
+                self.connection.rollback()
+                raise
+            finally:
+                cursor.close()
+            return consumption_ids
             
         except mysql.connector.Error as err:
             print(f"Error recording food consumption: {str(err)}")
@@ -238,26 +580,16 @@ class DatabaseClient:
             return False
 
         try:
-            cursor = self.connection.cursor(dictionary=True)
-            
             # Get current date in KST
             kst = pytz.timezone('Asia/Seoul')
             today = datetime.now(kst).date()
             
             # Get today's consumption records
-            query_consumption = """
-                SELECT id, customer_id, food_id, time, date
-                FROM consumption
-                WHERE customer_id = %s 
-                AND date = %s
-                ORDER BY time DESC
-            """
-
-            cursor.execute(query_consumption, (customer_id, today))
-            consumption_records = cursor.fetchall()
-
-            cursor.close()
-            return consumption_records
+            rows = self._execute_prepared(TODAY_CONSUMPTION_QUERY, (customer_id, today))
+            return [
+                ConsumptionRecord(record_id, customer_id, food_id, to_number(portion), time, date)
+                for record_id, customer_id, food_id, portion, time, date in rows
+            ]
 
         except mysql.connector.Error as err:
             print(f"MySQL 에러: {str(err)}")
@@ -273,18 +605,8 @@ class DatabaseClient:
             return None
 
         try:
-            cursor = self.connection.cursor(dictionary=True)
-            
             # Query for food information from nutrition_info table
-            cursor.execute("""
-                SELECT food_id, food_name, Energy, Carbohydrates, Protein, Fat, Dietary_Fiber, Sodium
-                FROM nutrition_info 
-                WHERE food_id = %s
-            """, (food_id,))
-            food_info = cursor.fetchone()
-            
-            cursor.close()
-            return food_info
+            return to_food_record(_first(self._execute_prepared(FOOD_BY_ID_QUERY, (food_id,))))
             
         except mysql.connector.Error as err:
             print("Database error:", str(err))
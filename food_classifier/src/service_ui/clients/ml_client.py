@@ -1,25 +1,68 @@
 from azure.cognitiveservices.vision.customvision.prediction import CustomVisionPredictionClient
 from msrest.authentication import ApiKeyCredentials
-import os
-from pathlib import Path
+import time
+import hashlib
+import numpy as np
+from clients.cache_client import CacheClient
+from clients.rate_limiter import INTERACTIVE, BATCH, RateLimited, create_prediction_limiter
+from clients.settings import get_settings
+
+# Predictions of identical images are reused for a day
+PREDICTION_CACHE_TTL = 24 * 60 * 60
+
+# Overlapping detections above this IoU are the same dish
+DETECTION_IOU_THRESHOLD = 0.5
+
+def suppress_overlaps(detections, iou_threshold=DETECTION_IOU_THRESHOLD):
+    """
+    Non-maximum suppression across tags: of detections whose boxes overlap
+    by more than iou_threshold, keep the most probable one.
+
+    Args:
+        detections: list of (tag_name, confidence, (left, top, width, height))
+
+    Returns:
+        list: kept detections, most confident first
+    """
+    if not detections:
+        return []
+    detections = sorted(detections, key=lambda detection: -detection[1])
+    boxes = np.array([detection[2] for detection in detections], dtype=np.float64)
+    x1, y1 = boxes[:, 0], boxes[:, 1]
+    x2, y2 = x1 + boxes[:, 2], y1 + boxes[:, 3]
+    areas = boxes[:, 2] * boxes[:, 3]
+
+    keep = []
+    remaining = np.arange(len(detections))
+    while len(remaining):
+        current, rest = remaining[0], remaining[1:]
+        keep.append(current)
+        width = np.clip(np.minimum(x2[current], x2[rest]) - np.maximum(x1[current], x1[rest]), 0, None)
+        height = np.clip(np.minimum(y2[current], y2[rest]) - np.maximum(y1[current], y1[rest]), 0, None)
+        intersection = width * height
+        iou = intersection / np.maximum(areas[current] + areas[rest] - intersection, 1e-12)
+        remaining = rest[iou <= iou_threshold]
+    return [detections[idx] for idx in keep]
 
 class MLClient:
-    def __init__(self):
+    def __init__(self, cache=None, settings=None, shadow=None, rate_limiter=None):
         """
         Initialize the ML client with Azure Custom Vision configuration.
+        If no settings are provided, use the process settings (see clients/settings.py).
+        shadow is an optional ShadowEvaluator (see clients/shadow_client.py)
+        that classifies every Custom Vision image again with a local model.
+        Every Custom Vision call takes a token of rate_limiter (see clients/rate_limiter.py),
+        by default the prediction quota shared by all processes of the machine.
         """
-        env_path = Path('/etc/food-classifier/.env')
-        
-        with open(env_path, 'r') as f:
-            for line in f:
-                if '=' in line:
-                    key, value = line.strip().split('=', 1)
-                    os.environ[key] = value.strip('"').strip("'")
-        
-        self.endpoint = os.getenv('AZURE_CUSTOM_VISION_ENDPOINT')
-        self.api_key = os.getenv('AZURE_CUSTOM_VISION_API_KEY')
-        self.project_id = os.getenv('AZURE_CUSTOM_VISION_PROJECT_ID')
-        self.model_name = os.getenv('AZURE_CUSTOM_VISION_MODEL_NAME')
+        settings = (settings or get_settings()).validate('custom_vision')
+        self.settings = settings
+        self.cache = cache or CacheClient()
+        self.shadow = shadow
+        self.rate_limiter = rate_limiter or create_prediction_limiter(settings)
+        self.endpoint = settings.custom_vision_endpoint
+        self.api_key = settings.custom_vision_api_key
+        self.project_id = settings.custom_vision_project_id
+        self.model_name = settings.custom_vision_model_name
         
         credentials = ApiKeyCredentials(in_headers={"Prediction-key": self.api_key})
         self.classifier = CustomVisionPredictionClient(endpoint=self.endpoint, credentials=credentials)
@@ -34,12 +77,21 @@ class MLClient:
         Returns:
             tuple: (food_name, confidence)
         """
+        # Reuse the prediction if any worker has already classified this image
+        image_hash = hashlib.sha256(img_bytes).hexdigest()
+        cached = self.cache.get('prediction', image_hash)
+        if cached is not None:
+            return cached
+        
         try:
+            self.rate_limiter.acquire(INTERACTIVE)
+            start = time.perf_counter()
             results = self.classifier.classify_image(
                 project_id=self.project_id,
                 published_name=self.model_name,
                 image_data=img_bytes
             )
+            azure_seconds = time.perf_counter() - start
             
             if results.predictions:
                 # Get the prediction with highest probability
@@ -48,11 +100,78 @@ class MLClient:
                 confidence = top_prediction.probability * 100
                 
                 print(f"Food name: {food_name}, Confidence: {confidence}")
+                self.cache.set('prediction', image_hash, (food_name, confidence), ttl=PREDICTION_CACHE_TTL)
+                if self.shadow is not None:
+                    # Queued only, the local model runs on the shadow thread
+                    self.shadow.submit(image_hash, img_bytes, food_name, confidence, azure_seconds)
                 return food_name, confidence
             else:
                 print("No predictions returned from Custom Vision")
                 return "Unknown", 0.0
                 
+        except RateLimited as e:
+            print(f"Custom Vision prediction rate limited: {str(e)}")
+            return "Unknown", 0.0
         except Exception as e:
             print(f"Error in Custom Vision prediction: {str(e)}")
             return "Unknown", 0.0
+
+    def get_food_detections(self, img_bytes):
+        """
+        Detect every dish on a tray photo with the Custom Vision object detection project.
+        
+        Args:
+            img_bytes: Image data in bytes
+            
+        Returns:
+            list: (food_name, confidence, (left, top, width, height)) with the box
+            normalized to the image size, most confident first
+        """
+        self.settings.validate('detection')
+        
+        image_hash = hashlib.sha256(img_bytes).hexdigest()
+        cached = self.cache.get('detection', image_hash)
+        if cached is not None:
+            return cached
+        
+        try:
+            self.rate_limiter.acquire(INTERACTIVE)
+            results = self.classifier.detect_image(
+                project_id=self.settings.detection_project_id,
+                published_name=self.settings.detection_model_name,
+                image_data=img_bytes
+            )
+        except Exception as e:
+            print(f"Error in Custom Vision detection: {str(e)}")
+            return []
+        
+        detections = suppress_overlaps([
+            (
+                prediction.tag_name,
+                prediction.probability * 100,
+                (prediction.bounding_box.left, prediction.bounding_box.top,
+                 prediction.bounding_box.width, prediction.bounding_box.height)
+            )
+            for prediction in results.predictions
+            if prediction.probability >= self.settings.detection_threshold
+        ])
+        print(f"Detected foods: {[(name, round(confidence, 1)) for name, confidence, _ in detections]}")
+        self.cache.set('detection', image_hash, detections, ttl=PREDICTION_CACHE_TTL)
+        return detections
+
+    def warm_up(self, img_bytes):
+        """
+        Classify an image bypassing the cache, to open the connection to Custom Vision.
+        Errors are raised to the caller. The call has batch priority, so restarting
+        workers don't take tokens from kiosk predictions.
+
+        Returns:
+            int: number of predictions returned
+        """
+        self.rate_limiter.acquire(BATCH, timeout=self.settings.prediction_max_wait)
+        results = self.classifier.classify_image(
+            project_id=self.project_id,
+            published_name=self.model_name,
+            image_data=img_bytes
+        )
+        return len(results.predictions)
@@ -0,0 +1,39 @@
+import re
+from decimal import Decimal
+
+# Nutrient columns of nutrition_info, in the fixed order used as the nutrient axis
+NUTRIENT_COLUMNS = ('Energy', 'Carbohydrates', 'Protein', 'Fat', 'Dietary_Fiber', 'Sodium')
+
+# Unit of each nutrient column
+NUTRIENT_UNITS = {
+    'Energy': 'kcal',
+    'Carbohydrates': 'g',
+    'Protein': 'g',
+    'Fat': 'g',
+    'Dietary_Fiber': 'g',
+    'Sodium': 'mg'
+}
+
+_NUMBER_PATTERN = re.compile(r'(\d+\.?\d*)')
+
+def to_number(value):
+    """
+    Convert a nutrient value from the database to float
+    example: '180kcal' -> 180.0, Decimal('12.5') -> 12.5, None -> 0.0
+    """
+    if value is None:
+        return 0.0
+    if isinstance(value, (int, float, Decimal)):
+        return float(value)
+    match = _NUMBER_PATTERN.search(str(value))
+    return float(match.group(1)) if match else 0.0
+
+def normalize_food_row(row):
+    """
+    Normalize the nutrient columns of a nutrition_info row to float in place.
+    """
+    if row:
+        for column in NUTRIENT_COLUMNS:
+            if column in row:
+                row[column] = to_number(row[column])
+    return row
@@ -0,0 +1,170 @@
+import io
+import os
+import json
+import time
+import uuid
+import queue
+import hashlib
+import threading
+
+# Writes between two scans of the archive size (other workers write to the same directory)
+RESCAN_EVERY = 200
+
+# Eviction stops at this fraction of the size cap, so it doesn't run on every write
+EVICT_TO = 0.9
+
+def encode_jpeg(image):
+    """JPEG bytes of a PIL image, encoded as FoodProcessor.predict does (same hash as the prediction cache)"""
+    buffer = io.BytesIO()
+    image.save(buffer, format='JPEG')
+    return buffer.getvalue()
+
+class MealPhotoArchiver:
+    """
+    Archive of the submitted meal photos, for retraining and replaying benchmarks.
+
+    Each photo is stored once under its SHA-256 (<root>/<2 hex>/<hash>.jpg);
+    every submission of it appends a record to <hash>.jsonl next to it with the
+    prediction, confidence, food_id, portion and consumption id of each dish.
+    Photos are handed to a background thread through a bounded queue: the
+    request thread only queues, and when the queue is full the photo is dropped.
+    When the archive grows beyond max_bytes, the least recently submitted
+    photos are evicted. Worker processes share the directory.
+    """
+
+    def __init__(self, root, max_bytes, queue_size=16):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.submitted = 0
+        self.dropped = 0
+        self.failed = 0
+        self.stored = 0
+        self.duplicates = 0
+        self.evicted = 0
+        self._size = None
+        self._writes = 0
+        self._queue = queue.Queue(maxsize=queue_size)
+        threading.Thread(target=self._run, name='photo-archiver', daemon=True).start()
+
+    @classmethod
+    def from_settings(cls, settings):
+        return cls(
+            root=settings.photo_archive_path,
+            max_bytes=settings.photo_archive_max_mb * 1024 ** 2,
+            queue_size=settings.photo_archive_queue_size
+        )
+
+    def submit(self, image, dishes):
+        """Queue a PIL image and its dish records (returns immediately)"""
+        try:
+            self._queue.put_nowait((time.time(), image, dishes))
+            self.submitted += 1
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self):
+        while True:
+            timestamp, image, dishes = self._queue.get()
+            try:
+                self.store(encode_jpeg(image), {'time': int(timestamp), 'dishes': dishes})
+            except Exception as e:
+                self.failed += 1
+                print(f"Error archiving meal photo: {str(e)}")
+
+    def paths(self, image_hash):
+        """(photo, records) paths of a hash"""
+        base = os.path.join(self.root, image_hash[:2], image_hash)
+        return base + '.jpg', base + '.jsonl'
+
+    def store(self, jpeg, record):
+        """
+        Store a photo (unless already archived) and append its record
+
+        Returns:
+            str: the photo's hash
+        """
+        image_hash = hashlib.sha256(jpeg).hexdigest()
+        photo_path, records_path = self.paths(image_hash)
+        os.makedirs(os.path.dirname(photo_path), exist_ok=True)
+
+        try:
+            # Submitted again: most recently used for eviction
+            os.utime(photo_path)
+            self.duplicates += 1
+            added = 0
+        except FileNotFoundError:
+            temporary = f"{photo_path}.{uuid.uuid4().hex}.tmp"
+            with open(temporary, 'wb') as f:
+                f.write(jpeg)
+            os.replace(temporary, photo_path)
+            self.stored += 1
+            added = len(jpeg)
+
+        line = json.dumps({'hash': image_hash, **record}, ensure_ascii=False) + '\n'
+        with open(records_path, 'a', encoding='utf-8') as f:
+            f.write(line)
+        self._account(added + len(line.encode('utf-8')))
+        return image_hash
+
+    def _account(self, added):
+        """Track the archive size and evict when it passes the cap"""
+        self._writes += 1
+        if self._size is None or self._writes % RESCAN_EVERY == 0:
+            self._size = self._scan()[1]
+        else:
+            self._size += added
+        if self._size > self.max_bytes:
+            self._evict()
+
+    def _scan(self):
+        """
+        Returns:
+            tuple: (list of (mtime, hash, bytes of photo and records), total bytes)
+        """
+        entries, total = [], 0
+        for directory in os.scandir(self.root):
+            if not directory.is_dir():
+                continue
+            sizes = {}
+            for entry in os.scandir(directory.path):
+                name, extension = os.path.splitext(entry.name)
+                if extension not in ('.jpg', '.jsonl'):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue  # evicted by another worker
+                mtime, size = sizes.get(name, (0.0, 0))
+                sizes[name] = (stat.st_mtime if extension == '.jpg' else mtime, size + stat.st_size)
+                total += stat.st_size
+            entries.extend((mtime, name, size) for name, (mtime, size) in sizes.items())
+        return entries, total
+
+    def _evict(self):
+        """Delete the least recently submitted photos until the archive is under EVICT_TO of the cap"""
+        entries, total = self._scan()
+        entries.sort()
+        for _, image_hash, size in entries:
+            if total <= self.max_bytes * EVICT_TO:
+                break
+            for path in self.paths(image_hash):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+            total -= size
+            self.evicted += 1
+        self._size = total
+
+    def snapshot(self):
+        """Counters of the archive queue and store"""
+        return {
+            'submitted': self.submitted,
+            'dropped': self.dropped,
+            'failed': self.failed,
+            'stored': self.stored,
+            'duplicates': self.duplicates,
+            'evicted': self.evicted,
+            'pending': self._queue.qsize(),
+            'size_mb': round(self._size / 1024 ** 2, 1) if self._size is not None else None
+        }
@@ -0,0 +1,226 @@
+import os
+import time
+import uuid
+import random
+import sqlite3
+import threading
+from collections import deque
+import numpy as np
+# Relative: custom_vision/src/config.py loads this package under another name
+from .settings import get_settings
+from .cache_client import DEFAULT_CACHE_DIR, check_private_path
+
+# Priority classes: interactive calls are served ahead of batch calls
+INTERACTIVE = 'interactive'
+BATCH = 'batch'
+
+# A waiting interactive caller that hasn't refreshed its row for this long is gone
+WAITER_TTL = 10.0
+
+# Registered limiters by name
+_limiters = {}
+
+class RateLimited(Exception):
+    """No token could be acquired within the allowed wait"""
+
+class TokenBucketLimiter:
+    """
+    Token bucket shared by every process on one machine (workers, evaluation
+    scripts, batch jobs), kept in an embedded SQLite file next to the cache.
+
+    The bucket refills at rate tokens per second up to burst tokens.
+    Interactive calls may take any token; batch calls leave reserve of the
+    burst to interactive calls and hold back entirely while an interactive
+    caller is waiting, so a large evaluation cannot starve kiosk predictions.
+    """
+
+    def __init__(self, name, rate, burst, path, batch_reserve=0.5, max_wait=5.0):
+        self.name = name
+        self.rate = rate
+        self.burst = burst
+        self.path = check_private_path(path)
+        self.reserve = burst * batch_reserve
+        self.max_wait = max_wait
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._stats = {
+            priority: {'acquired': 0, 'rejected': 0, 'wait_times': deque(maxlen=1000)}
+            for priority in (INTERACTIVE, BATCH)
+        }
+
+    def _get_connection(self):
+        """SQLite connection of the current thread, creating the tables on first use"""
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("""
+                CREATE TABLE IF NOT EXISTS buckets (
+                    name TEXT PRIMARY KEY,
+                    tokens REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+            """)
+            connection.execute("""
+                CREATE TABLE IF NOT EXISTS waiters (
+                    id TEXT PRIMARY KEY,
+                    name TEXT NOT NULL,
+                    seen_at REAL NOT NULL
+                )
+            """)
+            self._local.connection = connection
+        return connection
+
+    def _try_take(self, priority, waiter_id=None):
+        """
+        Take a token if the priority allows it.
+
+        Returns:
+            float: 0 if a token was taken, otherwise the estimated seconds until one is available
+        """
+        connection = self._get_connection()
+        now = time.time()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            row = connection.execute(
+                "SELECT tokens, updated_at FROM buckets WHERE name = ?", (self.name,)
+            ).fetchone()
+            tokens = self.burst if row is None else min(self.burst, row[0] + (now - row[1]) * self.rate)
+
+            if priority == BATCH:
+                floor = self.reserve + 1
+                interactive_waiting = connection.execute(
+                    "SELECT 1 FROM waiters WHERE name = ? AND seen_at > ? LIMIT 1",
+                    (self.name, now - WAITER_TTL)
+                ).fetchone()
+                if interactive_waiting:
+                    floor = self.burst + 1  # never enough: wait for the interactive caller
+            else:
+                floor = 1.0
+                if waiter_id is not None:
+                    connection.execute(
+                        "INSERT OR REPLACE INTO waiters (id, name, seen_at) VALUES (?, ?, ?)",
+                        (waiter_id, self.name, now)
+                    )
+
+            taken = tokens >= floor
+            if taken:
+                tokens -= 1
+            connection.execute(
+                "INSERT OR REPLACE INTO buckets (name, tokens, updated_at) VALUES (?, ?, ?)",
+                (self.name, tokens, now)
+            )
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        return 0.0 if taken else max(floor - tokens, 0.0) / self.rate
+
+    def _remove_waiter(self, waiter_id):
+        self._get_connection().execute("DELETE FROM waiters WHERE id = ?", (waiter_id,))
+
+    def acquire(self, priority=INTERACTIVE, timeout=None):
+        """
+        Wait for a token.
+        timeout defaults to max_wait for interactive calls and no limit for batch calls.
+
+        Returns:
+            float: seconds waited
+
+        Raises:
+            RateLimited: if no token was available within timeout
+        """
+        if timeout is None and priority == INTERACTIVE:
+            timeout = self.max_wait
+        start = time.monotonic()
+        waiter_id = None
+        try:
+            while True:
+                try:
+                    wait = self._try_take(priority, waiter_id)
+                except sqlite3.Error as err:
+                    # Fail open: the limiter must not take predictions down
+                    print("Rate limiter error:", str(err))
+                    wait = 0.0
+                waited = time.monotonic() - start
+                if wait == 0.0:
+                    self._record(priority, waited)
+                    return waited
+                if timeout is not None and waited + wait > timeout:
+                    self._record(priority, None)
+                    raise RateLimited(f"{self.name}: no {priority} token within {timeout}s")
+
+                if priority == INTERACTIVE:
+                    # Announce the waiting caller, batch callers hold back until it is served
+                    waiter_id = waiter_id or uuid.uuid4().hex
+                    time.sleep(min(wait, 0.05))
+                else:
+                    time.sleep(max(wait, 0.2) * random.uniform(1.0, 1.5))
+        finally:
+            if waiter_id is not None:
+                try:
+                    self._remove_waiter(waiter_id)
+                except sqlite3.Error:
+                    pass
+
+    def tokens(self):
+        """Tokens currently in the shared bucket, or None if the store cannot be read"""
+        try:
+            row = self._get_connection().execute(
+                "SELECT tokens, updated_at FROM buckets WHERE name = ?", (self.name,)
+            ).fetchone()
+        except sqlite3.Error:
+            return None
+        if row is None:
+            return float(self.burst)
+        return round(min(self.burst, row[0] + (time.time() - row[1]) * self.rate), 2)
+
+    def _record(self, priority, waited):
+        with self._lock:
+            stats = self._stats[priority]
+            if waited is None:
+                stats['rejected'] += 1
+            else:
+                stats['acquired'] += 1
+                stats['wait_times'].append(waited)
+
+    def snapshot(self):
+        """Acquired and rejected calls and wait-time percentiles of this process, per priority"""
+        snapshot = {'rate': self.rate, 'burst': self.burst, 'reserve': self.reserve, 'tokens': self.tokens()}
+        with self._lock:
+            stats = {
+                priority: (values['acquired'], values['rejected'], np.array(values['wait_times']))
+                for priority, values in self._stats.items()
+            }
+        for priority, (acquired, rejected, wait_times) in stats.items():
+            p50, p95 = np.percentile(wait_times, [50, 95]) if len(wait_times) else (0.0, 0.0)
+            snapshot[priority] = {
+                'acquired': acquired,
+                'rejected': rejected,
+                'wait_p50': round(float(p50), 4),
+                'wait_p95': round(float(p95), 4)
+            }
+        return snapshot
+
+def create_prediction_limiter(settings=None):
+    """
+    Limiter of the Custom Vision prediction quota, shared by every caller of
+    classify_image/detect_image on this machine (one instance per process)
+    """
+    settings = settings or get_settings()
+    limiter = _limiters.get('custom_vision')
+    if limiter is None:
+        limiter = TokenBucketLimiter(
+            'custom_vision',
+            rate=settings.prediction_rate,
+            burst=settings.prediction_burst,
+            path=settings.rate_limit_path or os.path.join(DEFAULT_CACHE_DIR, 'food-classifier-ratelimit.sqlite3'),
+            batch_reserve=settings.prediction_batch_reserve,
+            max_wait=settings.prediction_max_wait
+        )
+        _limiters['custom_vision'] = limiter
+    return limiter
+
+def limiters_snapshot():
+    """Snapshots of all limiters created in this process"""
+    return {name: limiter.snapshot() for name, limiter in _limiters.items()}
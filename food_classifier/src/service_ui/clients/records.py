@@ -0,0 +1,57 @@
+from collections import namedtuple
+
+def record_type(name, fields):
+    """
+    Create a lightweight named record type for the rows of a fixed query.
+
+    Records are tuples (no per-row dict), readable by attribute (row.food_id)
+    and by column name (row['food_id'], row.get('notes'), 'food_id' in row),
+    so they stand in for the rows of a dictionary cursor.
+    """
+    base = namedtuple(name, fields)
+    index = {field: idx for idx, field in enumerate(base._fields)}
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            try:
+                key = index[key]
+            except KeyError:
+                raise KeyError(key) from None
+        return tuple.__getitem__(self, key)
+
+    def get(self, key, default=None):
+        idx = index.get(key)
+        return default if idx is None else tuple.__getitem__(self, idx)
+
+    def __contains__(self, key):
+        return key in index
+
+    def keys(self):
+        return base._fields
+
+    def items(self):
+        return zip(base._fields, self)
+
+    return type(name, (base,), {
+        '__slots__': (),
+        '__module__': __name__,
+        '__getitem__': __getitem__,
+        '__contains__': __contains__,
+        'get': get,
+        'keys': keys,
+        'items': items,
+    })
+
+# Rows of the hot queries of DatabaseClient (module level, so records can be pickled)
+CustomerRecord = record_type(
+    'CustomerRecord',
+    ('customer_id', 'code', 'name', 'gender', 'age', 'height', 'weight', 'photo_url', 'notes')
+)
+FoodRecord = record_type(
+    'FoodRecord',
+    ('food_id', 'food_name', 'Energy', 'Carbohydrates', 'Protein', 'Fat', 'Dietary_Fiber', 'Sodium')
+)
+ConsumptionRecord = record_type(
+    'ConsumptionRecord',
+    ('id', 'customer_id', 'food_id', 'portion', 'time', 'date')
+)
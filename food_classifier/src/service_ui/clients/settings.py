@@ -0,0 +1,203 @@
+import os
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass, field, fields, replace
+from pathlib import Path
+
+# Environment file written by the deploy workflow
+DEFAULT_ENV_PATH = Path('/etc/food-classifier/.env')
+
+def _env(name):
+    return field(default=None, metadata={'env': name})
+
+@dataclass(frozen=True)
+class Settings:
+    """
+    Service configuration, loaded once per process.
+    Each field is read from the environment variable in its metadata.
+    """
+    # Azure Custom Vision
+    custom_vision_endpoint: str = _env('AZURE_CUSTOM_VISION_ENDPOINT')
+    custom_vision_api_key: str = _env('AZURE_CUSTOM_VISION_API_KEY')
+    custom_vision_project_id: str = _env('AZURE_CUSTOM_VISION_PROJECT_ID')
+    custom_vision_model_name: str = _env('AZURE_CUSTOM_VISION_MODEL_NAME')
+
+    # Azure Custom Vision object detection project (optional, multi-dish trays)
+    detection_project_id: str = _env('AZURE_CUSTOM_VISION_DETECTION_PROJECT_ID')
+    detection_model_name: str = _env('AZURE_CUSTOM_VISION_DETECTION_MODEL_NAME')
+    detection_threshold: float = field(default=0.5, metadata={'env': 'AZURE_CUSTOM_VISION_DETECTION_THRESHOLD'})
+
+    # Azure Database for MySQL
+    mysql_host: str = _env('AZURE_MYSQL_HOST')
+    mysql_database: str = _env('AZURE_MYSQL_DATABASE')
+    mysql_user: str = _env('AZURE_MYSQL_USER')
+    mysql_password: str = _env('AZURE_MYSQL_PASSWORD')
+    mysql_ssl_ca: str = _env('AZURE_MYSQL_SSL_CA')
+    mysql_pool_size: int = field(default=12, metadata={'env': 'FOOD_CLASSIFIER_MYSQL_POOL_SIZE'})
+
+    # Server
+    port: int = field(default=7860, metadata={'env': 'FOOD_CLASSIFIER_PORT'})
+    cache_path: str = _env('FOOD_CLASSIFIER_CACHE_PATH')
+    queue_size: int = field(default=64, metadata={'env': 'FOOD_CLASSIFIER_QUEUE_SIZE'})
+    meal_concurrency: int = field(default=4, metadata={'env': 'FOOD_CLASSIFIER_MEAL_CONCURRENCY'})
+    meal_max_waiting: int = field(default=16, metadata={'env': 'FOOD_CLASSIFIER_MEAL_MAX_WAITING'})
+    lookup_concurrency: int = field(default=8, metadata={'env': 'FOOD_CLASSIFIER_LOOKUP_CONCURRENCY'})
+    lookup_max_waiting: int = field(default=16, metadata={'env': 'FOOD_CLASSIFIER_LOOKUP_MAX_WAITING'})
+    max_wait_seconds: float = field(default=30.0, metadata={'env': 'FOOD_CLASSIFIER_MAX_WAIT_SECONDS'})
+    session_ttl: int = field(default=12 * 60 * 60, metadata={'env': 'FOOD_CLASSIFIER_SESSION_TTL'})
+    max_sessions: int = field(default=1000, metadata={'env': 'FOOD_CLASSIFIER_MAX_SESSIONS'})
+
+    # Custom Vision prediction quota, shared by all processes of the machine (see clients/rate_limiter.py)
+    prediction_rate: float = field(default=10.0, metadata={'env': 'FOOD_CLASSIFIER_PREDICTION_RATE'})
+    prediction_burst: int = field(default=10, metadata={'env': 'FOOD_CLASSIFIER_PREDICTION_BURST'})
+    prediction_batch_reserve: float = field(default=0.5, metadata={'env': 'FOOD_CLASSIFIER_PREDICTION_BATCH_RESERVE'})
+    prediction_max_wait: float = field(default=5.0, metadata={'env': 'FOOD_CLASSIFIER_PREDICTION_MAX_WAIT'})
+    rate_limit_path: str = _env('FOOD_CLASSIFIER_RATE_LIMIT_PATH')
+
+    # Food name resolution (see components/utils/nutrition_catalog.py)
+    food_aliases_path: str = _env('FOOD_CLASSIFIER_FOOD_ALIASES')
+    classifier_tags_path: str = _env('FOOD_CLASSIFIER_CLASSIFIER_TAGS')
+
+    # Archive of submitted meal photos (see clients/photo_archive.py), opt-in
+    photo_archive_path: str = _env('FOOD_CLASSIFIER_PHOTO_ARCHIVE')
+    photo_archive_max_mb: int = field(default=2048, metadata={'env': 'FOOD_CLASSIFIER_PHOTO_ARCHIVE_MAX_MB'})
+    photo_archive_queue_size: int = field(default=16, metadata={'env': 'FOOD_CLASSIFIER_PHOTO_ARCHIVE_QUEUE_SIZE'})
+
+    # Consumption analytics archive (see clients/consumption_archive.py)
+    consumption_archive_path: str = field(default='/var/lib/food-classifier/consumption', metadata={'env': 'FOOD_CLASSIFIER_CONSUMPTION_ARCHIVE'})
+
+    # Memory diagnostics (see diagnostics.py), opt-in
+    diagnostics_enabled: bool = field(default=False, metadata={'env': 'FOOD_CLASSIFIER_DIAGNOSTICS'})
+    diagnostics_interval: int = field(default=300, metadata={'env': 'FOOD_CLASSIFIER_DIAGNOSTICS_INTERVAL'})
+    admin_token: str = _env('FOOD_CLASSIFIER_ADMIN_TOKEN')
+
+    # Shadow mode: local ONNX model evaluated next to Custom Vision (see clients/shadow_client.py)
+    shadow_model_path: str = _env('FOOD_CLASSIFIER_SHADOW_MODEL')
+    shadow_log_path: str = field(default='/var/log/food-classifier/shadow.csv', metadata={'env': 'FOOD_CLASSIFIER_SHADOW_LOG'})
+    shadow_queue_size: int = field(default=32, metadata={'env': 'FOOD_CLASSIFIER_SHADOW_QUEUE_SIZE'})
+    shadow_threads: int = field(default=1, metadata={'env': 'FOOD_CLASSIFIER_SHADOW_THREADS'})
+
+    # Per-request profiling (see components/utils/request_profiler.py)
+    profile_dir: str = _env('FOOD_CLASSIFIER_PROFILE_DIR')
+    profile_rate: float = field(default=None, metadata={'env': 'FOOD_CLASSIFIER_PROFILE_RATE'})
+    profile_max_files: int = field(default=200, metadata={'env': 'FOOD_CLASSIFIER_PROFILE_MAX_FILES'})
+    profile_min_seconds: float = field(default=None, metadata={'env': 'FOOD_CLASSIFIER_PROFILE_MIN_SECONDS'})
+
+    # Warm-up (see warmup.py)
+    warmup_prediction: bool = field(default=True, metadata={'env': 'FOOD_CLASSIFIER_WARMUP_PREDICTION'})
+    warmup_image: str = _env('FOOD_CLASSIFIER_WARMUP_IMAGE')
+
+    def __post_init__(self):
+        for f in fields(self):
+            value = getattr(self, f.name)
+            if f.type in (int, float) and value is not None and value <= 0:
+                raise ValueError(f"{f.metadata['env']} must be positive, got {value}")
+        if self.mysql_pool_size > 32:
+            # Upper bound of mysql.connector pools
+            raise ValueError(f"FOOD_CLASSIFIER_MYSQL_POOL_SIZE must be at most 32, got {self.mysql_pool_size}")
+        if self.profile_rate is not None and self.profile_rate > 1:
+            raise ValueError(f"FOOD_CLASSIFIER_PROFILE_RATE must be at most 1, got {self.profile_rate}")
+        if self.prediction_batch_reserve >= 1:
+            # Batch calls need some of the burst
+            raise ValueError(
+                f"FOOD_CLASSIFIER_PREDICTION_BATCH_RESERVE must be below 1, got {self.prediction_batch_reserve}"
+            )
+        if self.diagnostics_enabled and not self.admin_token:
+            # The diagnostics endpoint is admin-only
+            raise ValueError("FOOD_CLASSIFIER_DIAGNOSTICS requires FOOD_CLASSIFIER_ADMIN_TOKEN")
+
+    def validate(self, *sections):
+        """
+        Check that the required values of the given sections ('custom_vision', 'mysql', 'detection') are set.
+        Without sections, the sections the service cannot run without are checked.
+        """
+        sections = sections or ('custom_vision', 'mysql')
+        missing = [
+            f.metadata['env'] for f in fields(self)
+            if f.name.startswith(sections) and f.name != 'mysql_ssl_ca' and not getattr(self, f.name)
+        ]
+        if missing:
+            raise ValueError(f"Missing configuration: {', '.join(missing)}")
+        return self
+
+def _read_env_file(env_path):
+    """
+    Parse KEY=VALUE lines of an environment file.
+    """
+    values = {}
+    with open(env_path, 'r') as f:
+        for line in f:
+            line = line.strip()
+            if '=' in line and not line.startswith('#'):
+                key, value = line.split('=', 1)
+                values[key.strip()] = value.strip().strip('"').strip("'")
+    return values
+
+def _convert(value, type_):
+    if type_ is bool:
+        if value.lower() not in ('1', 'true', 'yes', 'on', '0', 'false', 'no', 'off'):
+            raise ValueError(value)
+        return value.lower() in ('1', 'true', 'yes', 'on')
+    if type_ is int:
+        return int(value)
+    if type_ is float:
+        return float(value)
+    return value
+
+def load_settings(env_path=None):
+    """
+    Load settings from the environment file and the process environment.
+    The environment file is FOOD_CLASSIFIER_ENV_FILE, /etc/food-classifier/.env
+    or .env in the working directory, whichever exists first.
+    Process environment variables take precedence over the file.
+    """
+    if env_path is None:
+        candidates = [os.getenv('FOOD_CLASSIFIER_ENV_FILE'), DEFAULT_ENV_PATH, Path('.env')]
+        env_path = next((Path(p) for p in candidates if p and Path(p).is_file()), None)
+
+    values = _read_env_file(env_path) if env_path else {}
+    values.update(os.environ)
+
+    kwargs = {}
+    for f in fields(Settings):
+        raw = values.get(f.metadata['env'])
+        if raw not in (None, ''):
+            try:
+                kwargs[f.name] = _convert(raw, f.type)
+            except ValueError:
+                raise ValueError(f"{f.metadata['env']} must be {f.type.__name__}, got {raw!r}") from None
+    return Settings(**kwargs)
+
+_settings = None
+_settings_lock = threading.Lock()
+
+def get_settings():
+    """Get the settings of this process, loading them on first use"""
+    global _settings
+    if _settings is None:
+        with _settings_lock:
+            if _settings is None:
+                _settings = load_settings()
+    return _settings
+
+def set_settings(settings):
+    """Replace the settings of this process (None reloads on next use)"""
+    global _settings
+    with _settings_lock:
+        _settings = settings
+
+@contextmanager
+def override_settings(**changes):
+    """
+    Temporarily override settings, for tests and stand-in services.
+
+    Example:
+        with override_settings(mysql_host='localhost'):
+            client = DatabaseClient()
+    """
+    previous = _settings
+    set_settings(replace(get_settings(), **changes))
+    try:
+        yield get_settings()
+    finally:
+        set_settings(previous)
@@ -0,0 +1,160 @@
+import io
+import os
+import csv
+import json
+import time
+import queue
+import threading
+import numpy as np
+from PIL import Image, ImageOps
+
+# Columns of the shadow log
+SHADOW_LOG_FIELDS = (
+    'time', 'image', 'azure_tag', 'azure_confidence', 'azure_ms', 'local_tag', 'local_confidence', 'local_ms'
+)
+
+# ImageNet statistics used by the pretrained ResNet50 weights (same as training/loader.py)
+IMAGENET_MEAN = np.array((0.485, 0.456, 0.406), dtype=np.float32)
+IMAGENET_STD = np.array((0.229, 0.224, 0.225), dtype=np.float32)
+
+class LocalClassifier:
+    """
+    ONNX model exported by training/export.py, run with onnxruntime on the CPU.
+    model.json next to the model gives the classes and the preprocessing.
+    """
+
+    def __init__(self, model_path, threads=1):
+        import onnxruntime as ort
+
+        with open(os.path.join(os.path.dirname(model_path), 'model.json'), encoding='utf-8') as f:
+            meta = json.load(f)
+        self.classes = meta['classes']
+        self.size = meta['size']
+        self.normalize = meta['normalize']
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(model_path, options, providers=['CPUExecutionProvider'])
+        self.input_name = self.session.get_inputs()[0].name
+
+    def preprocess(self, img_bytes):
+        """Image bytes -> float32 NCHW batch of one, as in training (training/evaluate.py)"""
+        with Image.open(io.BytesIO(img_bytes)) as image:
+            image = ImageOps.exif_transpose(image).convert('RGB')
+            pixels = np.asarray(image.resize((self.size, self.size), Image.Resampling.BILINEAR), dtype=np.float32)
+        pixels /= 255
+        if self.normalize:
+            pixels = (pixels - IMAGENET_MEAN) / IMAGENET_STD
+        return np.ascontiguousarray(pixels.transpose(2, 0, 1)[None])
+
+    def predict(self, img_bytes):
+        """
+        Returns:
+            tuple: (tag_name, confidence in %)
+        """
+        logits = self.session.run(None, {self.input_name: self.preprocess(img_bytes)})[0][0]
+        probabilities = np.exp(logits - logits.max())
+        probabilities /= probabilities.sum()
+        best = int(probabilities.argmax())
+        return self.classes[best], float(probabilities[best] * 100)
+
+class ShadowEvaluator:
+    """
+    Shadow mode of MLClient: images classified by Custom Vision are handed to a
+    background thread that classifies them again with the local model and
+    appends both results to a CSV log (see tools/shadow_report.py).
+    Submitting never blocks: when the queue is full the image is dropped.
+    If the model or the log cannot be opened, shadow mode is disabled and
+    submitted images are ignored.
+    """
+
+    def __init__(self, model_path, log_path, queue_size=32, threads=1):
+        self.model_path = model_path
+        self.log_path = log_path
+        self.threads = threads
+        self.submitted = 0
+        self.dropped = 0
+        self.failed = 0
+        self.disabled = False
+        self._queue = queue.Queue(maxsize=queue_size)
+        threading.Thread(target=self._run, name='shadow-classifier', daemon=True).start()
+
+    @classmethod
+    def from_settings(cls, settings):
+        return cls(
+            model_path=settings.shadow_model_path,
+            log_path=settings.shadow_log_path,
+            queue_size=settings.shadow_queue_size,
+            threads=settings.shadow_threads
+        )
+
+    def submit(self, image_hash, img_bytes, azure_tag, azure_confidence, azure_seconds):
+        """Queue an image and its Custom Vision result (returns immediately)"""
+        if self.disabled:
+            return
+        try:
+            self._queue.put_nowait((time.time(), image_hash, img_bytes, azure_tag, azure_confidence, azure_seconds))
+            self.submitted += 1
+        except queue.Full:
+            self.dropped += 1
+
+    def _disable(self, reason):
+        """Stop accepting images and drop the queued ones"""
+        self.disabled = True
+        print(f"Shadow mode disabled, {reason}")
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                return
+
+    def _run(self):
+        # The model is loaded here, off the request path
+        try:
+            classifier = LocalClassifier(self.model_path, threads=self.threads)
+        except Exception as e:
+            self._disable(f"local model could not be loaded: {str(e)}")
+            return
+
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.log_path)), exist_ok=True)
+            new_log = not os.path.exists(self.log_path)
+            f = open(self.log_path, 'a', newline='', encoding='utf-8', buffering=1)
+        except OSError as e:
+            self._disable(f"log could not be opened: {str(e)}")
+            return
+        print(f"Shadow mode: {self.model_path} ({len(classifier.classes)} classes) -> {self.log_path}")
+
+        with f:
+            writer = csv.writer(f)
+            if new_log:
+                writer.writerow(SHADOW_LOG_FIELDS)
+            while True:
+                timestamp, image_hash, img_bytes, azure_tag, azure_confidence, azure_seconds = self._queue.get()
+                try:
+                    start = time.perf_counter()
+                    local_tag, local_confidence = classifier.predict(img_bytes)
+                    local_seconds = time.perf_counter() - start
+                except Exception as e:
+                    self.failed += 1
+                    print(f"Error in shadow prediction: {str(e)}")
+                    continue
+                try:
+                    writer.writerow((
+                        int(timestamp), image_hash[:16],
+                        azure_tag, round(azure_confidence, 1), round(azure_seconds * 1000, 1),
+                        local_tag, round(local_confidence, 1), round(local_seconds * 1000, 1)
+                    ))
+                except OSError as e:
+                    self.failed += 1
+                    print(f"Error writing the shadow log: {str(e)}")
+
+    def snapshot(self):
+        """Counters of the shadow queue"""
+        return {
+            'submitted': self.submitted,
+            'dropped': self.dropped,
+            'failed': self.failed,
+            'disabled': self.disabled,
+            'pending': self._queue.qsize()
+        }
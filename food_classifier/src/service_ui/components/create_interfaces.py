@@ -7,10 +7,10 @@ sys.path.append(current_dir)
 from interfaces.customer_interface import create_customer_interface
 from interfaces.nutrition_interface import create_nutrition_interface
 
-def create_interfaces(session_state):
+def create_interfaces(session_state, container):
     """
     Create all interfaces with session management
     """
-    customer_info_interface = create_customer_interface(session_state)
-    nutritional_info_interface = create_nutrition_interface(session_state)
+    customer_info_interface = create_customer_interface(session_state, container)
+    nutritional_info_interface = create_nutrition_interface(session_state, container)
     return customer_info_interface, nutritional_info_interface 
\ No newline at end of file
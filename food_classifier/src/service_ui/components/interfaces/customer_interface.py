@@ -6,32 +6,24 @@ current_dir = os.path.dirname(os.path.abspath(__file__))
 parent_dir = os.path.abspath(os.path.join(current_dir, '..'))
 sys.path.append(parent_dir)
 
-from utils.customer_processing import CustomerProcessor
+from utils.event_gate import create_gate
+from utils.session_store import session_store
 
-# Initialize processor
-customer_processor = CustomerProcessor()
-
-def get_customer_details(customer_code, guardian_code, session_state):
-    """Get customer details and create visualization"""
-    # 입력값 검증
-    if not customer_code or not guardian_code:
-        gr.Warning("고객 코드 또는 보호자 코드를 확인해주세요.")
-        return None, "", None
-    
-    photo, info_text, plot = customer_processor.get_customer_info(
-        customer_code, 
-        guardian_code,
-        session_state
+def create_customer_interface(session_state, container):
+    """
+    Create customer information interface
+    Clients and processors come from the container and are created on first use
+    """
+    # Limit concurrent customer lookups (each one renders a Matplotlib figure)
+    settings = container.settings
+    customer_lookup_gate = create_gate(
+        'customer_lookup',
+        concurrency_limit=settings.lookup_concurrency,
+        max_waiting=settings.lookup_max_waiting,
+        max_wait_seconds=settings.max_wait_seconds,
+        on_wait=lambda position: gr.Info(f"요청이 많아 잠시 대기 중입니다. (대기 순서: {position})")
     )
     
-    if photo is None:
-        gr.Error(info_text)
-        return None, "", None
-    
-    return photo, info_text, plot
-
-def create_customer_interface(session_state):
-    """Create customer information interface"""
     with gr.Blocks() as customer_interface:
         gr.Markdown("## 👨‍⚕️ 고객 정보")
         
@@ -45,17 +37,17 @@ def create_customer_interface(session_state):
             customer_info = gr.HTML()
             nutrition_history = gr.Plot()
             
-        def get_customer_details(code, guardian, state):
+        def get_customer_details(code, guardian, session_id):
             """Get customer details and create visualization"""
             # 입력값 검증
             if not code or not guardian:
                 gr.Warning("고객 코드 또는 보호자 코드를 확인해주세요.")
                 return None, "", None
             
-            photo, info_text, plot = customer_processor.get_customer_info(
+            photo, info_text, plot = container.customer_processor.get_customer_info(
                 code, 
                 guardian,
-                state
+                session_store.get(session_id)
             )
             
             if photo is None:
@@ -64,9 +56,17 @@ def create_customer_interface(session_state):
             
             return photo, info_text, plot
             
+        def reject_busy(code, guardian, session_id):
+            """Busy message when too many lookups are waiting"""
+            gr.Warning("지금은 요청이 많습니다. 잠시 후 다시 시도해주세요.")
+            return None, "", None
+            
         # Event handler - 버튼 클릭으로 변경
         submit_btn.click(
-            fn=get_customer_details,
+            fn=customer_lookup_gate.wrap(
+                container.profiler.wrap(get_customer_details, 'customer_lookup'),
+                on_reject=reject_busy
+            ),
             inputs=[
                 customer_code,
                 guardian_code,
@@ -76,7 +76,9 @@ def create_customer_interface(session_state):
                 customer_photo,
                 customer_info,
                 nutrition_history
-            ]
+            ],
+            concurrency_limit=customer_lookup_gate.gradio_concurrency_limit,
+            concurrency_id='customer_lookup'
         )
         
     return customer_interface 
\ No newline at end of file
@@ -1,27 +1,52 @@
 import os
 import sys
-import re
 import gradio as gr
+from PIL import Image
 
 current_dir = os.path.dirname(os.path.abspath(__file__))
 parent_dir = os.path.abspath(os.path.join(current_dir, '..'))
 sys.path.append(parent_dir)
 
-from utils.food_processing import FoodProcessor
 from utils.nutrition_utils import (
     create_food_card,
     create_summary_section,
     create_warning_section,
-    extract_number
+    create_status_section
 )
+from utils.nutrient_vector import NutrientVector
+from utils.event_gate import create_gate
+from utils.frame_selector import FrameSelector
+from utils.portion import PORTION_CHOICES, AUTO_PORTION, resolve_portions
+from utils.session_store import session_store
 
-# Initialize processor
-food_processor = FoodProcessor()
+# Seconds between sampled webcam frames, and the longest streaming session
+STREAM_INTERVAL = 0.5
+STREAM_TIME_LIMIT = 5 * 60
 
-def process_and_append(image, history, session_state):
+# Status shown for each frame check (see utils/frame_selector.py)
+STREAM_MESSAGES = {
+    'moving': "📷 카메라를 음식 위에 고정해주세요.",
+    'blurry': "🔎 초점이 맞지 않습니다. 잠시 멈춰주세요.",
+    'duplicate': "🔍 음식을 인식하고 있습니다...",
+    'candidate': "🔍 음식을 인식하고 있습니다...",
+    'decided': "⏸️ 새로운 식사를 비춰주세요."
+}
+
+def process_and_append(image, history, session_state, food_processor, multi_dish=False, portion=1.0):
     """
     Process new image and append result to history
+    Generator yielding (status_html, result_html, history, detections) as each step finishes:
+    the history, the predicted food name, then the nutrition card and updated totals
+    The history of each step is the session history to keep: it includes the new
+    meal only from the last step, after the consumption was recorded, together with
+    the session totals (session_state.totals, the running NutrientVector of the history)
+    With multi_dish, every dish on a tray photo is detected (detections lists them with boxes)
+    portion is the serving multiplier, or AUTO_PORTION to estimate it from the dish boxes
     """
+    # Show the history kept in the session right away
+    if history:
+        yield create_status_section("⏳ 식사 정보를 확인하고 있습니다..."), history, history, None
+
     # Get recommended values first
     recommended_values = food_processor.get_recommended_values(session_state)
     if not recommended_values:
@@ -34,46 +59,41 @@ def process_and_append(image, history, session_state):
             </div>
         </div>
         """
-        return error_html, ""
+        yield "", error_html, "", None
+        return
 
-    # Get today's consumption history if no history exists
-    if not history:
+    # Get today's consumption history if no history (or no totals of it) exists
+    if not history or session_state.totals is None:
+        history = ""
+        session_state.totals = NutrientVector()
         food_processor.db_client.connect()
         consumption_records = food_processor.db_client.get_today_consumption_by_patient(session_state.customer_id)
+        food_processor.db_client.close()
         
         if consumption_records:
-            # Initialize totals
-            totals = {
-                'calories': 0,
-                'carbohydrates': 0,
-                'protein': 0,
-                'fat': 0,
-                'fiber': 0,
-                'sodium': 0
-            }
+            catalog = food_processor.catalog
+            
+            # Sum nutrients of all records over the nutrient axis, weighted by serving multiplier
+            totals = catalog.totals(
+                [record['food_id'] for record in consumption_records],
+                [record['portion'] for record in consumption_records]
+            )
             
             # Create food cards for each record
             food_cards = []
             for record in consumption_records:
-                food_info = food_processor.db_client.get_food_info_by_id(record['food_id'])
+                food_info = catalog.get_by_id(record['food_id'])
                 if food_info:
-                    totals['calories'] += extract_number(food_info.get('Energy', '0'))
-                    totals['carbohydrates'] += extract_number(food_info.get('Carbohydrates', '0'))
-                    totals['protein'] += extract_number(food_info.get('Protein', '0'))
-                    totals['fat'] += extract_number(food_info.get('Fat', '0'))
-                    totals['fiber'] += extract_number(food_info.get('Dietary_Fiber', '0'))
-                    totals['sodium'] += extract_number(food_info.get('Sodium', '0'))
-                    
                     # Create food card with time information
-                    food_cards.append(create_food_card(food_info, 1.0, record['time']))  # Added time parameter
-            
-            food_processor.db_client.close()
+                    food_cards.append(create_food_card(food_info, 1.0, record['time'], record['portion']))  # Added time parameter
             
             if food_cards:
                 # Create warning and summary sections
                 warning_section = create_warning_section(totals, recommended_values)
                 summary_section = create_summary_section(totals, recommended_values)
                 
+                session_state.totals = totals
+                
                 # Combine all food cards
                 food_records = "\n".join(food_cards)
                 
@@ -87,9 +107,7 @@ def process_and_append(image, history, session_state):
                 </div>
                 """
         else:
-            food_processor.db_client.close()
             print("No previous records found")
-            history = ""
 
     # if image is not present, return current history
     if image is None:
@@ -102,11 +120,44 @@ def process_and_append(image, history, session_state):
             </div>
         </div>
         """
-        return history + error_html if history else error_html, history if history else ""
+        yield "", history + error_html if history else error_html, history if history else "", None
+        return
+    
+    yield create_status_section("🔍 음식을 인식하고 있습니다..."), history, history, None
     
-    result = food_processor.get_nutritional_info(image, session_state)
+    detections = None
+    try:
+        if multi_dish:
+            # Every dish on the tray from one detection call
+            detections = food_processor.detect(image)
+            names = ", ".join(f"<strong>{d['food_name']}</strong>" for d in detections)
+            yield create_status_section(
+                f"🍽️ {names} - 영양 정보를 불러오고 있습니다..." if detections else "🍽️ 인식된 음식이 없습니다."
+            ), history, history, detections
+            
+            # One batch lookup for all dishes
+            food_infos = food_processor.get_food_infos([d['food_name'] for d in detections])
+            detections = [d for d in detections if d['food_name'] in food_infos]
+            portions = resolve_portions(portion, len(detections), [d['box'] for d in detections], image.size)
+            items = [
+                (food_infos[d['food_name']], d['confidence'], dish_portion)
+                for d, dish_portion in zip(detections, portions)
+            ]
+        else:
+            food_name, confidence = food_processor.predict(image)
+            
+            # Show the predicted food while the nutrition lookup runs
+            yield create_status_section(
+                f"🍽️ <strong>{food_name}</strong> (신뢰도: {confidence:.1f}%) - 영양 정보를 불러오고 있습니다..."
+            ), history, history, None
+            
+            food_info = food_processor.get_food_info(food_name)
+            items = [(food_info, confidence, resolve_portions(portion, 1)[0])] if food_info else []
+    except Exception as e:
+        print(f"Error processing meal: {str(e)}")
+        items = []
     
-    if not result or 'food_info' not in result:
+    if not items:
         error_html = f"""
         <div style="padding: 15px; border-radius: 15px; border: 1px solid #FF5252; margin-bottom: 20px; 
              background-color: #FFEBEE; overflow: hidden;">
@@ -116,27 +167,28 @@ def process_and_append(image, history, session_state):
             </div>
         </div>
         """
-        return history + error_html if history else error_html, history if history else ""
+        yield "", history + error_html if history else error_html, history if history else "", detections
+        return
 
     # 새로운 음식 카드 생성
-    new_food_card = create_food_card(result['food_info'], result['confidence'])
+    new_food_card = "\n".join(
+        create_food_card(food_info, confidence, portion=dish_portion) for food_info, confidence, dish_portion in items
+    )
+    # Nutrients of the new dishes, weighted by serving multiplier
+    new_nutrients = sum(
+        NutrientVector.from_food_info(food_info) * dish_portion for food_info, _, dish_portion in items
+    )
+    
+    # 새로운 음식의 영양성분을 오늘 총계에 더함
+    new_totals = session_state.totals + new_nutrients
     
     # 첫 번째 음식인 경우 (history가 비어있는 경우)
     if not history:
-        totals = {
-            'calories': extract_number(result['food_info'].get('Energy', '0')),
-            'carbohydrates': extract_number(result['food_info'].get('Carbohydrates', '0')),
-            'protein': extract_number(result['food_info'].get('Protein', '0')),
-            'fat': extract_number(result['food_info'].get('Fat', '0')),
-            'fiber': extract_number(result['food_info'].get('Dietary_Fiber', '0')),
-            'sodium': extract_number(result['food_info'].get('Sodium', '0'))
-        }
-        
         # 경고 섹션 생성
-        warning_section = create_warning_section(totals, recommended_values)
+        warning_section = create_warning_section(new_totals, recommended_values)
         
         # 요약 섹션 생성
-        summary_section = create_summary_section(totals, recommended_values)
+        summary_section = create_summary_section(new_totals, recommended_values)
         
         # 전체 HTML 생성
         full_html = f"""
@@ -147,24 +199,9 @@ def process_and_append(image, history, session_state):
             {new_food_card}
         </div>
         """
-        
-        return full_html, full_html
     
     # 기존 기록이 있는 경우
     else:
-        # 현재 총계 추출
-        current_totals = extract_totals_from_html(history, recommended_values)
-        
-        # 새로운 음식의 영양성분을 더함
-        new_totals = {
-            'calories': current_totals['calories'] + extract_number(result['food_info'].get('Energy', '0')),
-            'carbohydrates': current_totals['carbohydrates'] + extract_number(result['food_info'].get('Carbohydrates', '0')),
-            'protein': current_totals['protein'] + extract_number(result['food_info'].get('Protein', '0')),
-            'fat': current_totals['fat'] + extract_number(result['food_info'].get('Fat', '0')),
-            'fiber': current_totals['fiber'] + extract_number(result['food_info'].get('Dietary_Fiber', '0')),
-            'sodium': current_totals['sodium'] + extract_number(result['food_info'].get('Sodium', '0'))
-        }
-        
         # 경고 섹션 업데이트
         warning_section = create_warning_section(new_totals, recommended_values)
         
@@ -202,53 +239,104 @@ def process_and_append(image, history, session_state):
         {summary_section}
         {updated_food_records}
         """
-        
-        return full_html, full_html
-
-def extract_totals_from_html(html, recommended):
-    """Extract the current totals from the summary section in the HTML"""
-
-    # Find all percentage values in the summary section
-    percentages = re.findall(r'text-align: right;">(\d+)%</div>', html)
     
-    if len(percentages) >= 6:  # Make sure we found all 6 nutritional components
-        return {
-            'calories': (float(percentages[0]) / 100) * recommended['calories'],
-            'carbohydrates': (float(percentages[1]) / 100) * recommended['carbohydrates'],
-            'protein': (float(percentages[2]) / 100) * recommended['protein'],
-            'fat': (float(percentages[3]) / 100) * recommended['fat'],
-            'fiber': (float(percentages[4]) / 100) * recommended['fiber'],
-            'sodium': (float(percentages[5]) / 100) * recommended['sodium']
-        }
+    # Show the nutrition cards and totals, then record the consumption.
+    # The history still is the previous one: the new meal joins it only once it is recorded
+    # (a client leaving here closes the generator before the insert)
+    yield create_status_section("💾 식사 기록을 저장하고 있습니다..."), full_html, history, detections
+    if len(items) == 1:
+        consumption_id = food_processor.record_consumption(items[0][0], session_state, items[0][2])
+        consumption_ids = [consumption_id] if consumption_id is not False else None
     else:
-        return {
-            'calories': 0,
-            'carbohydrates': 0,
-            'protein': 0,
-            'fat': 0,
-            'fiber': 0,
-            'sodium': 0
-        }
+        consumption_ids = food_processor.record_consumptions(
+            [food_info for food_info, _, _ in items],
+            session_state,
+            [dish_portion for _, _, dish_portion in items]
+        ) or None
+    # Queued only, the photo is stored off the request path
+    food_processor.archive_meal(image, items, consumption_ids, detections)
+    
+    if consumption_ids is None:
+        error_html = """
+        <div style="padding: 15px; border-radius: 15px; border: 1px solid #FF5252; margin-bottom: 20px; 
+             background-color: #FFEBEE; overflow: hidden;">
+            <h3 style="margin: 0 0 15px 0; font-size: 1.1em; color: #D32F2F;">❌ 오류</h3>
+            <div style="font-size: 0.9em; color: #C62828;">
+                식사 기록을 저장하지 못했습니다. 다시 시도해주세요.
+            </div>
+        </div>
+        """
+        yield "", history + error_html if history else error_html, history if history else "", detections
+        return
+    # Committed with the history the caller keeps from this step
+    session_state.totals = new_totals
+    yield "", full_html, full_html, detections
 
-def create_nutrition_interface(session_state):
+def create_nutrition_interface(session_state, container):
     """
     Create nutritional information interface
+    Clients and processors come from the container and are created on first use
     """
+    # Limit concurrent meal submissions (each one calls Custom Vision).
+    # Button submissions and webcam frames share the slots; only submissions wait for one
+    settings = container.settings
+    meal_gate = create_gate(
+        'meal',
+        concurrency_limit=settings.meal_concurrency,
+        max_waiting=settings.meal_max_waiting,
+        max_wait_seconds=settings.max_wait_seconds,
+        on_wait=lambda position: gr.Info(f"요청이 많아 잠시 대기 중입니다. (대기 순서: {position})")
+    )
+    
     with gr.Blocks() as nutritional_info_interface:
         gr.Markdown("## 🥗 오늘의 식단 정보")
 
-        with gr.Row():
-            image_input = gr.Image(
-                sources=["upload", "webcam"],
-                type="pil",
-                label="Camera",
-                height=320,
-                width=400,
-                mirror_webcam=False
-            )
+        with gr.Tabs():
+            with gr.Tab("📷 사진"):
+                with gr.Row():
+                    image_input = gr.Image(
+                        sources=["upload", "webcam"],
+                        type="pil",
+                        label="Camera",
+                        height=320,
+                        width=400,
+                        mirror_webcam=False
+                    )
+
+                with gr.Row():
+                    # Only offered when a Custom Vision object detection project is configured
+                    multi_dish_input = gr.Checkbox(
+                        label="식판 전체 인식 (여러 음식)",
+                        value=False,
+                        visible=bool(settings.detection_model_name)
+                    )
+                    submit_btn = gr.Button("Submit", variant="primary")
+
+                # detected dishes with their boxes (tray mode)
+                detection_output = gr.AnnotatedImage(label="인식된 음식", visible=False)
+
+            with gr.Tab("🎥 실시간 인식"):
+                with gr.Row():
+                    stream_input = gr.Image(
+                        sources=["webcam"],
+                        type="numpy",
+                        label="Live Camera",
+                        height=320,
+                        width=400,
+                        mirror_webcam=False,
+                        streaming=True
+                    )
+
+                # streaming status (frame checks and selected result)
+                stream_status = gr.HTML()
 
         with gr.Row():
-            submit_btn = gr.Button("Submit", variant="primary")
+            # serving multiplier recorded with the meal (auto: estimated from dish size in tray mode)
+            portion_input = gr.Radio(
+                choices=list(PORTION_CHOICES) + [("자동 (식판 인식)", AUTO_PORTION)],
+                value=1.0,
+                label="섭취량"
+            )
 
         # error message for error handling
         error_output = gr.HTML(label="", elem_classes=["error-message"])
@@ -256,13 +344,14 @@ def create_nutrition_interface(session_state):
         # result output for result
         result_output = gr.HTML(label="Nutritional Information")
 
-        # State to store the history
-        result_state = gr.State("")
-
-        def process_with_error_handling(image, history, session_state):
+        def process_with_error_handling(image, multi_dish, portion, session_id):
             """
             Image processing and error handling
+            Streams progress to the error output while the result is being built
             """
+            # The history is kept in the server-side session
+            session = session_store.get(session_id)
+            
             if image is None:
                 error_html = f"""
                 <div style="padding: 15px; border-radius: 15px; border: 1px solid #FF5252; 
@@ -273,12 +362,21 @@ def create_nutrition_interface(session_state):
                     </div>
                 </div>
                 """
-                return error_html, "", history  # error message, empty result, keep previous history
+                yield error_html, "", gr.update(visible=False)  # error message, empty result
+                return
 
             # if image is present, process
             try:
-                result = process_and_append(image, history, session_state)
-                return "", result[0], result[1]  # empty error message, result, new history
+                for status, result, history, detections in process_and_append(
+                    image, session.history, session, container.food_processor, multi_dish=multi_dish, portion=portion
+                ):
+                    session.history = history  # new history
+                    if detections:
+                        boxes = [(d['box'], f"{d['food_name']} ({d['confidence']:.0f}%)") for d in detections]
+                        detection_update = gr.update(value=(image, boxes), visible=True)
+                    else:
+                        detection_update = gr.update(visible=False)
+                    yield status, result, detection_update  # progress message, result, detected dishes
             except Exception as e:
                 error_html = f"""
                 <div style="padding: 15px; border-radius: 15px; border: 1px solid #FF5252; 
@@ -289,12 +387,91 @@ def create_nutrition_interface(session_state):
                     </div>
                 </div>
                 """
-                return error_html, "", history  # error message, empty result, keep previous history
+                yield error_html, "", gr.update(visible=False)  # error message, empty result
+
+        def reject_busy(image, multi_dish, portion, session_id):
+            """
+            Busy message when too many submissions are waiting
+            """
+            busy_html = """
+            <div style="padding: 15px; border-radius: 15px; border: 1px solid #FFB74D; 
+                 background-color: #FFF3E0; overflow: hidden;">
+                <h3 style="margin: 0 0 15px 0; font-size: 1.1em; color: #F57C00;">⏳ 대기 중</h3>
+                <div style="font-size: 0.9em; color: #E65100;">
+                    지금은 요청이 많습니다. 잠시 후 다시 시도해주세요.
+                </div>
+            </div>
+            """
+            return busy_html, "", gr.skip()  # busy message, empty result
+
+        def process_stream_frame(frame, portion, session_id):
+            """
+            Check one sampled webcam frame
+            Only steady, sharp, new frames are classified; once the scene is decided
+            the most confident frame goes through the regular submission pipeline
+            """
+            if frame is None:
+                return gr.skip(), gr.skip(), gr.skip()
+            
+            session = session_store.get(session_id)
+            if session.frame_selector is None:
+                session.frame_selector = FrameSelector()
+            selector = session.frame_selector
+            
+            status = selector.check(frame)
+            if status == 'candidate':
+                image = Image.fromarray(frame)
+                food_name, confidence = container.food_processor.predict(image)
+                selector.add_candidate(image, food_name, confidence)
+            
+            if not selector.should_decide(status):
+                return create_status_section(STREAM_MESSAGES.get(status, STREAM_MESSAGES['candidate'])), gr.skip(), gr.skip()
+            
+            best = selector.decide()
+            if best is None:
+                return create_status_section("❓ 음식을 인식하지 못했습니다. 카메라 위치를 바꿔 다시 비춰주세요."), gr.skip(), gr.skip()
+            
+            # The prediction of the selected frame is cached, so this does not call Custom Vision again
+            try:
+                status_html, result = "", gr.skip()
+                for status_html, result, history, _ in process_and_append(
+                    best['image'], session.history, session, container.food_processor, portion=portion
+                ):
+                    session.history = history
+            except Exception as e:
+                print(f"Error processing stream frame: {str(e)}")
+                return create_status_section("❌ 음식을 인식할 수 없습니다. 다시 시도해주세요."), gr.skip(), gr.skip()
+            
+            return create_status_section(
+                f"✅ <strong>{best['food_name']}</strong> (신뢰도: {best['confidence']:.1f}%) - 다음 식사를 비춰주세요."
+            ), status_html, result
+
+        def reject_stream_busy(frame, portion, session_id):
+            """
+            Drop the frame when all meal slots are busy
+            """
+            return gr.skip(), gr.skip(), gr.skip()
 
         submit_btn.click(
-            fn=process_with_error_handling,
-            inputs=[image_input, result_state, session_state],
-            outputs=[error_output, result_output, result_state]
+            fn=meal_gate.wrap(
+                container.profiler.wrap(process_with_error_handling, 'meal_submit'),
+                on_reject=reject_busy
+            ),
+            inputs=[image_input, multi_dish_input, portion_input, session_state],
+            outputs=[error_output, result_output, detection_output],
+            concurrency_limit=meal_gate.gradio_concurrency_limit,
+            concurrency_id='meal_submit'
+        )
+
+        # Sample the live camera at a low rate; frames beyond the free slots are dropped
+        stream_input.stream(
+            fn=meal_gate.wrap(process_stream_frame, on_reject=reject_stream_busy, wait=False),
+            inputs=[stream_input, portion_input, session_state],
+            outputs=[stream_status, error_output, result_output],
+            stream_every=STREAM_INTERVAL,
+            time_limit=STREAM_TIME_LIMIT,
+            concurrency_limit=meal_gate.concurrency_limit,
+            concurrency_id='meal_stream'
         )
 
     return nutritional_info_interface 
\ No newline at end of file
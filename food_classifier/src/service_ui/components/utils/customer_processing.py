@@ -10,11 +10,16 @@ parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..',
 sys.path.append(parent_dir)
 
 from clients.db_client import DatabaseClient
+from clients.cache_client import CacheClient
 plt.style.use('https://github.com/dhaitz/matplotlib-stylesheets/raw/master/pitayasmoothie-dark.mplstyle')
 
+# Resized customer photos are reused for an hour
+PHOTO_CACHE_TTL = 60 * 60
+
 class CustomerProcessor:
-    def __init__(self, db_client=None):
+    def __init__(self, db_client=None, cache=None):
         self.db_client = db_client or DatabaseClient()
+        self.cache = cache or CacheClient()
     
     def get_customer_info(self, customer_code, guardian_code, session_state):
         """Get customer information and visualize nutrition history"""
@@ -58,12 +63,19 @@ class CustomerProcessor:
     
     def _process_customer_photo(self, photo_url):
         """Process and resize customer photo"""
+        cached = self.cache.get('photo', photo_url)
+        if cached is not None:
+            return cached
+        
         response = requests.get(photo_url)
         image_array = np.asarray(bytearray(response.content), dtype=np.uint8)
         image = cv2.imdecode(image_array, cv2.IMREAD_COLOR)
         # Convert BGR to RGB
         image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-        return cv2.resize(image, (300, 300))
+        image = cv2.resize(image, (300, 300))
+        
+        self.cache.set('photo', photo_url, image, ttl=PHOTO_CACHE_TTL)
+        return image
     
     def _create_customer_detail_text(self, customer_info):
         """Create formatted customer detail text"""
@@ -152,4 +164,7 @@ class CustomerProcessor:
             axs[idx].legend(fontsize=12)
 
         plt.tight_layout(pad=4.0)
+        # Gradio only renders the figure: drop it from pyplot's figure manager,
+        # which would otherwise keep every chart of the process alive
+        plt.close(fig)
         return fig 
\ No newline at end of file
@@ -1,10 +1,18 @@
+import time
+
 class CustomerSession:
     """Customer session management class"""
     
+    __slots__ = ('_customer_id', '_customer_info', 'history', 'totals', 'frame_selector', 'last_access')
+    
     def __init__(self):
         """Initialize customer session"""
         self._customer_id = None
         self._customer_info = None
+        self.history = ""  # Today's nutrition history HTML
+        self.totals = None  # Today's nutrient totals (NutrientVector) of the history
+        self.frame_selector = None  # Streaming webcam state, created on first frame
+        self.last_access = time.monotonic()
     
     @property
     def customer_id(self):
@@ -25,6 +33,11 @@ class CustomerSession:
         """
         if not customer_info or 'customer_id' not in customer_info:
             raise ValueError("Invalid customer information")
+        
+        # History belongs to the previous customer
+        if customer_info['customer_id'] != self._customer_id:
+            self.history = ""
+            self.totals = None
             
         self._customer_id = customer_info['customer_id']
         self._customer_info = customer_info
@@ -33,7 +46,10 @@ class CustomerSession:
         """Clear current session"""
         self._customer_id = None
         self._customer_info = None
+        self.history = ""
+        self.totals = None
+        self.frame_selector = None
     
     def is_active(self):
         """Check if there is an active customer session"""
-        return self._customer_id is not None 
\ No newline at end of file
+        return self._customer_id is not None
@@ -0,0 +1,149 @@
+import time
+import inspect
+import functools
+import threading
+from collections import deque
+import numpy as np
+
+# Registered gates by event name
+_gates = {}
+
+class EventGate:
+    """
+    Bounded admission for one or more event handlers sharing the same slots.
+    At most concurrency_limit calls run at once, at most max_waiting calls wait
+    for a slot, and anything beyond that is rejected immediately. Handlers
+    wrapped with wait=False never wait: without a free slot they are rejected.
+    """
+
+    def __init__(self, name, concurrency_limit, max_waiting, max_wait_seconds=30.0, on_wait=None):
+        self.name = name
+        self.concurrency_limit = concurrency_limit
+        self.max_waiting = max_waiting
+        self.max_wait_seconds = max_wait_seconds
+        self.on_wait = on_wait
+        self._slots = threading.BoundedSemaphore(concurrency_limit)
+        self._lock = threading.Lock()
+        self._running = 0
+        self._waiting = 0
+        self._admitted = 0
+        self._rejected = 0
+        self._timed_out = 0
+        self._wait_times = deque(maxlen=1000)
+        self._run_times = deque(maxlen=1000)
+        # Gradio worker threads the wrapped events can hold (see thread_demand)
+        self.thread_demand = 0
+
+    @property
+    def gradio_concurrency_limit(self):
+        """Concurrency limit for the Gradio event: running plus waiting calls"""
+        return self.concurrency_limit + self.max_waiting
+
+    def _enter(self, wait=True):
+        """
+        Wait for a slot (only take a free one without wait).
+        Returns the wait time in seconds, or None if the call is rejected.
+        """
+        start = time.perf_counter()
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                if not wait or self._waiting >= self.max_waiting:
+                    self._rejected += 1
+                    return None
+                self._waiting += 1
+                position = self._waiting
+
+            if self.on_wait:
+                self.on_wait(position)
+            acquired = self._slots.acquire(timeout=self.max_wait_seconds)
+
+            with self._lock:
+                self._waiting -= 1
+                if not acquired:
+                    self._timed_out += 1
+                    return None
+
+        wait_time = time.perf_counter() - start
+        with self._lock:
+            self._running += 1
+            self._admitted += 1
+            self._wait_times.append(wait_time)
+        return wait_time
+
+    def _exit(self, start):
+        """Release the slot and record the run time"""
+        with self._lock:
+            self._running -= 1
+            self._run_times.append(time.perf_counter() - start)
+        self._slots.release()
+
+    def wrap(self, fn, on_reject, wait=True):
+        """
+        Wrap an event handler (function or generator).
+        on_reject is called with the handler arguments and returns the outputs
+        shown when the call is rejected.
+        Use gradio_concurrency_limit (wait) or concurrency_limit (no wait) as the
+        Gradio concurrency limit of the event.
+        """
+        self.thread_demand += self.gradio_concurrency_limit if wait else self.concurrency_limit
+        if inspect.isgeneratorfunction(fn):
+            @functools.wraps(fn)
+            def generator_wrapper(*args, **kwargs):
+                if self._enter(wait) is None:
+                    yield on_reject(*args, **kwargs)
+                    return
+                start = time.perf_counter()
+                try:
+                    yield from fn(*args, **kwargs)
+                finally:
+                    self._exit(start)
+            return generator_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if self._enter(wait) is None:
+                return on_reject(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self._exit(start)
+        return wrapper
+
+    def snapshot(self):
+        """Current queue state and wait/run time percentiles in seconds"""
+        with self._lock:
+            wait_times = np.array(self._wait_times)
+            run_times = np.array(self._run_times)
+            snapshot = {
+                'concurrency_limit': self.concurrency_limit,
+                'max_waiting': self.max_waiting,
+                'running': self._running,
+                'waiting': self._waiting,
+                'admitted': self._admitted,
+                'rejected': self._rejected,
+                'timed_out': self._timed_out
+            }
+
+        for key, values in (('wait', wait_times), ('run', run_times)):
+            p50, p95 = np.percentile(values, [50, 95]) if len(values) else (0.0, 0.0)
+            snapshot[f'{key}_p50'] = round(float(p50), 4)
+            snapshot[f'{key}_p95'] = round(float(p95), 4)
+        return snapshot
+
+def create_gate(name, concurrency_limit, max_waiting, max_wait_seconds=30.0, on_wait=None):
+    """Create and register an EventGate"""
+    gate = EventGate(name, concurrency_limit, max_waiting, max_wait_seconds, on_wait)
+    _gates[name] = gate
+    return gate
+
+def thread_demand():
+    """
+    Worker threads the events of the registered gates can hold at once: calls
+    waiting in a gate block a Gradio worker thread like running ones
+    """
+    return sum(gate.thread_demand for gate in _gates.values())
+
+def gates_snapshot():
+    """Snapshots of all registered gates"""
+    return {name: gate.snapshot() for name, gate in _gates.items()}
@@ -5,69 +5,175 @@ import io
 # Add the parent directory to the system path
 parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..'))
 sys.path.append(parent_dir)
+sys.path.append(os.path.join(parent_dir, 'components'))
 
 from clients.ml_client import MLClient
 from clients.db_client import DatabaseClient
+from clients.cache_client import CacheClient
+from utils.nutrition_catalog import NutritionCatalog
+from utils.nutrient_vector import NutrientVector
 
 class FoodProcessor:
-    def __init__(self, ml_client=None, db_client=None):
-        self.ml_client = ml_client or MLClient()
+    def __init__(self, ml_client=None, db_client=None, catalog=None, cache=None, archiver=None):
+        """
+        archiver is an optional MealPhotoArchiver (see clients/photo_archive.py)
+        that keeps the submitted photos with their results.
+        """
+        cache = cache or CacheClient()
+        self.ml_client = ml_client or MLClient(cache=cache)
         self.db_client = db_client or DatabaseClient()
+        self.catalog = catalog or NutritionCatalog(self.db_client, cache=cache)
+        self.archiver = archiver
     
-    def get_nutritional_info(self, image, session_state):
+    def predict(self, image):
+        """
+        Classify a food image with Custom Vision
+
+        Returns:
+            tuple: (food_name, confidence)
+        """
+        # Convert image to bytes
+        img_byte_arr = io.BytesIO()
+        image.save(img_byte_arr, format='JPEG')
+        return self.ml_client.get_food_prediction(img_byte_arr.getvalue())
+
+    def detect(self, image):
         """
-        Process food image and get nutritional information
+        Detect every dish on a tray photo with Custom Vision object detection
+
+        Returns:
+            list: dicts with food_name, confidence and box (x1, y1, x2, y2 in pixels)
         """
-        if image is None:
-            return {
-                'error': "No image captured",
-                'food_info': None,
-                'confidence': 0
+        img_byte_arr = io.BytesIO()
+        image.save(img_byte_arr, format='JPEG')
+        detections = self.ml_client.get_food_detections(img_byte_arr.getvalue())
+        
+        width, height = image.size
+        return [
+            {
+                'food_name': food_name,
+                'confidence': confidence,
+                'box': (int(left * width), int(top * height),
+                        int((left + box_width) * width), int((top + box_height) * height))
             }
+            for food_name, confidence, (left, top, box_width, box_height) in detections
+        ]
+
+    def get_food_infos(self, food_names):
+        """
+        Get nutritional information of several foods from the catalog.
+        Only while the catalog is unavailable, the database is queried (one batch query).
+
+        Returns:
+            dict: nutrition_info rows by food_name (unknown names are missing)
+        """
+        food_infos = {}
+        missing = []
+        for food_name in dict.fromkeys(food_names):
+            food_info = self.catalog.get_by_name(food_name)
+            if food_info is None:
+                missing.append(food_name)
+            else:
+                food_infos[food_name] = food_info
         
-        try:
-            # Convert image to bytes
-            img_byte_arr = io.BytesIO()
-            image.save(img_byte_arr, format='JPEG')
-            img_bytes = img_byte_arr.getvalue()
-            
-            # Get food prediction
-            food_name, confidence = self.ml_client.get_food_prediction(img_bytes)
-            
-            # Get nutritional information
+        # Names the loaded catalog doesn't know are not in the database either
+        if missing and not self.catalog.is_loaded():
             self.db_client.connect()
-            food_info = self.db_client.get_food_info_from_db(food_name)
-            
-            if food_info and session_state.is_active():
-                # Record food consumption
-                success = self.db_client.record_food_consumption(
-                    customer_id=session_state.customer_id,
-                    food_id=food_info['food_id']
-                )
-                if not success:
-                    print(f"Failed to record food consumption for food_id: {food_info['food_id']}")
-            
+            try:
+                food_infos.update(self.db_client.get_food_infos_from_db(missing) or {})
+            finally:
+                self.db_client.close()
+        return food_infos
+
+    def get_food_info(self, food_name):
+        """
+        Get nutritional information from the catalog (by name, alias or normalized
+        spelling), falling back to the database while the catalog is unavailable
+        """
+        food_info = self.catalog.get_by_name(food_name)
+        if food_info is None and not self.catalog.is_loaded():
+            self.db_client.connect()
+            try:
+                food_info = self.db_client.get_food_info_from_db(food_name)
+            finally:
+                self.db_client.close()
+        return food_info
+
+    def record_consumption(self, food_info, session_state, portion=1.0):
+        """
+        Record food consumption for the current customer
+        portion is the serving multiplier
+
+        Returns:
+            int: id of the consumption row, False if nothing was recorded
+        """
+        if not session_state.is_active():
+            return False
+        
+        self.db_client.connect()
+        try:
+            consumption_id = self.db_client.record_food_consumption(
+                customer_id=session_state.customer_id,
+                food_id=food_info['food_id'],
+                portion=portion
+            )
+        finally:
             self.db_client.close()
-            
-            if not food_info:
-                return {
-                    'error': f"No nutritional information found for {food_name}.",
-                    'food_info': None,
-                    'confidence': confidence
-                }
-            
-            return {
-                'error': None,
-                'food_info': food_info,
-                'confidence': confidence
-            }
-            
-        except Exception as e:
-            return {
-                'error': f"Error: {str(e)}",
-                'food_info': None,
-                'confidence': 0
+        
+        if consumption_id is False:
+            print(f"Failed to record food consumption for food_id: {food_info['food_id']}")
+        return consumption_id
+
+    def record_consumptions(self, food_infos, session_state, portions=None):
+        """
+        Record several foods eaten together with one insert
+        portions are the serving multipliers aligned with food_infos
+
+        Returns:
+            list: ids of the consumption rows aligned with food_infos, False if nothing was recorded
+        """
+        if not session_state.is_active():
+            return False
+        
+        food_ids = [food_info['food_id'] for food_info in food_infos]
+        self.db_client.connect()
+        try:
+            consumption_ids = self.db_client.record_food_consumptions(
+                customer_id=session_state.customer_id,
+                food_ids=food_ids,
+                portions=portions
+            )
+        finally:
+            self.db_client.close()
+        
+        if consumption_ids is False:
+            print(f"Failed to record food consumption for food_ids: {food_ids}")
+        return consumption_ids
+
+    def archive_meal(self, image, items, consumption_ids=None, detections=None):
+        """
+        Hand a submitted photo and its results to the photo archiver, if enabled.
+        Returns immediately, the photo is encoded and stored in the background.
+
+        Args:
+            items: (food_info, confidence, portion) of the recorded dishes
+            consumption_ids: consumption row ids aligned with items (None if not recorded)
+            detections: detections of a tray photo, aligned with items
+        """
+        if self.archiver is None:
+            return
+        consumption_ids = consumption_ids or [None] * len(items)
+        self.archiver.submit(image, [
+            {
+                'food_name': food_info['food_name'],
+                'food_id': food_info['food_id'],
+                'confidence': round(float(confidence), 2),
+                'portion': float(dish_portion),
+                'consumption_id': consumption_id,
+                **({'box': list(detections[idx]['box'])} if detections else {})
             }
+            for idx, ((food_info, confidence, dish_portion), consumption_id) in enumerate(zip(items, consumption_ids))
+        ])
 
     def get_recommended_values(self, session_state):
         """
@@ -82,14 +188,14 @@ class FoodProcessor:
             recommended = self.db_client.get_recommended_nutrition(session_state.customer_id)
             
             if recommended:
-                return {
-                    'calories': recommended['Energy_max'],
-                    'carbohydrates': recommended['Carbohydrates_max'],
-                    'protein': recommended['Protein_max'],
-                    'fat': recommended['Fat_max'],
-                    'fiber': recommended['Dietary_Fiber_max'],
-                    'sodium': recommended['Sodium_max']
-                }
+                return NutrientVector([
+                    recommended['Energy_max'],
+                    recommended['Carbohydrates_max'],
+                    recommended['Protein_max'],
+                    recommended['Fat_max'],
+                    recommended['Dietary_Fiber_max'],
+                    recommended['Sodium_max']
+                ])
             return None
             
         except Exception as e:
@@ -0,0 +1,136 @@
+import numpy as np
+
+# Frames are analysed at this width (height follows the aspect ratio)
+ANALYSIS_WIDTH = 320
+
+# Frames with a Laplacian variance below this are too blurry to classify
+BLUR_THRESHOLD = 100.0
+
+# dHash bit distance up to which two consecutive frames count as the same, steady scene
+STABLE_DISTANCE = 6
+
+# dHash bit distance up to which a frame duplicates an already classified one
+DUPLICATE_DISTANCE = 3
+
+# Classifier calls per meal: decide after this many candidates
+MAX_CANDIDATES = 3
+
+# Decide right away once a candidate is this confident (%)
+ACCEPT_CONFIDENCE = 85.0
+
+# The best candidate must be at least this confident (%) to be recorded
+MIN_CONFIDENCE = 50.0
+
+def frame_hash(gray):
+    """
+    64-bit difference hash (dHash) of a grayscale frame
+    """
+    import cv2
+    small = cv2.resize(gray, (9, 8), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
+def hamming(a, b):
+    """Number of differing bits between two hashes"""
+    return (a ^ b).bit_count()
+
+def sharpness(gray):
+    """
+    Variance of the Laplacian, low for blurry frames
+    """
+    import cv2
+    return float(cv2.Laplacian(gray, cv2.CV_64F).var())
+
+def to_gray(frame):
+    """
+    Downscale an RGB frame to ANALYSIS_WIDTH and convert it to grayscale
+    """
+    import cv2
+    height, width = frame.shape[:2]
+    if width > ANALYSIS_WIDTH:
+        frame = cv2.resize(frame, (ANALYSIS_WIDTH, int(height * ANALYSIS_WIDTH / width)), interpolation=cv2.INTER_AREA)
+    return cv2.cvtColor(frame, cv2.COLOR_RGB2GRAY)
+
+class FrameSelector:
+    """
+    Frame selection of the streaming webcam mode, kept per session.
+    Sampled frames are checked cheaply (scene stability and duplicates by dHash,
+    sharpness by Laplacian variance) and only steady, sharp, new frames become
+    classification candidates. Once enough candidates are in, the most confident
+    one is selected, and the same scene is ignored until the camera shows a new one.
+    """
+
+    __slots__ = ('previous_hash', 'candidates', 'scene_hash')
+
+    def __init__(self):
+        self.previous_hash = None
+        self.scene_hash = None
+        self.candidates = []
+
+    def reset(self):
+        """Forget candidates and the decided scene"""
+        self.scene_hash = None
+        self.candidates = []
+
+    def check(self, frame):
+        """
+        Check a sampled RGB frame
+
+        Returns:
+            str: 'candidate' if the frame should be classified, otherwise the reason
+            it is dropped ('moving', 'blurry', 'duplicate', 'decided')
+        """
+        gray = to_gray(frame)
+        current_hash = frame_hash(gray)
+        stable = self.previous_hash is not None and hamming(current_hash, self.previous_hash) <= STABLE_DISTANCE
+        self.previous_hash = current_hash
+
+        if self.scene_hash is not None:
+            # A meal was already selected for this scene, wait for a new one
+            if not stable or hamming(current_hash, self.scene_hash) <= STABLE_DISTANCE:
+                return 'decided'
+            self.reset()
+
+        if not stable:
+            return 'moving'
+        if sharpness(gray) < BLUR_THRESHOLD:
+            return 'blurry'
+        if any(hamming(current_hash, candidate['hash']) <= DUPLICATE_DISTANCE for candidate in self.candidates):
+            return 'duplicate'
+        return 'candidate'
+
+    def add_candidate(self, image, food_name, confidence):
+        """Record the classification of the last checked frame"""
+        self.candidates.append({
+            'hash': self.previous_hash,
+            'image': image,
+            'food_name': food_name,
+            'confidence': confidence
+        })
+
+    def should_decide(self, last_status):
+        """
+        Enough evidence for this scene: a confident candidate, the candidate limit,
+        or a duplicate frame (the scene holds still, more calls add nothing)
+        """
+        if not self.candidates:
+            return False
+        return (
+            last_status == 'duplicate'
+            or len(self.candidates) >= MAX_CANDIDATES
+            or max(candidate['confidence'] for candidate in self.candidates) >= ACCEPT_CONFIDENCE
+        )
+
+    def decide(self):
+        """
+        Select the most confident candidate and mark the scene as decided
+
+        Returns:
+            dict: best candidate, or None if none is confident enough
+        """
+        best = max(self.candidates, key=lambda candidate: candidate['confidence'], default=None)
+        self.scene_hash = self.previous_hash
+        self.candidates = []
+        if best is None or best['confidence'] < MIN_CONFIDENCE:
+            return None
+        return best
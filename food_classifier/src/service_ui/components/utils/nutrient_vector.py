@@ -0,0 +1,113 @@
+import os
+import sys
+import numpy as np
+
+# Add the parent directory to the system path
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..'))
+sys.path.append(parent_dir)
+
+from clients.nutrients import NUTRIENT_COLUMNS, to_number
+
+# Keys of the nutrient axis, aligned with NUTRIENT_COLUMNS
+NUTRIENT_KEYS = ('calories', 'carbohydrates', 'protein', 'fat', 'fiber', 'sodium')
+
+# Display names of the nutrient axis
+NUTRIENT_LABELS = ('에너지', '탄수화물', '단백질', '지방', '식이섬유', '나트륨')
+
+def _as_array(values):
+    """Convert a NutrientVector, array or sequence to a float array"""
+    if isinstance(values, NutrientVector):
+        return values.values
+    return np.asarray(values, dtype=np.float64)
+
+def _safe_ratio(numerator, denominator):
+    """Element-wise ratio where a zero denominator gives 0"""
+    numerator = np.asarray(numerator, dtype=np.float64)
+    denominator = np.asarray(denominator, dtype=np.float64)
+    out = np.zeros(np.broadcast(numerator, denominator).shape)
+    np.divide(numerator, denominator, out=out, where=denominator != 0)
+    return out
+
+class NutrientVector:
+    """Nutrient amounts over the fixed NUTRIENT_KEYS axis"""
+
+    __slots__ = ('values',)
+
+    def __init__(self, values=None):
+        if values is None:
+            self.values = np.zeros(len(NUTRIENT_KEYS))
+        else:
+            self.values = np.asarray(values, dtype=np.float64).reshape(len(NUTRIENT_KEYS))
+
+    @classmethod
+    def from_food_info(cls, food_info):
+        """Create from a nutrition_info row (Energy, Carbohydrates, ...)"""
+        return cls([to_number(food_info.get(column)) for column in NUTRIENT_COLUMNS])
+
+    @classmethod
+    def from_dict(cls, values):
+        """Create from a dict keyed by NUTRIENT_KEYS"""
+        return cls([to_number(values.get(key)) for key in NUTRIENT_KEYS])
+
+    def to_dict(self):
+        """Convert to a dict keyed by NUTRIENT_KEYS"""
+        return dict(zip(NUTRIENT_KEYS, self.values.tolist()))
+
+    def __getitem__(self, key):
+        return float(self.values[NUTRIENT_KEYS.index(key)])
+
+    def __add__(self, other):
+        return NutrientVector(self.values + _as_array(other))
+
+    def __radd__(self, other):
+        # Support sum() over vectors, which starts from 0
+        if isinstance(other, (int, float)) and other == 0:
+            return NutrientVector(self.values.copy())
+        return NutrientVector(_as_array(other) + self.values)
+
+    def __mul__(self, factor):
+        return NutrientVector(self.values * factor)
+
+    __rmul__ = __mul__
+
+    def __repr__(self):
+        return f"NutrientVector({self.to_dict()})"
+
+    def ratio(self, recommended):
+        """Ratio of each nutrient to the recommended amount"""
+        return _safe_ratio(self.values, _as_array(recommended))
+
+    def percentages(self, recommended):
+        """Percentage of each nutrient relative to the recommended amount"""
+        return self.ratio(recommended) * 100
+
+    def over_mask(self, maximum):
+        """Mask of nutrients above the maximum"""
+        return self.values > _as_array(maximum)
+
+    def under_mask(self, minimum):
+        """Mask of nutrients below the minimum"""
+        return self.values < _as_array(minimum)
+
+def stack(vectors):
+    """
+    Stack vectors into an (n, len(NUTRIENT_KEYS)) matrix, one row per meal or customer
+    """
+    if len(vectors) == 0:
+        return np.zeros((0, len(NUTRIENT_KEYS)))
+    return np.vstack([_as_array(vector) for vector in vectors])
+
+def batch_percentages(intakes, recommended):
+    """
+    Percentages for many meals or customers at once.
+    recommended is either one vector shared by all rows or one row per intake.
+    """
+    return _safe_ratio(_as_array(intakes), _as_array(recommended)) * 100
+
+def batch_over_mask(intakes, maximum):
+    """Over-maximum masks for many rows at once"""
+    return _as_array(intakes) > _as_array(maximum)
+
+def batch_under_mask(intakes, minimum):
+    """Under-minimum masks for many rows at once"""
+    return _as_array(intakes) < _as_array(minimum)
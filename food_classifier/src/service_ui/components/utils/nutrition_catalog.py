@@ -0,0 +1,198 @@
+import os
+import re
+import sys
+import csv
+import time
+import threading
+import unicodedata
+from collections import namedtuple
+import numpy as np
+
+# Add the parent directory to the system path
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..'))
+sys.path.append(parent_dir)
+sys.path.append(os.path.join(parent_dir, 'components'))
+
+from clients.nutrients import NUTRIENT_COLUMNS
+from clients.cache_client import CacheClient
+from utils.nutrient_vector import NutrientVector
+
+# The catalog is shared between workers and reloaded from the database every 10 minutes
+CATALOG_CACHE_TTL = 10 * 60
+
+# Bundled alias list: "alias,food_name" rows
+DEFAULT_ALIASES_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'assets', 'food_aliases.csv'))
+
+# Characters that don't distinguish food names ("김치 찌개", "김치-찌개", "김치찌개(국)" -> "김치찌개국")
+_IGNORED_CHARACTERS = re.compile(r"[\s\-_·.,'\"()\[\]/]+")
+
+# Indexes of one load of the catalog, replaced as a whole so readers never mix two loads
+CatalogSnapshot = namedtuple('CatalogSnapshot', ['foods_by_id', 'food_ids_by_key', 'row_index', 'matrix', 'loaded_at'])
+
+def normalize_food_name(name):
+    """
+    Lookup key of a food name or classifier tag: Unicode NFKC (composes jamo of
+    NFD file names, full-width characters), without spaces and punctuation, case-folded
+    """
+    return _IGNORED_CHARACTERS.sub('', unicodedata.normalize('NFKC', name)).casefold()
+
+def load_aliases(path=None):
+    """
+    Read "alias,food_name" rows (header and lines starting with # are skipped)
+
+    Returns:
+        dict: food_name by alias
+    """
+    aliases = {}
+    with open(path or DEFAULT_ALIASES_PATH, newline='', encoding='utf-8') as f:
+        for row in csv.reader(f):
+            if len(row) < 2 or not row[0].strip() or row[0].startswith('#') or row[:2] == ['alias', 'food_name']:
+                continue
+            aliases[row[0].strip()] = row[1].strip()
+    return aliases
+
+def read_tags(path):
+    """Read classifier tags, one per line"""
+    with open(path, encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith('#')]
+
+class NutritionCatalog:
+    """
+    In-memory copy of the nutrition_info table.
+    Nutrient values are kept as a float matrix over the fixed NUTRIENT_COLUMNS axis.
+    Foods are indexed by the normalized spelling of their name and of their aliases,
+    so classifier tags resolve to a food without a database query.
+    Each load publishes a new CatalogSnapshot; one thread at a time reloads.
+    """
+
+    def __init__(self, db_client, cache=None, aliases=None):
+        self.db_client = db_client
+        self.cache = cache or CacheClient()
+        self.aliases = aliases or {}
+        self._snapshot = None
+        self._load_lock = threading.Lock()
+
+    def load(self):
+        """Load the whole nutrition_info table from the shared cache or the database"""
+        with self._load_lock:
+            return self._load()
+
+    def _load(self):
+        food_infos = self.cache.get('catalog', 'nutrition_info')
+        if food_infos is None:
+            food_infos = self._load_from_db()
+            if food_infos is None:
+                print("Failed to load nutrition catalog")
+                return False
+            self.cache.set('catalog', 'nutrition_info', food_infos, ttl=CATALOG_CACHE_TTL)
+
+        self._snapshot = CatalogSnapshot(
+            foods_by_id={food['food_id']: food for food in food_infos},
+            food_ids_by_key=self._build_index(food_infos),
+            row_index={food['food_id']: idx for idx, food in enumerate(food_infos)},
+            matrix=np.array(
+                [[food[column] for column in NUTRIENT_COLUMNS] for food in food_infos],
+                dtype=np.float64
+            ).reshape(-1, len(NUTRIENT_COLUMNS)),
+            loaded_at=time.time()
+        )
+        print(f"Nutrition catalog loaded: {len(food_infos)} foods")
+        return True
+
+    def _build_index(self, food_infos):
+        """Map the normalized food names and aliases to food_ids"""
+        index = {}
+        for food in food_infos:
+            key = normalize_food_name(food['food_name'])
+            if key in index and index[key] != food['food_id']:
+                print(f"Food names collide after normalization: {food['food_name']} (food_id {food['food_id']}, "
+                      f"keeping food_id {index[key]})")
+                continue
+            index[key] = food['food_id']
+
+        for alias, food_name in self.aliases.items():
+            food_id = index.get(normalize_food_name(food_name))
+            if food_id is None:
+                print(f"Alias {alias} refers to unknown food {food_name}")
+                continue
+            index.setdefault(normalize_food_name(alias), food_id)
+        return index
+
+    def _load_from_db(self):
+        """Query the nutrition_info table"""
+        # Reuse an open connection, otherwise open (and close) our own
+        owns_connection = self.db_client.connection is None
+        if owns_connection:
+            self.db_client.connect()
+        try:
+            return self.db_client.get_all_food_info()
+        finally:
+            if owns_connection:
+                self.db_client.close()
+
+    def is_loaded(self):
+        """Check if the catalog has been loaded"""
+        return self._snapshot is not None
+
+    def _ensure_loaded(self):
+        """
+        Current snapshot, refreshed when stale (None if the catalog could not be loaded).
+        One thread refreshes a stale catalog while the others keep serving the old
+        snapshot, which is also kept if the refresh fails.
+        """
+        snapshot = self._snapshot
+        if snapshot is not None and time.time() - snapshot.loaded_at < CATALOG_CACHE_TTL:
+            return snapshot
+        # Without any snapshot, wait for the thread that is loading
+        if self._load_lock.acquire(blocking=snapshot is None):
+            try:
+                if self._snapshot is snapshot:
+                    self._load()
+            finally:
+                self._load_lock.release()
+        return self._snapshot
+
+    def get_by_id(self, food_id):
+        """Get a nutrition_info row by food_id"""
+        snapshot = self._ensure_loaded()
+        if snapshot is None:
+            return None
+        return snapshot.foods_by_id.get(food_id)
+
+    def get_by_name(self, food_name):
+        """Get a nutrition_info row by food_name, an alias or a differently spelled classifier tag"""
+        snapshot = self._ensure_loaded()
+        if snapshot is None:
+            return None
+        food_id = snapshot.food_ids_by_key.get(normalize_food_name(food_name))
+        return None if food_id is None else snapshot.foods_by_id[food_id]
+
+    def unmapped(self, tags):
+        """
+        Classifier tags that resolve to no food
+
+        Returns:
+            list: the unmapped tags, or None if the catalog is not loaded
+        """
+        snapshot = self._ensure_loaded()
+        if snapshot is None:
+            return None
+        return [tag for tag in tags if normalize_food_name(tag) not in snapshot.food_ids_by_key]
+
+    def totals(self, food_ids, portions=None):
+        """
+        Sum the nutrients of the given foods over the NUTRIENT_COLUMNS axis,
+        each weighted by its serving multiplier in portions (default 1.0).
+        Unknown food_ids are skipped.
+        """
+        snapshot = self._ensure_loaded()
+        if snapshot is None:
+            return NutrientVector()
+        if portions is None:
+            portions = [1.0] * len(food_ids)
+        known = [(snapshot.row_index[food_id], portion)
+                 for food_id, portion in zip(food_ids, portions) if food_id in snapshot.row_index]
+        if not known:
+            return NutrientVector()
+        rows, weights = zip(*known)
+        return NutrientVector(np.asarray(weights, dtype=np.float64) @ snapshot.matrix[list(rows)])
@@ -1,19 +1,35 @@
-import re
+import os
+import sys
 from datetime import datetime, timezone, timedelta
 
-def extract_number(value):
+# Add the parent directory to the system path
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..'))
+sys.path.append(parent_dir)
+sys.path.append(os.path.join(parent_dir, 'components'))
+
+from clients.nutrients import NUTRIENT_UNITS, to_number
+from utils.nutrient_vector import NUTRIENT_LABELS
+
+# Bar colors of the summary section, aligned with NUTRIENT_KEYS
+SUMMARY_COLORS = ('#4CAF50', '#9C27B0', '#FF9800', '#E91E63', '#2196F3', '#FF5722')
+
+def format_nutrient(food_info, column, portion=1.0):
     """
-    extract numbers from string and convert to float
-    example: '180kcal' -> 180.0
+    format a nutrient value with its unit, scaled by the serving multiplier
+    example: 180.0 -> '180kcal'
     """
-    if isinstance(value, (int, float)):
-        return float(value)
-    match = re.search(r'(\d+\.?\d*)', str(value))
-    return float(match.group(1)) if match else 0.0
+    value = food_info.get(column)
+    if value is None:
+        return '정보 없음'
+    value = to_number(value)
+    if portion != 1.0:
+        value = round(value * portion, 1)
+    return f"{value:g}{NUTRIENT_UNITS[column]}"
 
-def create_food_card(food_info, confidence, consumption_time=None):
+def create_food_card(food_info, confidence, consumption_time=None, portion=1.0):
     """
     Create a card for food information
+    Nutrient values are scaled by the serving multiplier (portion)
     """
     # If consumption_time is not provided, use current time in KST
     if consumption_time is None:
@@ -36,31 +52,31 @@ def create_food_card(food_info, confidence, consumption_time=None):
             <div style="font-size: 1.1em; font-weight: bold;">{food_info.get('food_name', '알 수 없음')}</div>
             <div style="font-size: 0.9em; color: #666;">신뢰도: {confidence:.1f}%</div>
         </div>
-        <div style="font-size: 0.9em; color: #666; margin-bottom: 10px;">섭취 시간: {time_str}</div>
+        <div style="font-size: 0.9em; color: #666; margin-bottom: 10px;">섭취 시간: {time_str} · 섭취량: {portion:g}인분</div>
         <div style="display: grid; grid-template-columns: repeat(auto-fit, minmax(100px, 1fr)); gap: 10px;">
             <div>
                 <div style="font-size: 0.75em; color: #666;">에너지</div>
-                <div style="font-size: 0.9em; margin-top: 2px;">{food_info.get('Energy', '정보 없음')}</div>
+                <div style="font-size: 0.9em; margin-top: 2px;">{format_nutrient(food_info, 'Energy', portion)}</div>
             </div>
             <div>
                 <div style="font-size: 0.75em; color: #666;">탄수화물</div>
-                <div style="font-size: 0.9em; margin-top: 2px;">{food_info.get('Carbohydrates', '정보 없음')}</div>
+                <div style="font-size: 0.9em; margin-top: 2px;">{format_nutrient(food_info, 'Carbohydrates', portion)}</div>
             </div>
             <div>
                 <div style="font-size: 0.75em; color: #666;">단백질</div>
-                <div style="font-size: 0.9em; margin-top: 2px;">{food_info.get('Protein', '정보 없음')}</div>
+                <div style="font-size: 0.9em; margin-top: 2px;">{format_nutrient(food_info, 'Protein', portion)}</div>
             </div>
             <div>
                 <div style="font-size: 0.75em; color: #666;">지방</div>
-                <div style="font-size: 0.9em; margin-top: 2px;">{food_info.get('Fat', '정보 없음')}</div>
+                <div style="font-size: 0.9em; margin-top: 2px;">{format_nutrient(food_info, 'Fat', portion)}</div>
             </div>
             <div>
                 <div style="font-size: 0.75em; color: #666;">식이섬유</div>
-                <div style="font-size: 0.9em; margin-top: 2px;">{food_info.get('Dietary_Fiber', '정보 없음')}</div>
+                <div style="font-size: 0.9em; margin-top: 2px;">{format_nutrient(food_info, 'Dietary_Fiber', portion)}</div>
             </div>
             <div>
                 <div style="font-size: 0.75em; color: #666;">나트륨</div>
-                <div style="font-size: 0.9em; margin-top: 2px;">{food_info.get('Sodium', '정보 없음')}</div>
+                <div style="font-size: 0.9em; margin-top: 2px;">{format_nutrient(food_info, 'Sodium', portion)}</div>
             </div>
         </div>
     </div>
@@ -69,19 +85,13 @@ def create_food_card(food_info, confidence, consumption_time=None):
 def create_warning_section(totals, recommended):
     """
     create warning section for nutritional components intake
+    totals and recommended are NutrientVector
     """
     # calculate intake percentage for each nutritional component and check if it exceeds 100%
-    percentages = {
-        '에너지': (totals['calories'] / recommended['calories']) * 100,
-        '탄수화물': (totals['carbohydrates'] / recommended['carbohydrates']) * 100,
-        '단백질': (totals['protein'] / recommended['protein']) * 100,
-        '지방': (totals['fat'] / recommended['fat']) * 100,
-        '식이섬유': (totals['fiber'] / recommended['fiber']) * 100,
-        '나트륨': (totals['sodium'] / recommended['sodium']) * 100
-    }
+    percentages = totals.percentages(recommended)
     
     # collect over items 100%
-    over_items = [f"{name}({int(pct)}%)" for name, pct in percentages.items() if pct > 100]
+    over_items = [f"{name}({int(pct)}%)" for name, pct in zip(NUTRIENT_LABELS, percentages) if pct > 100]
     
     if not over_items:
         return ""  # if no over items, return empty string
@@ -101,52 +111,37 @@ def create_warning_section(totals, recommended):
 def create_summary_section(totals, recommended):
     """
     create summary section for nutritional components
+    totals and recommended are NutrientVector
     """
+    percentages = totals.percentages(recommended)
+    
+    rows = "\n".join(f"""
+            <div style="font-size: 0.9em; color: #666;">{name}</div>
+            <div style="width: 100%; height: 24px; background-color: #f0f0f0; border-radius: 12px; overflow: hidden;">
+                <div style="width: {pct}%; height: 100%; 
+                     background-color: {color}; transition: width 0.3s ease;"></div>
+            </div>
+            <div style="font-size: 0.9em; text-align: right;">{int(pct)}%</div>
+""" for name, pct, color in zip(NUTRIENT_LABELS, percentages, SUMMARY_COLORS))
+    
     return f"""
     <div style="padding: 15px; border-radius: 15px; border: 1px solid #e0e0e0; margin-bottom: 20px; overflow: hidden;">
         <h3 style="margin: 0 0 15px 0; font-size: 1.1em;">📊 하루 권장 영양성분 총계</h3>
         <div style="display: grid; grid-template-columns: 1fr 3fr 1fr; gap: 10px; align-items: center;">
-            <div style="font-size: 0.9em; color: #666;">에너지</div>
-            <div style="width: 100%; height: 24px; background-color: #f0f0f0; border-radius: 12px; overflow: hidden;">
-                <div style="width: {(totals['calories'] / recommended['calories']) * 100}%; height: 100%; 
-                     background-color: #4CAF50; transition: width 0.3s ease;"></div>
-            </div>
-            <div style="font-size: 0.9em; text-align: right;">{int((totals['calories'] / recommended['calories']) * 100)}%</div>
-
-            <div style="font-size: 0.9em; color: #666;">탄수화물</div>
-            <div style="width: 100%; height: 24px; background-color: #f0f0f0; border-radius: 12px; overflow: hidden;">
-                <div style="width: {(totals['carbohydrates'] / recommended['carbohydrates']) * 100}%; height: 100%; 
-                     background-color: #9C27B0; transition: width 0.3s ease;"></div>
-            </div>
-            <div style="font-size: 0.9em; text-align: right;">{int((totals['carbohydrates'] / recommended['carbohydrates']) * 100)}%</div>
-
-            <div style="font-size: 0.9em; color: #666;">단백질</div>
-            <div style="width: 100%; height: 24px; background-color: #f0f0f0; border-radius: 12px; overflow: hidden;">
-                <div style="width: {(totals['protein'] / recommended['protein']) * 100}%; height: 100%; 
-                     background-color: #FF9800; transition: width 0.3s ease;"></div>
-            </div>
-            <div style="font-size: 0.9em; text-align: right;">{int((totals['protein'] / recommended['protein']) * 100)}%</div>
-
-            <div style="font-size: 0.9em; color: #666;">지방</div>
-            <div style="width: 100%; height: 24px; background-color: #f0f0f0; border-radius: 12px; overflow: hidden;">
-                <div style="width: {(totals['fat'] / recommended['fat']) * 100}%; height: 100%; 
-                     background-color: #E91E63; transition: width 0.3s ease;"></div>
-            </div>
-            <div style="font-size: 0.9em; text-align: right;">{int((totals['fat'] / recommended['fat']) * 100)}%</div>
-
-            <div style="font-size: 0.9em; color: #666;">식이섬유</div>
-            <div style="width: 100%; height: 24px; background-color: #f0f0f0; border-radius: 12px; overflow: hidden;">
-                <div style="width: {(totals['fiber'] / recommended['fiber']) * 100}%; height: 100%; 
-                     background-color: #2196F3; transition: width 0.3s ease;"></div>
-            </div>
-            <div style="font-size: 0.9em; text-align: right;">{int((totals['fiber'] / recommended['fiber']) * 100)}%</div>
+            {rows}
+        </div>
+    </div>
+    """
 
-            <div style="font-size: 0.9em; color: #666;">나트륨</div>
-            <div style="width: 100%; height: 24px; background-color: #f0f0f0; border-radius: 12px; overflow: hidden;">
-                <div style="width: {(totals['sodium'] / recommended['sodium']) * 100}%; height: 100%; 
-                     background-color: #FF5722; transition: width 0.3s ease;"></div>
-            </div>
-            <div style="font-size: 0.9em; text-align: right;">{int((totals['sodium'] / recommended['sodium']) * 100)}%</div>
+def create_status_section(message):
+    """
+    create progress section shown while a meal submission is being processed
+    """
+    return f"""
+    <div style="padding: 15px; border-radius: 15px; border: 1px solid #90CAF9; 
+         background-color: #E3F2FD; overflow: hidden;">
+        <div style="font-size: 0.9em; color: #0D47A1;">
+            {message}
         </div>
     </div>
-    """ 
\ No newline at end of file
+    """
@@ -0,0 +1,51 @@
+import numpy as np
+
+# Serving multipliers staff can pick (label, multiplier of one nutrition_info serving)
+PORTION_CHOICES = (('1/2 인분', 0.5), ('1 인분', 1.0), ('1.5 인분', 1.5), ('2 인분', 2.0))
+
+# Estimate the multiplier from the detected dish size (tray mode)
+AUTO_PORTION = 'auto'
+
+# Share of a tray photo covered by one standard serving,
+# when the tray fills the frame as in the shooting guide
+STANDARD_SERVING_AREA = 0.12
+
+# Estimated multipliers are rounded to quarter servings and clipped to this range
+PORTION_RANGE = (0.25, 2.0)
+
+def estimate_portions(boxes, image_size, reference_area=STANDARD_SERVING_AREA):
+    """
+    Estimate serving multipliers from dish boxes relative to the photo (tray) area
+
+    Args:
+        boxes: (x1, y1, x2, y2) pixel boxes
+        image_size: (width, height) of the photo
+
+    Returns:
+        np.ndarray: one multiplier per box
+    """
+    boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+    width, height = image_size
+    areas = (
+        np.clip(boxes[:, 2] - boxes[:, 0], 0, None)
+        * np.clip(boxes[:, 3] - boxes[:, 1], 0, None)
+        / float(width * height)
+    )
+    return np.clip(np.round(areas / reference_area * 4) / 4, *PORTION_RANGE)
+
+def resolve_portions(choice, count, boxes=None, image_size=None):
+    """
+    Serving multipliers for count recognized dishes
+
+    Args:
+        choice: a multiplier from PORTION_CHOICES, or AUTO_PORTION
+        boxes: dish boxes, used to estimate multipliers with AUTO_PORTION
+
+    Returns:
+        list: one multiplier per dish (1.0 when AUTO_PORTION has no boxes)
+    """
+    if choice == AUTO_PORTION:
+        if boxes:
+            return estimate_portions(boxes, image_size).tolist()
+        return [1.0] * count
+    return [float(choice)] * count
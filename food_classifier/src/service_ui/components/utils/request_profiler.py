@@ -0,0 +1,162 @@
+import io
+import os
+import time
+import random
+import pstats
+import cProfile
+import inspect
+import functools
+import tempfile
+import threading
+
+# Functions listed in the text summary next to each profile
+SUMMARY_LINES = 40
+
+class RequestProfiler:
+    """
+    On-demand cProfile of single event handler calls.
+    A call is profiled when the admin armed the next calls (arm) or, with a
+    sampling rate, at random. Each profile is written as <name>.prof (pstats,
+    readable by snakeviz, flameprof or `python -m pstats`) with a <name>.txt
+    summary, and only the newest max_files profiles are kept.
+    """
+
+    def __init__(self, directory, rate=0.0, max_files=200, min_seconds=0.0):
+        self.directory = directory
+        self.rate = rate
+        self.max_files = max_files
+        self.min_seconds = min_seconds
+        self._armed = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls, settings):
+        return cls(
+            directory=settings.profile_dir or os.path.join(tempfile.gettempdir(), 'food-classifier-profiles'),
+            rate=settings.profile_rate or 0.0,
+            max_files=settings.profile_max_files,
+            min_seconds=settings.profile_min_seconds or 0.0
+        )
+
+    def arm(self, count=1):
+        """Profile the next count calls of this worker"""
+        with self._lock:
+            self._armed = max(count, 0)
+            return self._armed
+
+    def _should_profile(self):
+        with self._lock:
+            if self._armed > 0:
+                self._armed -= 1
+                return True
+        return self.rate > 0 and random.random() < self.rate
+
+    def wrap(self, fn, name):
+        """Wrap an event handler (function or generator) for profiling"""
+        if inspect.isgeneratorfunction(fn):
+            @functools.wraps(fn)
+            def generator_wrapper(*args, **kwargs):
+                if not self._should_profile():
+                    yield from fn(*args, **kwargs)
+                    return
+                profile = cProfile.Profile()
+                start = time.perf_counter()
+                generator = fn(*args, **kwargs)
+                try:
+                    # Profile each step: steps may run on different worker threads
+                    while True:
+                        enabled = self._enable(profile)
+                        try:
+                            value = next(generator)
+                        except StopIteration:
+                            break
+                        finally:
+                            if enabled:
+                                profile.disable()
+                        yield value
+                finally:
+                    generator.close()
+                    self._save(profile, name, time.perf_counter() - start)
+            return generator_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not self._should_profile():
+                return fn(*args, **kwargs)
+            profile = cProfile.Profile()
+            start = time.perf_counter()
+            enabled = self._enable(profile)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                if enabled:
+                    profile.disable()
+                self._save(profile, name, time.perf_counter() - start)
+        return wrapper
+
+    @staticmethod
+    def _enable(profile):
+        # Another profiler may be active on this thread (or process, Python 3.12+)
+        try:
+            profile.enable()
+            return True
+        except ValueError:
+            return False
+
+    def _save(self, profile, name, seconds):
+        """Write the profile and its summary, then apply the retention limit"""
+        if seconds < self.min_seconds:
+            return
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            base = os.path.join(
+                self.directory,
+                f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{name}-{int(seconds * 1000)}ms"
+            )
+            stats = pstats.Stats(profile, stream=io.StringIO())
+            if not stats.stats:
+                return
+            stats.dump_stats(f"{base}.prof")
+
+            summary = io.StringIO()
+            summary.write(f"{name}: {seconds:.3f}s\n")
+            pstats.Stats(profile, stream=summary).sort_stats('cumulative').print_stats(SUMMARY_LINES)
+            with open(f"{base}.txt", 'w', encoding='utf-8') as f:
+                f.write(summary.getvalue())
+            print(f"Profile saved: {base}.prof ({seconds:.2f}s)")
+            self._prune()
+        except Exception as e:
+            print(f"Error saving profile: {str(e)}")
+
+    def _prune(self):
+        """Delete the oldest profiles beyond max_files"""
+        for profile_name in self.list_profiles()[self.max_files:]:
+            base = os.path.join(self.directory, profile_name['name'])
+            for extension in ('.prof', '.txt'):
+                try:
+                    os.remove(base + extension)
+                except FileNotFoundError:
+                    pass
+
+    def list_profiles(self):
+        """Saved profiles, newest first"""
+        try:
+            entries = [entry for entry in os.scandir(self.directory) if entry.name.endswith('.prof')]
+        except FileNotFoundError:
+            return []
+        entries.sort(key=lambda entry: entry.stat().st_mtime, reverse=True)
+        return [
+            {
+                'name': entry.name[:-len('.prof')],
+                'size_kb': round(entry.stat().st_size / 1024, 1),
+                'time': entry.stat().st_mtime
+            }
+            for entry in entries
+        ]
+
+    def path(self, profile_name, extension='.prof'):
+        """Path of a saved profile, or None if there is no such profile"""
+        if os.path.basename(profile_name) != profile_name:
+            return None
+        path = os.path.join(self.directory, profile_name + extension)
+        return path if os.path.isfile(path) else None
@@ -0,0 +1,79 @@
+import os
+import sys
+import time
+import uuid
+import threading
+from collections import OrderedDict
+
+# Add the parent directory to the system path
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..'))
+sys.path.append(parent_dir)
+sys.path.append(os.path.join(parent_dir, 'components'))
+
+from clients.settings import get_settings
+from utils.customer_session import CustomerSession
+
+class SessionStore:
+    """
+    Server-side CustomerSession store keyed by session id.
+    Only the session id is kept in Gradio state; sessions expire after ttl seconds
+    without access and the least recently used ones are dropped above max_sessions.
+    """
+
+    def __init__(self, ttl=12 * 60 * 60, max_sessions=1000):
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self._sessions = OrderedDict()  # least recently used first
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def new_session_id():
+        """Create a new session id (used as the initial value of gr.State)"""
+        return uuid.uuid4().hex
+
+    def get(self, session_id):
+        """
+        Get the session for session_id, creating an empty one if it is missing or expired.
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._evict(now)
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = CustomerSession()
+                self._sessions[session_id] = session
+            else:
+                self._sessions.move_to_end(session_id)
+            session.last_access = now
+            self._evict(now)
+            return session
+
+    def delete(self, session_id):
+        """Delete a session"""
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def stats(self):
+        """Number of sessions and size of their history HTML (memory diagnostics)"""
+        with self._lock:
+            return {
+                'sessions': len(self._sessions),
+                'history_chars': sum(len(session.history) for session in self._sessions.values())
+            }
+
+    def _evict(self, now):
+        """Drop expired sessions, then the least recently used ones above max_sessions"""
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if now - session.last_access <= self.ttl and len(self._sessions) <= self.max_sessions:
+                break
+            del self._sessions[session_id]
+
+# Sessions of this worker process
+session_store = SessionStore(
+    ttl=get_settings().session_ttl,
+    max_sessions=get_settings().max_sessions
+)
@@ -0,0 +1,104 @@
+import os
+import sys
+import threading
+
+# Add the service directories to the system path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(current_dir)
+sys.path.append(os.path.join(current_dir, 'components'))
+
+from clients.settings import get_settings
+
+class ServiceContainer:
+    """
+    Clients and processors shared by all event handlers of one process.
+    Each one is created on first use, so importing the app does not import
+    OpenCV, Matplotlib, the Azure SDK or the MySQL driver or open any connection.
+    Pass instances as keyword arguments to replace them (tests, stand-ins).
+    """
+
+    def __init__(self, settings=None, **instances):
+        self._settings = settings
+        self._instances = dict(instances)
+        self._lock = threading.RLock()
+
+    def _get(self, name, factory):
+        instance = self._instances.get(name)
+        if instance is None:
+            with self._lock:
+                instance = self._instances.get(name)
+                if instance is None:
+                    instance = factory()
+                    self._instances[name] = instance
+        return instance
+
+    @property
+    def settings(self):
+        return self._settings or get_settings()
+
+    @property
+    def profiler(self):
+        def create():
+            from utils.request_profiler import RequestProfiler
+            return RequestProfiler.from_settings(self.settings)
+        return self._get('profiler', create)
+
+    @property
+    def cache(self):
+        def create():
+            from clients.cache_client import CacheClient
+            return CacheClient(path=self.settings.cache_path)
+        return self._get('cache', create)
+
+    @property
+    def db_client(self):
+        def create():
+            from clients.db_client import DatabaseClient
+            return DatabaseClient(settings=self.settings)
+        return self._get('db_client', create)
+
+    @property
+    def ml_client(self):
+        def create():
+            from clients.ml_client import MLClient
+            shadow = None
+            if self.settings.shadow_model_path:
+                from clients.shadow_client import ShadowEvaluator
+                shadow = ShadowEvaluator.from_settings(self.settings)
+            return MLClient(cache=self.cache, settings=self.settings, shadow=shadow)
+        return self._get('ml_client', create)
+
+    @property
+    def catalog(self):
+        def create():
+            from utils.nutrition_catalog import NutritionCatalog, load_aliases
+            return NutritionCatalog(
+                self.db_client,
+                cache=self.cache,
+                aliases=load_aliases(self.settings.food_aliases_path)
+            )
+        return self._get('catalog', create)
+
+    @property
+    def food_processor(self):
+        def create():
+            from utils.food_processing import FoodProcessor
+            archiver = None
+            if self.settings.photo_archive_path:
+                from clients.photo_archive import MealPhotoArchiver
+                archiver = MealPhotoArchiver.from_settings(self.settings)
+            return FoodProcessor(
+                ml_client=self.ml_client,
+                db_client=self.db_client,
+                catalog=self.catalog,
+                cache=self.cache,
+                archiver=archiver
+            )
+        return self._get('food_processor', create)
+
+    @property
+    def customer_processor(self):
+        def create():
+            from utils.customer_processing import CustomerProcessor
+            return CustomerProcessor(db_client=self.db_client, cache=self.cache)
+        return self._get('customer_processor', create)
@@ -0,0 +1,178 @@
+import gc
+import os
+import sys
+import time
+import threading
+import tracemalloc
+from collections import deque
+
+# Frames kept per traced allocation
+TRACEBACK_FRAMES = 5
+
+# Samples kept for the RSS trend (a day at the default 5 minute interval)
+MAX_SAMPLES = 288
+
+# Allocation sites listed in the growth reports
+TOP_ALLOCATIONS = 15
+
+# tracemalloc domain of NumPy array buffers (numpy.lib.tracemalloc_domain)
+NUMPY_DOMAIN = 389047
+
+# Allocations of the diagnostics themselves are left out of the reports
+_IGNORED_TRACES = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+    tracemalloc.Filter(False, '<unknown>'),
+)
+
+def rss_bytes():
+    """Resident memory of this process"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except OSError:
+        # Not Linux: peak instead of current RSS (ru_maxrss is in KB)
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+def count_objects():
+    """
+    Live objects of the known growth sources: Matplotlib figures (open in
+    pyplot and alive at all), PIL images and customer sessions.
+    Only modules that are already imported are looked at.
+    """
+    watched = {}
+    if 'matplotlib.figure' in sys.modules:
+        watched['figures'] = sys.modules['matplotlib.figure'].Figure
+    if 'PIL.Image' in sys.modules:
+        watched['images'] = sys.modules['PIL.Image'].Image
+    if 'utils.customer_session' in sys.modules:
+        watched['sessions_alive'] = sys.modules['utils.customer_session'].CustomerSession
+
+    counts = dict.fromkeys(watched, 0)
+    for obj in gc.get_objects():
+        for name, cls in watched.items():
+            if isinstance(obj, cls):
+                counts[name] += 1
+    if 'matplotlib.pyplot' in sys.modules:
+        counts['open_figures'] = len(sys.modules['matplotlib.pyplot'].get_fignums())
+    return counts
+
+def format_stats(stats):
+    """Top entries of a tracemalloc snapshot diff"""
+    return [
+        {
+            'location': f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+            'size_kb': round(stat.size / 1024, 1),
+            'size_diff_kb': round(stat.size_diff / 1024, 1),
+            'count_diff': stat.count_diff
+        }
+        for stat in stats[:TOP_ALLOCATIONS]
+    ]
+
+def slope_per_hour(samples, key):
+    """Least-squares growth of a sample value per hour"""
+    if len(samples) < 2:
+        return None
+    times = [sample['time'] for sample in samples]
+    values = [sample[key] for sample in samples]
+    mean_t = sum(times) / len(times)
+    mean_v = sum(values) / len(values)
+    var_t = sum((t - mean_t) ** 2 for t in times)
+    if var_t == 0:
+        return None
+    return sum((t - mean_t) * (v - mean_v) for t, v in zip(times, values)) / var_t * 3600
+
+class MemoryDiagnostics:
+    """
+    Opt-in memory diagnostics of one worker process.
+    Traces allocations with tracemalloc and takes a sample every interval
+    seconds: RSS, traced and NumPy memory, live object counts and the
+    allocation sites that grew since the previous sample. Samples are kept
+    for the RSS trend reported by the admin endpoint (/admin/memory).
+    """
+
+    def __init__(self, session_store, interval=300):
+        self.session_store = session_store
+        self.interval = interval
+        self.samples = deque(maxlen=MAX_SAMPLES)
+        self._baseline = None
+        self._previous = None
+        self._last_growth = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def start(self):
+        """Start tracing and the sampling thread"""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(TRACEBACK_FRAMES)
+        self.sample()
+        threading.Thread(target=self._run, name='memory-diagnostics', daemon=True).start()
+        print(f"Memory diagnostics enabled, sampling every {self.interval}s")
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.sample()
+            except Exception as e:
+                print(f"Memory diagnostics sample failed: {str(e)}")
+
+    def _snapshot(self):
+        return tracemalloc.take_snapshot().filter_traces(_IGNORED_TRACES)
+
+    def sample(self):
+        """
+        Take a snapshot and record a sample
+
+        Returns:
+            dict: the sample
+        """
+        snapshot = self._snapshot()
+        numpy_traces = snapshot.filter_traces([tracemalloc.DomainFilter(True, NUMPY_DOMAIN)]).traces
+        traced, _ = tracemalloc.get_traced_memory()
+
+        sample = {
+            'time': time.time(),
+            'rss_mb': round(rss_bytes() / 1024 ** 2, 1),
+            'traced_mb': round(traced / 1024 ** 2, 1),
+            'numpy_arrays': len(numpy_traces),
+            'numpy_mb': round(sum(trace.size for trace in numpy_traces) / 1024 ** 2, 1),
+            **count_objects(),
+            **self.session_store.stats()
+        }
+
+        with self._lock:
+            if self._baseline is None:
+                self._baseline = snapshot
+            if self._previous is not None:
+                self._last_growth = format_stats(snapshot.compare_to(self._previous, 'lineno'))
+            self._previous = snapshot
+            self.samples.append(sample)
+        return sample
+
+    def report(self, take_sample=False):
+        """
+        State for the admin endpoint
+
+        Args:
+            take_sample: sample now instead of reporting the last periodic sample
+        """
+        if take_sample:
+            self.sample()
+        with self._lock:
+            samples = list(self.samples)
+            growth = list(self._last_growth)
+            baseline, latest = self._baseline, self._previous
+
+        return {
+            'latest': samples[-1] if samples else None,
+            'rss_mb_per_hour': slope_per_hour(samples, 'rss_mb'),
+            'traced_mb_per_hour': slope_per_hour(samples, 'traced_mb'),
+            'top_growth': growth,
+            'top_growth_since_start': format_stats(latest.compare_to(baseline, 'lineno')) if latest else [],
+            'samples': samples
+        }
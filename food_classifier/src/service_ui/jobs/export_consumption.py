@@ -0,0 +1,77 @@
+"""
+Incremental export of consumption history to the analytics archive
+
+Copies the consumption rows recorded since the last run, joined with their
+nutrition_info values, into date-partitioned Parquet files (see
+clients/consumption_archive.py). Trend queries (jobs/intake_trends.py) then
+read the files instead of Azure MySQL.
+
+Usage:
+    python jobs/export_consumption.py [--archive DIR] [--batch-size N] [--reread N] [--no-compact]
+"""
+import os
+import sys
+import argparse
+from datetime import datetime
+import pytz
+
+# Add the parent directory to the system path
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(parent_dir)
+
+from clients.db_client import DatabaseClient
+from clients.settings import get_settings
+from clients.consumption_archive import ConsumptionArchive
+
+# Ids below the largest archived one that are read again: an insert committed after
+# a later id was exported would otherwise be skipped for good
+REREAD_IDS = 1000
+
+def export(db_client, archive, batch_size=50000, reread=REREAD_IDS):
+    """
+    Append every consumption row not archived yet, from reread ids below the
+    largest archived id on, batch_size rows per query
+
+    Returns:
+        int: number of rows exported
+    """
+    last_id = max(archive.last_id() - reread, 0)
+    exported = 0
+    db_client.connect()
+    try:
+        while True:
+            rows = db_client.get_consumption_after(last_id, limit=batch_size)
+            if rows is None:
+                raise RuntimeError("Failed to read consumption rows from the database")
+            if not rows:
+                break
+            exported += archive.append(rows)
+            last_id = rows[-1][0]
+            print(f"Exported {exported} rows (last id {last_id})")
+            if len(rows) < batch_size:
+                break
+    finally:
+        db_client.close()
+    return exported
+
+def main():
+    parser = argparse.ArgumentParser(description="Incremental export of consumption history to Parquet")
+    parser.add_argument('--archive', default=None, help="archive directory, default: FOOD_CLASSIFIER_CONSUMPTION_ARCHIVE")
+    parser.add_argument('--batch-size', type=int, default=50000, help="rows per database query")
+    parser.add_argument('--reread', type=int, default=REREAD_IDS, help="ids below the last archived one to read again")
+    parser.add_argument('--no-compact', action='store_true', help="keep one file per run in past partitions")
+    args = parser.parse_args()
+
+    archive = ConsumptionArchive(args.archive or get_settings().consumption_archive_path)
+    exported = export(DatabaseClient(), archive, args.batch_size, args.reread)
+    print(f"{exported} new rows in {archive.root}")
+
+    if not args.no_compact:
+        # Today's partition still receives rows, it is compacted on a later run
+        today = datetime.now(pytz.timezone('Asia/Seoul')).date()
+        compacted = archive.compact(before=today)
+        if compacted:
+            print(f"Compacted {compacted} partitions")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Daily, weekly or monthly intake trends from the analytics archive
+
+Answers arbitrary date ranges for one resident or the whole facility from the
+Parquet files written by jobs/export_consumption.py, without querying Azure MySQL
+(except one lookup of the resident's customer_id by code).
+
+Usage:
+    python jobs/intake_trends.py --start 2025-01-01 --end 2025-03-31 --period week
+    python jobs/intake_trends.py --code 1234 --guardian 5678 --start 2025-03-01 [--period day] [--csv trends.csv]
+"""
+import os
+import sys
+import csv
+import argparse
+from datetime import datetime
+import pytz
+
+# Add the parent directory to the system path
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(parent_dir)
+
+from clients.settings import get_settings
+from clients.consumption_archive import ConsumptionArchive, INTAKE_KEYS, PERIODS
+
+def format_trend(trend):
+    """Plain-text table of a trend"""
+    header = f"{'period':<12} {'customers':>9} {'days':>6}" + ''.join(f" {key:>13}" for key in INTAKE_KEYS)
+    lines = [header, '-' * len(header)]
+    for row in trend:
+        lines.append(
+            f"{row['period'].isoformat():<12} {row['customers']:>9} {row['days']:>6}"
+            + ''.join(f" {row[f'avg_{key}']:>13.1f}" for key in INTAKE_KEYS)
+        )
+    return '\n'.join(lines)
+
+def find_customer_id(code, guardian):
+    """customer_id of a resident and guardian code (the only database query of this job)"""
+    from clients.db_client import DatabaseClient
+
+    # Customers are stored under the combined code, as built by CustomerProcessor
+    combined_code = f"{code}-{guardian}"
+    db_client = DatabaseClient()
+    db_client.connect()
+    try:
+        customer = db_client.get_customer_basic_info(combined_code)
+    finally:
+        db_client.close()
+    if not customer:
+        raise SystemExit(f"No customer with code {code} and guardian code {guardian}")
+    return customer['customer_id']
+
+def main():
+    today = datetime.now(pytz.timezone('Asia/Seoul')).date()
+
+    parser = argparse.ArgumentParser(description="Intake trends from the consumption archive")
+    parser.add_argument('--start', required=True, help="first date (YYYY-MM-DD)")
+    parser.add_argument('--end', default=today.isoformat(), help="last date (YYYY-MM-DD), default: today (KST)")
+    parser.add_argument('--period', choices=PERIODS, default='day')
+    parser.add_argument('--code', default=None, help="resident code, default: whole facility")
+    parser.add_argument('--guardian', default=None, help="guardian code of the resident (required with --code)")
+    parser.add_argument('--customer-id', type=int, default=None, help="resident customer_id (no database lookup)")
+    parser.add_argument('--archive', default=None, help="archive directory, default: FOOD_CLASSIFIER_CONSUMPTION_ARCHIVE")
+    parser.add_argument('--csv', default=None, help="also write the trend to this CSV file")
+    args = parser.parse_args()
+    if args.code and not args.guardian:
+        parser.error("--code requires --guardian")
+
+    start = datetime.strptime(args.start, '%Y-%m-%d').date()
+    end = datetime.strptime(args.end, '%Y-%m-%d').date()
+    archive = ConsumptionArchive(args.archive or get_settings().consumption_archive_path)
+
+    customer_id = args.customer_id or (find_customer_id(args.code, args.guardian) if args.code else None)
+    if customer_id is None:
+        trend = archive.facility_trend(start, end, args.period)
+        print(f"Facility, average daily intake per resident ({start} ~ {end}, {args.period})")
+    else:
+        trend = archive.customer_trend(customer_id, start, end, args.period)
+        print(f"Customer {customer_id}, average daily intake ({start} ~ {end}, {args.period})")
+    print(format_trend(trend))
+
+    if args.csv:
+        with open(args.csv, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=['period', 'customers', 'days'] + [f'avg_{key}' for key in INTAKE_KEYS])
+            writer.writeheader()
+            writer.writerows(trend)
+        print(f"Trend written to {args.csv}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+"""
+Facility-wide daily nutrition report
+
+Compares every resident's intake on one day (yesterday in KST by default)
+against their recommended_nutrition ranges and writes a single HTML report.
+
+Usage:
+    python jobs/nutrition_report.py [--date YYYY-MM-DD] [--output report.html] [--workers N]
+"""
+import os
+import sys
+import io
+import html
+import base64
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+import numpy as np
+import pytz
+
+# Add the parent directory to the system path
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(parent_dir)
+sys.path.append(os.path.join(parent_dir, 'components'))
+
+from clients.db_client import DatabaseClient
+from clients.nutrients import NUTRIENT_COLUMNS
+from utils.nutrient_vector import (
+    NUTRIENT_KEYS,
+    NUTRIENT_LABELS,
+    batch_percentages,
+    batch_over_mask,
+    batch_under_mask
+)
+
+# Chart labels, aligned with NUTRIENT_KEYS
+CHART_LABELS = ('Calories', 'Carbohydrates', 'Protein', 'Fat', 'Dietary Fiber', 'Sodium')
+
+def load_report_data(db_client, report_date):
+    """
+    Load customers, their intake on report_date and their recommended ranges
+    with three set-based queries.
+
+    Returns:
+        tuple: (customers, intake, minimum, maximum) where the matrices have
+        one row per customer over the NUTRIENT_KEYS axis
+    """
+    db_client.connect()
+    try:
+        customers = db_client.get_all_customers()
+        daily_totals = db_client.get_daily_nutrition_totals(report_date)
+        recommended = db_client.get_all_recommended_nutrition()
+    finally:
+        db_client.close()
+
+    if customers is None or daily_totals is None or recommended is None:
+        raise RuntimeError("Failed to load report data from the database")
+
+    # Only customers with recommended ranges can be evaluated
+    recommended_by_id = {row['customer_id']: row for row in recommended}
+    customers = [customer for customer in customers if customer['customer_id'] in recommended_by_id]
+    row_index = {customer['customer_id']: idx for idx, customer in enumerate(customers)}
+
+    intake = np.zeros((len(customers), len(NUTRIENT_KEYS)))
+    for row in daily_totals:
+        idx = row_index.get(row['customer_id'])
+        if idx is not None:
+            intake[idx] = [row[f'total_{key}'] for key in NUTRIENT_KEYS]
+
+    minimum = np.array(
+        [[recommended_by_id[c['customer_id']][f'{column}_min'] for column in NUTRIENT_COLUMNS] for c in customers],
+        dtype=np.float64
+    ).reshape(-1, len(NUTRIENT_KEYS))
+    maximum = np.array(
+        [[recommended_by_id[c['customer_id']][f'{column}_max'] for column in NUTRIENT_COLUMNS] for c in customers],
+        dtype=np.float64
+    ).reshape(-1, len(NUTRIENT_KEYS))
+
+    return customers, intake, minimum, maximum
+
+def compute_compliance(intake, minimum, maximum):
+    """
+    Compute compliance for all customers at once.
+    """
+    over = batch_over_mask(intake, maximum)
+    under = batch_under_mask(intake, minimum)
+    return {
+        'percentages': batch_percentages(intake, maximum),
+        'over': over,
+        'under': under,
+        'compliant': ~(over | under).any(axis=1)
+    }
+
+def render_chart(args):
+    """
+    Render one customer's compliance chart as a base64 PNG.
+    Runs in a worker process.
+    """
+    percentages, over, under = args
+
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    colors = ['#FFA500' if o else '#FF4444' if u else '#4CAF50' for o, u in zip(over, under)]
+
+    fig, ax = plt.subplots(figsize=(6, 2.8))
+    try:
+        ax.barh(CHART_LABELS, np.minimum(percentages, 200), color=colors)
+        ax.axvline(x=100, color='#666666', linestyle='--', alpha=0.5)
+        ax.set_xlim(0, 200)
+        ax.set_xlabel('% of recommended max')
+        ax.invert_yaxis()
+        fig.tight_layout()
+
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format='png', dpi=80)
+    finally:
+        plt.close(fig)
+
+    return base64.b64encode(buffer.getvalue()).decode('ascii')
+
+def render_charts(compliance, workers=None):
+    """
+    Render all charts in a process pool.
+    """
+    jobs = zip(compliance['percentages'], compliance['over'], compliance['under'])
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(render_chart, jobs, chunksize=16))
+
+def build_html(report_date, customers, intake, compliance, charts):
+    """
+    Build the HTML report
+    """
+    compliant_count = int(compliance['compliant'].sum())
+    sections = []
+
+    for idx, customer in enumerate(customers):
+        issues = []
+        for label, pct, over, under in zip(NUTRIENT_LABELS,
+                                           compliance['percentages'][idx],
+                                           compliance['over'][idx],
+                                           compliance['under'][idx]):
+            if over:
+                issues.append(f"{label} 초과({int(pct)}%)")
+            elif under:
+                issues.append(f"{label} 부족({int(pct)}%)")
+
+        status = "✅ 권장 범위 내" if not issues else "⚠️ " + ", ".join(issues)
+        no_intake = " (섭취 기록 없음)" if not intake[idx].any() else ""
+
+        sections.append(f"""
+        <div style="padding: 15px; border-radius: 15px; border: 1px solid #e0e0e0; margin-bottom: 20px; page-break-inside: avoid;">
+            <h3 style="margin: 0 0 10px 0; font-size: 1.1em;">{html.escape(str(customer['name']))} ({html.escape(str(customer['code']))}){no_intake}</h3>
+            <div style="font-size: 0.9em; margin-bottom: 10px;">{status}</div>
+            <img src="data:image/png;base64,{charts[idx]}" alt="chart">
+        </div>
+        """)
+
+    return f"""<!DOCTYPE html>
+<html lang="ko">
+<head>
+<meta charset="utf-8">
+<title>일일 영양 섭취 리포트 {report_date}</title>
+</head>
+<body style="font-family: sans-serif; max-width: 800px; margin: auto;">
+    <h2>📊 일일 영양 섭취 리포트 ({report_date})</h2>
+    <p>전체 {len(customers)}명 중 {compliant_count}명이 모든 항목에서 권장 범위 내로 섭취했습니다.</p>
+    {''.join(sections)}
+</body>
+</html>
+"""
+
+def main():
+    yesterday = (datetime.now(pytz.timezone('Asia/Seoul')) - timedelta(days=1)).date()
+
+    parser = argparse.ArgumentParser(description="Facility-wide daily nutrition report")
+    parser.add_argument('--date', default=yesterday.isoformat(), help="report date (YYYY-MM-DD), default: yesterday (KST)")
+    parser.add_argument('--output', default=None, help="output HTML path")
+    parser.add_argument('--workers', type=int, default=None, help="chart rendering processes, default: CPU count")
+    args = parser.parse_args()
+
+    report_date = datetime.strptime(args.date, '%Y-%m-%d').date()
+    output_path = args.output or f"nutrition_report_{report_date}.html"
+
+    customers, intake, minimum, maximum = load_report_data(DatabaseClient(), report_date)
+    print(f"Loaded {len(customers)} customers for {report_date}")
+
+    compliance = compute_compliance(intake, minimum, maximum)
+    charts = render_charts(compliance, args.workers)
+
+    with open(output_path, 'w', encoding='utf-8') as f:
+        f.write(build_html(report_date, customers, intake, compliance, charts))
+    print(f"Report written to {output_path}")
+
+if __name__ == "__main__":
+    main()
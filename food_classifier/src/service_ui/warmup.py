@@ -0,0 +1,149 @@
+import os
+import sys
+import time
+import threading
+from datetime import date, timedelta
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(current_dir, 'components'))
+
+from utils.nutrient_vector import NUTRIENT_KEYS
+
+# Small bundled food photo used for the warm-up prediction
+WARMUP_IMAGE = os.path.join(current_dir, 'assets', 'warmup.jpg')
+
+# Steps that must succeed before the worker reports ready
+REQUIRED_STEPS = ('database', 'catalog')
+
+class Warmup:
+    """
+    Startup warm-up of one worker process.
+    Pays the cold costs (MySQL TLS handshakes, nutrition catalog, Matplotlib
+    font cache and style, OpenCV, Custom Vision handshake) before the first
+    request, and keeps the result for the readiness endpoint.
+    """
+
+    def __init__(self, container):
+        self.container = container
+        self.steps = {}
+        self.started_at = None
+        self.finished_at = None
+        self._lock = threading.Lock()
+
+    def run(self):
+        """
+        Run every warm-up step, recording duration and error of each.
+        A failing step does not stop the others.
+
+        Returns:
+            bool: whether the worker is ready
+        """
+        settings = self.container.settings
+        steps = [
+            ('database', self._warm_database),
+            ('catalog', self._warm_catalog),
+            ('opencv', self._warm_opencv),
+            ('chart', self._warm_chart),
+        ]
+        if settings.classifier_tags_path:
+            steps.append(('tags', self._check_tags))
+        if settings.warmup_prediction:
+            steps.append(('prediction', self._warm_prediction))
+
+        self.started_at = time.time()
+        for name, step in steps:
+            start = time.perf_counter()
+            error = None
+            try:
+                step()
+            except Exception as e:
+                error = str(e)
+            seconds = time.perf_counter() - start
+            with self._lock:
+                self.steps[name] = {'ok': error is None, 'seconds': round(seconds, 3), 'error': error}
+            print(f"Warm-up {name}: {'ok' if error is None else 'failed (' + error + ')'} in {seconds:.2f}s")
+        self.finished_at = time.time()
+        return self.ready
+
+    @property
+    def ready(self):
+        """Warm-up finished and all required steps succeeded"""
+        with self._lock:
+            return self._is_ready()
+
+    def _is_ready(self):
+        return self.finished_at is not None and all(
+            self.steps.get(name, {}).get('ok') for name in REQUIRED_STEPS
+        )
+
+    def snapshot(self):
+        """Warm-up state for the readiness endpoint"""
+        with self._lock:
+            return {
+                'ready': self._is_ready(),
+                'seconds': round(self.finished_at - self.started_at, 3) if self.finished_at else None,
+                'steps': dict(self.steps)
+            }
+
+    def _read_image(self):
+        with open(self.container.settings.warmup_image or WARMUP_IMAGE, 'rb') as f:
+            return f.read()
+
+    def _warm_database(self):
+        """Open pooled connections for the concurrent meal submissions"""
+        self.container.db_client.warm_up(self.container.settings.meal_concurrency)
+
+    def _warm_catalog(self):
+        if not self.container.catalog.load():
+            raise RuntimeError("nutrition catalog could not be loaded")
+
+    def _check_tags(self):
+        """Report classifier tags that resolve to no food (they would fail after a paid prediction)"""
+        from utils.nutrition_catalog import read_tags
+        tags = read_tags(self.container.settings.classifier_tags_path)
+        unmapped = self.container.catalog.unmapped(tags)
+        if unmapped is None:
+            raise RuntimeError("nutrition catalog is not loaded")
+        if unmapped:
+            raise RuntimeError(f"{len(unmapped)} of {len(tags)} classifier tags have no food: {', '.join(unmapped)}")
+
+    def _warm_opencv(self):
+        """Decode and resize like a customer photo"""
+        import cv2
+        import numpy as np
+        image = cv2.imdecode(np.frombuffer(self._read_image(), dtype=np.uint8), cv2.IMREAD_COLOR)
+        if image is None:
+            raise RuntimeError("warm-up image could not be decoded")
+        cv2.resize(cv2.cvtColor(image, cv2.COLOR_BGR2RGB), (300, 300))
+
+    def _warm_chart(self):
+        """Render a dummy nutrition history (builds the font cache, loads the style)"""
+        import matplotlib.pyplot as plt
+        today = date.today()
+        nutrition_info = {
+            'recent_nutrition': [
+                {
+                    'date': today - timedelta(days=day),
+                    'total_calories': 1800.0,
+                    'total_carbohydrates': 250.0,
+                    'total_protein': 60.0,
+                    'total_fat': 50.0,
+                    'total_fiber': 20.0,
+                    'total_sodium': 2000.0
+                }
+                for day in range(3)
+            ],
+            'recommended_nutrition': {
+                key: {'min': 0.0, 'max': 1.0}
+                for key in NUTRIENT_KEYS
+            }
+        }
+        fig = self.container.customer_processor._create_nutrition_plot(nutrition_info)
+        try:
+            fig.canvas.draw()
+        finally:
+            plt.close(fig)
+
+    def _warm_prediction(self):
+        """One uncached prediction, to open the connection to Custom Vision"""
+        self.container.ml_client.warm_up(self._read_image())
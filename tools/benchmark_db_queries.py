@@ -0,0 +1,117 @@
+"""
+Micro-benchmark of the DatabaseClient hot queries
+
+Runs each hot query (customer by code, food by name / id, today's consumption)
+repeatedly against the configured database in three ways:
+
+    pure-text     pure Python protocol, dictionary cursor, query text per call (previous path)
+    cext-text     C extension, dictionary cursor, query text per call
+    cext-prepared DatabaseClient: C extension, reused server-side prepared statements, named records
+
+and reports the client CPU time and the wall time per query. The CPU column is
+what a worker saves; the wall time also includes the database round trip.
+
+Usage:
+    python tools/benchmark_db_queries.py [--repeat N]
+"""
+import os
+import sys
+import time
+import argparse
+from datetime import datetime
+
+SERVICE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'food_classifier', 'src', 'service_ui'))
+sys.path.append(SERVICE_DIR)
+
+import mysql.connector
+import pytz
+
+from clients.db_client import (
+    DatabaseClient, CUSTOMER_BY_CODE_QUERY, FOOD_BY_NAME_QUERY, FOOD_BY_ID_QUERY, TODAY_CONSUMPTION_QUERY
+)
+from clients.nutrients import normalize_food_row, to_number
+
+def text_query(connection, query, params):
+    """Previous DatabaseClient path: new dictionary cursor, query text, dict rows"""
+    cursor = connection.cursor(dictionary=True)
+    cursor.execute(query, params)
+    rows = cursor.fetchall()
+    cursor.close()
+    return rows
+
+def sample_parameters(connection):
+    """Existing customer code, customer_id, food name and food_id to query"""
+    cursor = connection.cursor()
+    cursor.execute("SELECT code, customer_id FROM customer LIMIT 1")
+    code, customer_id = cursor.fetchone()
+    cursor.execute("SELECT food_name, food_id FROM nutrition_info LIMIT 1")
+    food_name, food_id = cursor.fetchone()
+    cursor.close()
+    return code, customer_id, food_name, food_id
+
+def measure(fn, repeat):
+    """
+    Returns:
+        tuple: (CPU microseconds, wall microseconds) per call
+    """
+    fn()  # prepares statements, fills caches
+    cpu_start, wall_start = time.process_time(), time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (
+        (time.process_time() - cpu_start) / repeat * 1e6,
+        (time.perf_counter() - wall_start) / repeat * 1e6
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmark of the DatabaseClient hot queries")
+    parser.add_argument('--repeat', type=int, default=500, help="calls per query and variant")
+    args = parser.parse_args()
+
+    client = DatabaseClient()
+    client.connect()
+    if client.connection is None:
+        sys.exit("Could not connect to the database")
+    code, customer_id, food_name, food_id = sample_parameters(client.connection)
+    today = datetime.now(pytz.timezone('Asia/Seoul')).date()
+
+    connections = {'pure-text': mysql.connector.connect(**{**client._connection_params(), 'use_pure': True})}
+    if mysql.connector.HAVE_CEXT:
+        connections['cext-text'] = mysql.connector.connect(**{**client._connection_params(), 'use_pure': False})
+    else:
+        print("C extension not available: cext-text is skipped and cext-prepared runs on the pure protocol")
+
+    queries = [
+        ('customer by code',
+         lambda connection: text_query(connection, CUSTOMER_BY_CODE_QUERY, (code,)),
+         lambda: client.get_customer_basic_info(code)),
+        ('food by name',
+         lambda connection: [normalize_food_row(row) for row in text_query(connection, FOOD_BY_NAME_QUERY, (food_name,))],
+         lambda: client.get_food_info_from_db(food_name)),
+        ('food by id',
+         lambda connection: [normalize_food_row(row) for row in text_query(connection, FOOD_BY_ID_QUERY, (food_id,))],
+         lambda: client.get_food_info_by_id(food_id)),
+        ('today consumption',
+         lambda connection: [
+             {**row, 'portion': to_number(row['portion'])}
+             for row in text_query(connection, TODAY_CONSUMPTION_QUERY, (customer_id, today))
+         ],
+         lambda: client.get_today_consumption_by_patient(customer_id)),
+    ]
+
+    print(f"{'query':<20} {'variant':<14} {'CPU us':>9} {'wall us':>9} {'CPU saved':>10}")
+    try:
+        for label, baseline, fast in queries:
+            results = {name: measure(lambda: baseline(connection), args.repeat) for name, connection in connections.items()}
+            results['cext-prepared'] = measure(fast, args.repeat)
+            reference = results['pure-text'][0]
+            for name, (cpu_us, wall_us) in results.items():
+                saved = 100 * (reference - cpu_us) / reference if reference else 0.0
+                print(f"{label:<20} {name:<14} {cpu_us:>9.1f} {wall_us:>9.1f} {saved:>9.1f}%")
+    finally:
+        for connection in connections.values():
+            connection.close()
+        client.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Import-time budget check for the service UI
+
+Runs `python -X importtime -c "import app"` in food_classifier/src/service_ui and fails
+if importing the app takes longer than the budget, or if a heavy module that should
+only be loaded on first use (OpenCV, Matplotlib, Azure SDK, MySQL driver) is imported.
+
+Usage:
+    python tools/check_import_time.py [--budget SECONDS] [--top N]
+"""
+import os
+import sys
+import argparse
+import subprocess
+
+SERVICE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'food_classifier', 'src', 'service_ui'))
+
+# Modules created lazily by the ServiceContainer, never at import time
+LAZY_MODULES = ('cv2', 'matplotlib', 'azure', 'msrest', 'mysql')
+
+def measure_imports(module='app'):
+    """
+    Import the module in a fresh interpreter with -X importtime.
+
+    Returns:
+        list: (package, self_us, cumulative_us, depth) for every imported module
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=SERVICE_DIR, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        print(result.stderr[-2000:])
+        raise RuntimeError(f"Importing {module} failed")
+
+    imports = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, package = line[len('import time:'):].split('|')
+        depth = (len(package) - len(package.lstrip())) // 2
+        imports.append((package.strip(), int(self_us), int(cumulative_us), depth))
+    return imports
+
+def main():
+    parser = argparse.ArgumentParser(description="Import-time budget check for the service UI")
+    parser.add_argument('--budget', type=float, default=6.0, help="maximum import time of app.py in seconds")
+    parser.add_argument('--top', type=int, default=15, help="number of slowest imports to show")
+    args = parser.parse_args()
+
+    imports = measure_imports()
+    app_index = next(idx for idx, entry in enumerate(imports) if entry[0] == 'app' and entry[3] == 0)
+    total = imports[app_index][2] / 1e6
+
+    # Modules imported by app.py itself: importtime lists children right before their parent
+    start = max((idx for idx in range(app_index) if imports[idx][3] == 0), default=-1) + 1
+    direct = [entry for entry in imports[start:app_index] if entry[3] == 1]
+    print("Slowest direct imports of app.py:")
+    for package, _, cumulative_us, _ in sorted(direct, key=lambda entry: -entry[2])[:args.top]:
+        print(f"  {cumulative_us / 1e6:8.3f}s  {package}")
+    print(f"Total: {total:.3f}s (budget {args.budget:.3f}s)")
+
+    eager = sorted({entry[0] for entry in imports if entry[0].split('.')[0] in LAZY_MODULES})
+    failed = False
+    if eager:
+        print(f"FAIL: imported at startup but should be lazy: {', '.join(eager)}")
+        failed = True
+    if total > args.budget:
+        print("FAIL: import time over budget")
+        failed = True
+
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Shadow mode report
+
+Reads the shadow log written by the workers (FOOD_CLASSIFIER_SHADOW_LOG, see
+clients/shadow_client.py) and reports how often the local model agrees with
+Custom Vision, per Custom Vision tag, and the latency of both.
+Tags are compared by their normalized spelling, as the nutrition catalog resolves them.
+
+Usage:
+    python tools/shadow_report.py /var/log/food-classifier/shadow.csv [--since 2025-03-01] [--min-count 5]
+"""
+import os
+import sys
+import csv
+import argparse
+from datetime import datetime
+from collections import defaultdict
+
+import numpy as np
+
+SERVICE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'food_classifier', 'src', 'service_ui'))
+sys.path.append(SERVICE_DIR)
+sys.path.append(os.path.join(SERVICE_DIR, 'components'))
+
+from utils.nutrition_catalog import normalize_food_name
+
+def read_log(path, since=None):
+    """Shadow log rows, optionally only those logged at or after since (datetime)"""
+    rows = []
+    with open(path, newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            if row.get('time') == 'time':
+                continue  # header repeated by a worker that created the file concurrently
+            if since and int(row['time']) < since.timestamp():
+                continue
+            rows.append(row)
+    return rows
+
+def percentiles(values):
+    if not values:
+        return None, None
+    p50, p95 = np.percentile(values, [50, 95])
+    return float(p50), float(p95)
+
+def main():
+    parser = argparse.ArgumentParser(description="Shadow mode agreement and latency report")
+    parser.add_argument('log', help="shadow log CSV")
+    parser.add_argument('--since', type=datetime.fromisoformat, default=None, help="only images since this date")
+    parser.add_argument('--min-count', type=int, default=1, help="only list tags with at least this many images")
+    args = parser.parse_args()
+
+    rows = read_log(args.log, args.since)
+    if not rows:
+        sys.exit("No shadow predictions in the log")
+
+    per_tag = defaultdict(lambda: {'count': 0, 'agree': 0, 'confusions': defaultdict(int)})
+    agree_total = 0
+    for row in rows:
+        stats = per_tag[row['azure_tag']]
+        stats['count'] += 1
+        if normalize_food_name(row['azure_tag']) == normalize_food_name(row['local_tag']):
+            stats['agree'] += 1
+            agree_total += 1
+        else:
+            stats['confusions'][row['local_tag']] += 1
+
+    azure_ms = [float(row['azure_ms']) for row in rows]
+    local_ms = [float(row['local_ms']) for row in rows]
+    (azure_p50, azure_p95), (local_p50, local_p95) = percentiles(azure_ms), percentiles(local_ms)
+
+    first, last = (datetime.fromtimestamp(int(rows[index]['time'])) for index in (0, -1))
+    print(f"{len(rows)} images, {first:%Y-%m-%d %H:%M} - {last:%Y-%m-%d %H:%M}")
+    print(f"Agreement: {100 * agree_total / len(rows):.1f}%")
+    print()
+    print(f"{'':<14} {'p50 ms':>8} {'p95 ms':>8}")
+    print(f"{'Custom Vision':<14} {azure_p50:>8.1f} {azure_p95:>8.1f}")
+    print(f"{'local':<14} {local_p50:>8.1f} {local_p95:>8.1f}")
+    print(f"{'saved':<14} {azure_p50 - local_p50:>8.1f} {azure_p95 - local_p95:>8.1f}")
+    print()
+
+    print(f"{'Custom Vision tag':<24} {'images':>6} {'agree':>7}  most frequent local disagreement")
+    for tag, stats in sorted(per_tag.items(), key=lambda item: item[1]['agree'] / item[1]['count']):
+        if stats['count'] < args.min_count:
+            continue
+        confusion = max(stats['confusions'].items(), key=lambda item: item[1], default=None)
+        confusion_text = f"{confusion[0]} ({confusion[1]})" if confusion else "-"
+        print(f"{tag:<24} {stats['count']:>6} {100 * stats['agree'] / stats['count']:>6.1f}%  {confusion_text}")
+
+if __name__ == "__main__":
+    main()
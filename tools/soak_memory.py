@@ -0,0 +1,97 @@
+"""
+Memory soak test of one running worker
+
+Sends the same requests to a worker again and again and fails if its memory
+grows per request. The worker must run with memory diagnostics enabled
+(FOOD_CLASSIFIER_DIAGNOSTICS=true, FOOD_CLASSIFIER_ADMIN_TOKEN set); memory is
+read from its /admin/memory endpoint.
+
+    1. warm-up requests (caches, lazy imports, pools fill up)
+    2. memory sample
+    3. measured requests
+    4. memory sample, growth per request against the limits
+
+Customer lookups render the nutrition chart (Matplotlib). With --image, meals are
+submitted too; they are recorded as consumption of the customer, so use a test customer.
+
+Usage:
+    python tools/soak_memory.py --url http://127.0.0.1:7861 --code 1234 --guardian 5678 --requests 500
+"""
+import os
+import sys
+import time
+import argparse
+
+import requests
+
+def read_memory(url, token):
+    """Take a memory sample on the worker"""
+    response = requests.get(f"{url}/admin/memory", params={'snapshot': 'true'},
+                            headers={'X-Admin-Token': token}, timeout=120)
+    response.raise_for_status()
+    return response.json()
+
+def main():
+    parser = argparse.ArgumentParser(description="Memory soak test of one worker")
+    parser.add_argument('--url', default='http://127.0.0.1:7861', help="worker URL (not the nginx load balancer)")
+    parser.add_argument('--token', default=os.getenv('FOOD_CLASSIFIER_ADMIN_TOKEN'), help="admin token")
+    parser.add_argument('--code', required=True, help="customer code of a test customer")
+    parser.add_argument('--guardian', required=True, help="guardian code of the test customer")
+    parser.add_argument('--image', default=None, help="meal photo to submit after each lookup")
+    parser.add_argument('--warmup', type=int, default=50, help="requests before the first sample")
+    parser.add_argument('--requests', type=int, default=500, help="measured requests")
+    parser.add_argument('--max-traced-kb', type=float, default=2.0, help="allowed traced growth per request (KB)")
+    parser.add_argument('--max-rss-kb', type=float, default=20.0, help="allowed RSS growth per request (KB)")
+    args = parser.parse_args()
+    if not args.token:
+        parser.error("--token or FOOD_CLASSIFIER_ADMIN_TOKEN is required")
+
+    from gradio_client import Client, handle_file
+
+    client = Client(args.url, verbose=False)
+    image = handle_file(args.image) if args.image else None
+
+    def send():
+        client.predict(args.code, args.guardian, api_name='/get_customer_details')
+        if image is not None:
+            client.predict(image, False, 1.0, api_name='/process_with_error_handling')
+
+    print(f"Warm-up: {args.warmup} requests")
+    for _ in range(args.warmup):
+        send()
+    before = read_memory(args.url, args.token)['latest']
+
+    print(f"Soak: {args.requests} requests")
+    start = time.perf_counter()
+    for idx in range(1, args.requests + 1):
+        send()
+        if idx % 100 == 0:
+            print(f"  {idx}/{args.requests} ({time.perf_counter() - start:.0f}s)")
+    report = read_memory(args.url, args.token)
+    after = report['latest']
+
+    traced_kb = (after['traced_mb'] - before['traced_mb']) * 1024 / args.requests
+    rss_kb = (after['rss_mb'] - before['rss_mb']) * 1024 / args.requests
+    print(f"Traced growth: {traced_kb:.2f} KB/request (limit {args.max_traced_kb})")
+    print(f"RSS growth:    {rss_kb:.2f} KB/request (limit {args.max_rss_kb})")
+    for key in ('open_figures', 'figures', 'images', 'numpy_arrays', 'sessions', 'history_chars'):
+        if key in after:
+            print(f"{key:<14} {before.get(key, 0)} -> {after[key]}")
+
+    print("Top allocation growth during the soak:")
+    for stat in report['top_growth'][:10]:
+        print(f"  {stat['size_diff_kb']:>10.1f} KB  {stat['count_diff']:>7}  {stat['location']}")
+
+    failures = []
+    if traced_kb > args.max_traced_kb:
+        failures.append("traced memory grows per request")
+    if rss_kb > args.max_rss_kb:
+        failures.append("RSS grows per request")
+    if after.get('open_figures', 0) > before.get('open_figures', 0):
+        failures.append("Matplotlib figures are left open")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,3 @@
+"""
+Training data and model tooling for the food classifier
+"""
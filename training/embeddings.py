@@ -0,0 +1,232 @@
+"""
+Cached ResNet50 embeddings for head-only training
+
+The ResNet50 experiment freezes the whole backbone, so its output for an image
+never changes. The backbone is run once per image and the 2048-d embeddings are
+kept in an append-only float16 memmap keyed by the SHA-256 of the image file:
+
+    <cache>/embeddings.f16    float16 rows of EMBEDDING_DIM values
+    <cache>/hashes.txt        image hash of each row, in row order
+    <cache>/meta.json         backbone, embedding size and input size
+
+Later runs only embed images that are not in the cache (e.g. a new dish class),
+and the head trains on the cached embeddings in seconds on CPU.
+
+Usage:
+    python -m training.embeddings --data custom_vision/data --epochs 30
+"""
+import os
+import json
+import time
+import hashlib
+import argparse
+
+import numpy as np
+import torch
+import torch.nn as nn
+import torch.optim as optim
+
+from training.store import ensure_store
+from training.loader import to_float
+from training.models import create_head, create_resnet50
+
+EMBEDDING_DIM = 2048
+
+EMBEDDINGS_NAME = 'embeddings.f16'
+HASHES_NAME = 'hashes.txt'
+META_NAME = 'meta.json'
+
+def file_hash(path):
+    """SHA-256 of an image file"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def create_backbone():
+    """Pretrained ResNet50 without its classifier (outputs the pooled 2048-d embedding)"""
+    from torchvision import models
+
+    backbone = models.resnet50(weights=models.ResNet50_Weights.IMAGENET1K_V1)
+    backbone.fc = nn.Identity()
+    return backbone.eval()
+
+class EmbeddingCache:
+    """
+    Append-only embedding store.
+    Rows are written before their hashes, so an interrupted append leaves
+    rows without a hash, which are ignored and overwritten by the next append.
+    """
+
+    def __init__(self, cache_dir, size=224):
+        self.cache_dir = cache_dir
+        self.meta = {'backbone': 'resnet50', 'dim': EMBEDDING_DIM, 'size': size}
+        os.makedirs(cache_dir, exist_ok=True)
+
+        meta_path = os.path.join(cache_dir, META_NAME)
+        if os.path.exists(meta_path):
+            with open(meta_path, encoding='utf-8') as f:
+                meta = json.load(f)
+            if meta != self.meta:
+                raise ValueError(f"Embedding cache {cache_dir} was built with {meta}, expected {self.meta}")
+        else:
+            with open(meta_path, 'w', encoding='utf-8') as f:
+                json.dump(self.meta, f)
+
+        self.hashes = []
+        hashes_path = os.path.join(cache_dir, HASHES_NAME)
+        if os.path.exists(hashes_path):
+            with open(hashes_path, encoding='utf-8') as f:
+                self.hashes = f.read().split()
+        self.rows = {content_hash: row for row, content_hash in enumerate(self.hashes)}
+        self._embeddings = None
+
+    def __len__(self):
+        return len(self.hashes)
+
+    def __contains__(self, content_hash):
+        return content_hash in self.rows
+
+    @property
+    def embeddings(self):
+        """float16 array of shape (len(self), EMBEDDING_DIM)"""
+        if self._embeddings is None:
+            if not self.hashes:
+                return np.empty((0, EMBEDDING_DIM), dtype=np.float16)
+            self._embeddings = np.memmap(os.path.join(self.cache_dir, EMBEDDINGS_NAME), dtype=np.float16,
+                                         mode='r', shape=(len(self.hashes), EMBEDDING_DIM))
+        return self._embeddings
+
+    def append(self, hashes, embeddings):
+        """Add embeddings (n, EMBEDDING_DIM) of new images"""
+        embeddings = np.ascontiguousarray(embeddings, dtype=np.float16)
+        row_bytes = EMBEDDING_DIM * embeddings.itemsize
+        with open(os.path.join(self.cache_dir, EMBEDDINGS_NAME), 'ab') as f:
+            # Drop rows of an interrupted append
+            f.truncate(len(self.hashes) * row_bytes)
+            f.write(embeddings.tobytes())
+        with open(os.path.join(self.cache_dir, HASHES_NAME), 'a', encoding='utf-8') as f:
+            f.writelines(f"{content_hash}\n" for content_hash in hashes)
+
+        for content_hash in hashes:
+            self.rows[content_hash] = len(self.hashes)
+            self.hashes.append(content_hash)
+        self._embeddings = None
+
+    def lookup(self, hashes):
+        """
+        Returns:
+            np.ndarray: float32 embeddings of the given hashes, in order
+        """
+        return np.asarray(self.embeddings[[self.rows[content_hash] for content_hash in hashes]], dtype=np.float32)
+
+def store_hashes(store):
+    """Hash of every image of a decoded image store, in store order"""
+    return [file_hash(os.path.join(store.index['source'], path)) for path in store.index['files']]
+
+def embed_store(store, hashes, cache, backbone, batch_size=64):
+    """
+    Embed the decoded images of a store (training/store.py) that are not cached yet,
+    reading the already decoded pixels instead of the image files
+    """
+    missing = [row for row in store.valid_rows.tolist() if hashes[row] not in cache]
+    # Identical files in the store are embedded once
+    missing = list({hashes[row]: row for row in missing}.values())
+    if not missing:
+        return
+
+    device = next(backbone.parameters()).device
+    start = time.perf_counter()
+    with torch.inference_mode():
+        for offset in range(0, len(missing), batch_size):
+            rows = missing[offset:offset + batch_size]
+            images = torch.from_numpy(np.ascontiguousarray(store.images[rows])).permute(0, 3, 1, 2)
+            embeddings = backbone(to_float(images, device, normalize=True))
+            cache.append([hashes[row] for row in rows], embeddings.cpu().numpy())
+            print(f"Embedded {min(offset + batch_size, len(missing))}/{len(missing)} images")
+    print(f"Embedding took {time.perf_counter() - start:.1f}s")
+
+def train_head(features, labels, num_classes, epochs=30, batch_size=256, lr=0.003):
+    """
+    Train the ResNet50 classifier head on embeddings
+
+    Returns:
+        nn.Sequential: the trained head
+    """
+    head = create_head(num_classes, EMBEDDING_DIM)
+    optimizer = optim.Adam(head.parameters(), lr=lr)
+    criterion = nn.CrossEntropyLoss()
+
+    head.train()
+    for epoch in range(1, epochs + 1):
+        total_loss = 0.0
+        for batch in torch.randperm(len(labels)).split(batch_size):
+            loss = criterion(head(features[batch]), labels[batch])
+            optimizer.zero_grad(set_to_none=True)
+            loss.backward()
+            optimizer.step()
+            total_loss += loss.item() * len(batch)
+        print(f"Epoch {epoch}/{epochs}: train loss {total_loss / len(labels):.3f}")
+    return head.eval()
+
+def accuracy(head, features, labels):
+    """Accuracy in % of the head on embeddings"""
+    with torch.inference_mode():
+        return 100 * (head(features).argmax(dim=1) == labels).float().mean().item()
+
+def load_split(data_dir, split, cache, size, backbone=None):
+    """
+    Embed (if needed) and load one split of the dataset
+
+    Returns:
+        tuple: (classes, float32 features tensor, labels tensor, backbone or None)
+    """
+    store = ensure_store(os.path.join(data_dir, split), os.path.join(data_dir, '.store', f'{split}-{size}'), size)
+    hashes = store_hashes(store)
+    # Images that failed to decode are neither embedded nor loaded
+    valid_hashes = [hashes[row] for row in store.valid_rows]
+    if any(content_hash not in cache for content_hash in valid_hashes):
+        backbone = backbone or create_backbone()
+        embed_store(store, hashes, cache, backbone)
+    features = torch.from_numpy(cache.lookup(valid_hashes))
+    return store.classes, features, torch.from_numpy(store.labels[store.valid_rows]), backbone
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the ResNet50 head on cached embeddings")
+    parser.add_argument('--data', default='custom_vision/data', help="dataset directory with train/ and test/")
+    parser.add_argument('--epochs', type=int, default=30)
+    parser.add_argument('--batch-size', type=int, default=256)
+    parser.add_argument('--lr', type=float, default=0.003)
+    parser.add_argument('--size', type=int, default=224, help="input image size in px")
+    parser.add_argument('--cache', default=None, help="embedding cache directory, default: <data>/.embeddings")
+    parser.add_argument('--output', default=os.path.join('models', 'resnet50.pt'), help="checkpoint path")
+    args = parser.parse_args()
+
+    cache = EmbeddingCache(args.cache or os.path.join(args.data, '.embeddings'), args.size)
+    classes, train_features, train_labels, backbone = load_split(args.data, 'train', cache, args.size)
+    test_classes, test_features, test_labels, backbone = load_split(args.data, 'test', cache, args.size, backbone)
+    if test_classes != classes:
+        raise ValueError("train and test splits have different classes")
+
+    start = time.perf_counter()
+    head = train_head(train_features, train_labels, len(classes), args.epochs, args.batch_size, args.lr)
+    print(f"Head trained in {time.perf_counter() - start:.1f}s: "
+          f"train acc {accuracy(head, train_features, train_labels):.1f}% | "
+          f"test acc {accuracy(head, test_features, test_labels):.1f}%")
+
+    # Same checkpoint format as training/train.py
+    model = create_resnet50(len(classes))
+    model.fc.load_state_dict(head.state_dict())
+    os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+    torch.save({
+        'model': 'resnet50',
+        'state_dict': model.state_dict(),
+        'classes': classes,
+        'size': args.size,
+        'normalize': True
+    }, args.output)
+    print(f"Checkpoint saved to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+"""
+Accuracy/latency comparison of exported models and Azure Custom Vision
+
+Runs every ONNX variant of the given export directories (see training/export.py)
+and, optionally, the Custom Vision model over the same ImageFolder-style test
+set (custom_vision/data/test) and prints them side by side:
+
+    variant | accuracy | p50 / p95 latency | model size | memory
+
+Local variants are timed on single-image inference (batch 1, as in the service),
+each in its own process so memory is measured per variant. Custom Vision latency
+is the full prediction request round trip.
+
+Usage:
+    python -m training.evaluate --test custom_vision/data/test --models models/onnx/resnet50 --custom-vision
+"""
+import os
+import sys
+import json
+import time
+import resource
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from PIL import Image, ImageOps
+
+from training.store import scan_image_folder
+
+META_NAME = 'model.json'
+
+# ImageNet statistics used by the pretrained ResNet50 weights (same as training/loader.py)
+IMAGENET_MEAN = np.array((0.485, 0.456, 0.406), dtype=np.float32)
+IMAGENET_STD = np.array((0.229, 0.224, 0.225), dtype=np.float32)
+
+# Inference runs before timing starts
+WARMUP_RUNS = 3
+
+def to_input(images, normalize):
+    """
+    uint8 NHWC images -> float32 NCHW model input, as training/loader.to_float
+    """
+    images = images.astype(np.float32) / 255
+    if normalize:
+        images = (images - IMAGENET_MEAN) / IMAGENET_STD
+    return np.ascontiguousarray(images.transpose(0, 3, 1, 2))
+
+def load_image(path, size):
+    """Decode and resize an image the way training/store.py stores it"""
+    with Image.open(path) as image:
+        image = ImageOps.exif_transpose(image).convert('RGB')
+        return np.asarray(image.resize((size, size), Image.Resampling.BILINEAR))
+
+def load_meta(model_dir):
+    """Classes and preprocessing of an export directory"""
+    with open(os.path.join(model_dir, META_NAME), encoding='utf-8') as f:
+        return json.load(f)
+
+def peak_memory_mb():
+    """Peak resident memory of this process (ru_maxrss is in KB on Linux)"""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def summarize(name, correct, latencies, size_mb=None, memory_mb=None, failed=0):
+    latencies = np.asarray(latencies) * 1000
+    return {
+        'variant': name,
+        'images': len(latencies),
+        'failed': failed,
+        'accuracy': 100 * correct / max(len(latencies), 1),
+        'p50_ms': float(np.percentile(latencies, 50)) if len(latencies) else None,
+        'p95_ms': float(np.percentile(latencies, 95)) if len(latencies) else None,
+        'size_mb': size_mb,
+        'memory_mb': memory_mb
+    }
+
+def evaluate_onnx(model_path, meta, samples, threads=None):
+    """
+    Evaluate one ONNX variant (runs in a separate process)
+
+    Args:
+        samples: [(image_path, label), ...]
+    """
+    import onnxruntime as ort
+
+    baseline = peak_memory_mb()
+    options = ort.SessionOptions()
+    if threads:
+        options.intra_op_num_threads = threads
+    session = ort.InferenceSession(model_path, options, providers=['CPUExecutionProvider'])
+    input_name = session.get_inputs()[0].name
+
+    size, normalize, classes = meta['size'], meta['normalize'], meta['classes']
+    warmup = to_input(np.zeros((1, size, size, 3), dtype=np.uint8), normalize)
+    for _ in range(WARMUP_RUNS):
+        session.run(None, {input_name: warmup})
+
+    correct, latencies, failed = 0, [], 0
+    for path, label in samples:
+        try:
+            image = to_input(load_image(path, size)[None], normalize)
+        except Exception as e:
+            print(f"Failed to load {path}: {e}")
+            failed += 1
+            continue
+        start = time.perf_counter()
+        logits = session.run(None, {input_name: image})[0]
+        latencies.append(time.perf_counter() - start)
+        correct += classes[int(logits[0].argmax())] == label
+
+    name = f"{os.path.basename(os.path.dirname(model_path))}/{os.path.splitext(os.path.basename(model_path))[0]}"
+    return summarize(
+        name, correct, latencies,
+        size_mb=os.path.getsize(model_path) / 1024 ** 2,
+        memory_mb=peak_memory_mb() - baseline,
+        failed=failed
+    )
+
+def evaluate_custom_vision(samples):
+    """Evaluate the Custom Vision model of the service settings over the same samples"""
+    # custom_vision/src is imported as the top-level package 'src', as by custom_vision/main.py
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'custom_vision')))
+    from src.config import get_config, get_client, get_limiter, rate_limiter
+
+    config = get_config()
+    client = get_client(ENDPOINT=config["ENDPOINT"], KEY=config["KEY"])
+    # Shares the prediction quota with the service, behind interactive calls
+    limiter = get_limiter()
+
+    correct, latencies, failed = 0, [], 0
+    for path, label in samples:
+        with open(path, 'rb') as f:
+            image_data = f.read()
+        limiter.acquire(rate_limiter.BATCH)
+        start = time.perf_counter()
+        try:
+            results = client.classify_image(config["PROJECT_ID"], config["MODEL_NAME"], image_data)
+        except Exception as e:
+            print(f"Custom Vision failed on {path}: {e}")
+            failed += 1
+            continue
+        latencies.append(time.perf_counter() - start)
+        correct += results.predictions[0].tag_name == label
+
+    return summarize(f"custom-vision/{config['MODEL_NAME']}", correct, latencies, failed=failed)
+
+def format_table(results):
+    """Plain-text comparison table"""
+    def fmt(value, spec):
+        return '-' if value is None else format(value, spec)
+
+    header = f"{'variant':<32} {'images':>6} {'accuracy':>9} {'p50 ms':>8} {'p95 ms':>8} {'size MB':>8} {'mem MB':>8}"
+    lines = [header, '-' * len(header)]
+    for result in results:
+        lines.append(
+            f"{result['variant']:<32} {result['images']:>6} {fmt(result['accuracy'], '.1f'):>8}% "
+            f"{fmt(result['p50_ms'], '.1f'):>8} {fmt(result['p95_ms'], '.1f'):>8} "
+            f"{fmt(result['size_mb'], '.1f'):>8} {fmt(result['memory_mb'], '.0f'):>8}"
+        )
+    return '\n'.join(lines)
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare exported models and Custom Vision")
+    parser.add_argument('--test', default='custom_vision/data/test', help="ImageFolder-style test directory")
+    parser.add_argument('--models', nargs='*', default=[], help="export directories of training/export.py")
+    parser.add_argument('--custom-vision', action='store_true', help="also evaluate the Custom Vision model")
+    parser.add_argument('--limit', type=int, default=None, help="evaluate at most this many images")
+    parser.add_argument('--threads', type=int, default=None, help="onnxruntime intra-op threads")
+    parser.add_argument('--json', default=None, help="also write the results to this file")
+    args = parser.parse_args()
+
+    classes, samples = scan_image_folder(args.test)
+    samples = [(os.path.join(args.test, path), classes[label]) for path, label in samples]
+    if args.limit:
+        # Spread the limit over all classes
+        samples = samples[::max(len(samples) // args.limit, 1)][:args.limit]
+    print(f"Evaluating on {len(samples)} images, {len(classes)} classes")
+
+    results = []
+    for model_dir in args.models:
+        meta = load_meta(model_dir)
+        for name in sorted(os.listdir(model_dir)):
+            if not name.endswith('.onnx'):
+                continue
+            # One process per variant: memory of earlier sessions doesn't count
+            with ProcessPoolExecutor(max_workers=1) as executor:
+                result = executor.submit(evaluate_onnx, os.path.join(model_dir, name), meta, samples, args.threads).result()
+            print(f"{result['variant']}: {result['accuracy']:.1f}%")
+            results.append(result)
+
+    if args.custom_vision:
+        results.append(evaluate_custom_vision(samples))
+
+    print()
+    print(format_table(results))
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+if __name__ == "__main__":
+    main()
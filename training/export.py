@@ -0,0 +1,142 @@
+"""
+ONNX export and INT8 quantization of trained models
+
+Exports a checkpoint of training/train.py (or training/embeddings.py) into
+a directory of CPU inference variants:
+
+    <output>/fp32.onnx           float model
+    <output>/int8-dynamic.onnx   INT8 weights of the fully connected layers, activations quantized at runtime
+    <output>/int8-static.onnx    INT8 weights and activations (QDQ), calibrated on training images
+    <output>/model.json          classes and input preprocessing
+
+Compare the variants with training/evaluate.py.
+
+Usage:
+    python -m training.export --checkpoint models/resnet50.pt --data custom_vision/data
+"""
+import os
+import json
+import argparse
+import tempfile
+
+import numpy as np
+import torch
+
+from training.models import create_model
+from training.store import ensure_store
+from training.evaluate import META_NAME, to_input
+
+# ONNX opset of the exported graphs
+OPSET_VERSION = 17
+
+def export_onnx(checkpoint_path, output_dir):
+    """
+    Export the float model
+
+    Returns:
+        dict: model metadata (written to model.json)
+    """
+    checkpoint = torch.load(checkpoint_path, map_location='cpu', weights_only=True)
+    model, _ = create_model(checkpoint['model'], len(checkpoint['classes']), checkpoint['size'], pretrained=False)
+    model.load_state_dict(checkpoint['state_dict'])
+    model.eval()
+
+    size = checkpoint['size']
+    os.makedirs(output_dir, exist_ok=True)
+    torch.onnx.export(
+        model,
+        torch.zeros(1, 3, size, size),
+        os.path.join(output_dir, 'fp32.onnx'),
+        input_names=['input'],
+        output_names=['logits'],
+        dynamic_axes={'input': {0: 'batch'}, 'logits': {0: 'batch'}},
+        opset_version=OPSET_VERSION
+    )
+
+    meta = {
+        'model': checkpoint['model'],
+        'classes': checkpoint['classes'],
+        'size': size,
+        'normalize': checkpoint['normalize']
+    }
+    with open(os.path.join(output_dir, META_NAME), 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False)
+    return meta
+
+def quantize_dynamic_int8(output_dir):
+    """
+    INT8 weights for MatMul/Gemm (the fully connected layers).
+    Convolutions stay float: dynamic ConvInteger is usually slower than float on CPU.
+    """
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+
+    quantize_dynamic(
+        os.path.join(output_dir, 'fp32.onnx'),
+        os.path.join(output_dir, 'int8-dynamic.onnx'),
+        op_types_to_quantize=['MatMul', 'Gemm'],
+        weight_type=QuantType.QInt8
+    )
+
+def create_calibration_reader(store, meta, count=256, batch_size=16, seed=0):
+    """Calibration batches: a random sample of the decoded training images"""
+    from onnxruntime.quantization import CalibrationDataReader
+
+    class StoreCalibrationReader(CalibrationDataReader):
+        def __init__(self):
+            rows = np.random.default_rng(seed).permutation(store.valid_rows)[:count]
+            self.batches = iter(np.sort(rows[i:i + batch_size]) for i in range(0, len(rows), batch_size))
+
+        def get_next(self):
+            rows = next(self.batches, None)
+            if rows is None:
+                return None
+            return {'input': to_input(store.images[rows], meta['normalize'])}
+
+    return StoreCalibrationReader()
+
+def quantize_static_int8(output_dir, meta, data_dir, count=256):
+    """
+    INT8 weights (per channel) and activations in QDQ format, with activation
+    ranges calibrated on training images (the train split store of training/train.py)
+    """
+    from onnxruntime.quantization import quantize_static, QuantFormat, QuantType
+    from onnxruntime.quantization.shape_inference import quant_pre_process
+
+    size = meta['size']
+    store = ensure_store(os.path.join(data_dir, 'train'), os.path.join(data_dir, '.store', f'train-{size}'), size)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Shape inference and graph optimization before quantization
+        prepared = os.path.join(tmp, 'prepared.onnx')
+        quant_pre_process(os.path.join(output_dir, 'fp32.onnx'), prepared)
+        quantize_static(
+            prepared,
+            os.path.join(output_dir, 'int8-static.onnx'),
+            create_calibration_reader(store, meta, count),
+            quant_format=QuantFormat.QDQ,
+            per_channel=True,
+            activation_type=QuantType.QUInt8,
+            weight_type=QuantType.QInt8
+        )
+
+def main():
+    parser = argparse.ArgumentParser(description="Export a trained model to ONNX with INT8 variants")
+    parser.add_argument('--checkpoint', required=True, help="checkpoint of training/train.py")
+    parser.add_argument('--output', default=None, help="export directory, default: models/onnx/<checkpoint name>")
+    parser.add_argument('--data', default='custom_vision/data', help="dataset directory, train/ is used for calibration")
+    parser.add_argument('--calibration-count', type=int, default=256, help="number of calibration images")
+    parser.add_argument('--no-static', action='store_true', help="skip static quantization")
+    args = parser.parse_args()
+
+    output_dir = args.output or os.path.join('models', 'onnx', os.path.splitext(os.path.basename(args.checkpoint))[0])
+
+    meta = export_onnx(args.checkpoint, output_dir)
+    print(f"Exported {meta['model']} ({len(meta['classes'])} classes) -> {output_dir}/fp32.onnx")
+    quantize_dynamic_int8(output_dir)
+    print(f"Dynamic INT8 -> {output_dir}/int8-dynamic.onnx")
+    if not args.no_static:
+        quantize_static_int8(output_dir, meta, args.data, args.calibration_count)
+        print(f"Static INT8 -> {output_dir}/int8-static.onnx")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,300 @@
+"""
+Training image ingestion
+
+Downloads labeled image URLs (or imports local images) with a bounded pool of
+download threads sharing one HTTP connection pool, drops duplicates by content
+hash, validates that every image decodes, resizes it and writes a sharded
+ImageFolder-style dataset:
+
+    <output>/<split>/<label>/<hash[:2]>/<hash>.jpg
+    <output>/manifest.csv
+
+The layout is read directly by torchvision's ImageFolder (experiments/ notebooks,
+training/) and by custom_vision/main.py. Re-running into the same output skips
+URLs and images that are already in the manifest.
+
+Usage:
+    python -m training.ingest --urls urls.csv --output custom_vision/data
+    python -m training.ingest --from-dir downloaded_images --label 김치 --output custom_vision/data
+
+urls.csv has one "label,url" row per image.
+"""
+import os
+import io
+import csv
+import hashlib
+import argparse
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from PIL import Image, ImageOps
+
+MANIFEST_NAME = 'manifest.csv'
+MANIFEST_FIELDS = ('hash', 'label', 'split', 'path', 'width', 'height', 'source')
+
+# Images larger than this are not downloaded
+MAX_DOWNLOAD_BYTES = 20 * 1024 * 1024
+
+# Images smaller than this (shorter side, px) are dropped as thumbnails/icons
+MIN_IMAGE_SIZE = 64
+
+def create_session(pool_size):
+    """
+    HTTP session whose connection pool matches the number of download threads,
+    with retries on connection errors and 429/5xx responses
+    """
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=pool_size,
+        pool_maxsize=pool_size,
+        max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=(429, 500, 502, 503, 504))
+    )
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.headers['User-Agent'] = 'food-decoder-ingest/1.0'
+    return session
+
+def download(session, url, timeout=15):
+    """
+    Download one image, refusing bodies over MAX_DOWNLOAD_BYTES
+
+    Returns:
+        bytes: the response body
+    """
+    with session.get(url, timeout=timeout, stream=True) as response:
+        response.raise_for_status()
+        chunks = []
+        size = 0
+        for chunk in response.iter_content(64 * 1024):
+            size += len(chunk)
+            if size > MAX_DOWNLOAD_BYTES:
+                raise ValueError(f"larger than {MAX_DOWNLOAD_BYTES} bytes")
+            chunks.append(chunk)
+        return b''.join(chunks)
+
+def decode_and_resize(data, size):
+    """
+    Decode image bytes, apply the EXIF orientation and resize so the shorter side is size
+
+    Raises:
+        ValueError: if the image does not decode or is too small
+    """
+    try:
+        image = Image.open(io.BytesIO(data))
+        image.load()
+    except Exception as e:
+        raise ValueError(f"not a valid image ({e})") from None
+
+    image = ImageOps.exif_transpose(image).convert('RGB')
+    if min(image.size) < MIN_IMAGE_SIZE:
+        raise ValueError(f"too small {image.size}")
+
+    scale = size / min(image.size)
+    if scale < 1:
+        image = image.resize(
+            (round(image.width * scale), round(image.height * scale)),
+            Image.Resampling.LANCZOS,
+            reducing_gap=3.0
+        )
+    return image
+
+def assign_split(content_hash, test_ratio):
+    """Deterministic train/test split by content hash"""
+    return 'test' if int(content_hash[:8], 16) % 10000 < test_ratio * 10000 else 'train'
+
+def shard_path(split, label, content_hash):
+    """Relative path of an image in the sharded layout"""
+    return os.path.join(split, label, content_hash[:2], f"{content_hash}.jpg")
+
+def bounded_map(executor, fn, items, max_in_flight):
+    """
+    Like executor.map, but keeps at most max_in_flight tasks submitted,
+    so tens of thousands of items don't all become futures at once.
+    Results are yielded in completion order.
+    """
+    in_flight = set()
+    for item in items:
+        if len(in_flight) >= max_in_flight:
+            done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+        in_flight.add(executor.submit(fn, item))
+    for future in in_flight:
+        yield future.result()
+
+class DatasetWriter:
+    """
+    Sharded dataset output with its manifest.
+    Thread-safe: hashes are claimed under a lock so concurrent duplicates are written once.
+    """
+
+    def __init__(self, output_dir, size=256, test_ratio=0.2, quality=90):
+        self.output_dir = output_dir
+        self.size = size
+        self.test_ratio = test_ratio
+        self.quality = quality
+        self._lock = threading.Lock()
+        self._hashes = set()
+        self._sources = set()
+
+        os.makedirs(output_dir, exist_ok=True)
+        self.manifest_path = os.path.join(output_dir, MANIFEST_NAME)
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, newline='', encoding='utf-8') as f:
+                for row in csv.DictReader(f):
+                    self._hashes.add(row['hash'])
+                    self._sources.add(row['source'])
+            self._manifest = open(self.manifest_path, 'a', newline='', encoding='utf-8')
+            self._writer = csv.DictWriter(self._manifest, fieldnames=MANIFEST_FIELDS)
+        else:
+            self._manifest = open(self.manifest_path, 'w', newline='', encoding='utf-8')
+            self._writer = csv.DictWriter(self._manifest, fieldnames=MANIFEST_FIELDS)
+            self._writer.writeheader()
+
+    def seen_source(self, source):
+        """Whether the URL or file was ingested by an earlier run"""
+        return source in self._sources
+
+    def add(self, label, data, source):
+        """
+        Validate, deduplicate, resize and write one image
+
+        Returns:
+            str: 'written', 'duplicate' or 'invalid'
+        """
+        content_hash = hashlib.sha256(data).hexdigest()
+        with self._lock:
+            if content_hash in self._hashes:
+                return 'duplicate'
+            self._hashes.add(content_hash)
+
+        try:
+            image = decode_and_resize(data, self.size)
+        except ValueError as e:
+            print(f"Invalid image {source}: {e}")
+            with self._lock:
+                self._hashes.discard(content_hash)
+            return 'invalid'
+
+        split = assign_split(content_hash, self.test_ratio)
+        relative_path = shard_path(split, label, content_hash)
+        path = os.path.join(self.output_dir, relative_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        image.save(path, format='JPEG', quality=self.quality)
+
+        with self._lock:
+            self._writer.writerow({
+                'hash': content_hash,
+                'label': label,
+                'split': split,
+                'path': relative_path,
+                'width': image.width,
+                'height': image.height,
+                'source': source
+            })
+        return 'written'
+
+    def close(self):
+        self._manifest.close()
+
+def ingest(items, output_dir, size=256, test_ratio=0.2, workers=16, timeout=15):
+    """
+    Ingest (label, url) pairs into a sharded dataset
+
+    Returns:
+        Counter: number of images per outcome
+    """
+    writer = DatasetWriter(output_dir, size=size, test_ratio=test_ratio)
+    session = create_session(workers)
+    stats = Counter()
+
+    # Drop repeated URLs before any request is made
+    pending = []
+    for label, url in dict.fromkeys(items):
+        if writer.seen_source(url):
+            stats['skipped'] += 1
+        else:
+            pending.append((label, url))
+
+    def process(item):
+        label, url = item
+        try:
+            data = download(session, url, timeout=timeout)
+        except Exception as e:
+            print(f"Failed to download {url}: {e}")
+            return 'failed'
+        return writer.add(label, data, url)
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for idx, outcome in enumerate(bounded_map(executor, process, pending, workers * 4), start=1):
+                stats[outcome] += 1
+                if idx % 500 == 0:
+                    print(f"{idx}/{len(pending)} {dict(stats)}")
+    finally:
+        writer.close()
+        session.close()
+    return stats
+
+def ingest_directory(input_dir, label, output_dir, size=256, test_ratio=0.2, workers=None):
+    """
+    Ingest local image files (e.g. an earlier crawl) into a sharded dataset
+
+    Returns:
+        Counter: number of images per outcome
+    """
+    writer = DatasetWriter(output_dir, size=size, test_ratio=test_ratio)
+    stats = Counter()
+    paths = [
+        os.path.join(root, name)
+        for root, _, names in os.walk(input_dir)
+        for name in sorted(names)
+    ]
+
+    def process(path):
+        if writer.seen_source(path):
+            return 'skipped'
+        with open(path, 'rb') as f:
+            return writer.add(label, f.read(), path)
+
+    try:
+        # Decoding and resizing release the GIL in Pillow
+        with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+            for outcome in executor.map(process, paths, chunksize=64):
+                stats[outcome] += 1
+    finally:
+        writer.close()
+    return stats
+
+def read_url_list(path):
+    """Read "label,url" rows"""
+    with open(path, newline='', encoding='utf-8') as f:
+        return [(row[0].strip(), row[1].strip()) for row in csv.reader(f) if len(row) >= 2 and row[1].strip()]
+
+def main():
+    parser = argparse.ArgumentParser(description="Training image ingestion")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--urls', help="CSV file of label,url rows")
+    source.add_argument('--from-dir', help="directory of local images (requires --label)")
+    parser.add_argument('--label', help="label of the images in --from-dir")
+    parser.add_argument('--output', required=True, help="dataset directory")
+    parser.add_argument('--size', type=int, default=256, help="shorter side of the stored images in px")
+    parser.add_argument('--test-ratio', type=float, default=0.2, help="share of images in the test split")
+    parser.add_argument('--workers', type=int, default=16, help="concurrent downloads")
+    args = parser.parse_args()
+
+    if args.urls:
+        stats = ingest(read_url_list(args.urls), args.output, args.size, args.test_ratio, args.workers)
+    else:
+        if not args.label:
+            parser.error("--from-dir requires --label")
+        stats = ingest_directory(args.from_dir, args.label, args.output, args.size, args.test_ratio)
+    print(f"Done: {dict(stats)}")
+
+if __name__ == "__main__":
+    main()
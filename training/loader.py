@@ -0,0 +1,75 @@
+"""
+DataLoader over a decoded image store (see training/store.py)
+
+Batches are read from the memmap with one fancy-indexing call per batch, in
+worker processes, as uint8 and pinned. Conversion to float and normalization
+happen on the whole batch on the training device.
+"""
+import numpy as np
+import torch
+from torch.utils.data import Dataset, DataLoader, BatchSampler, RandomSampler, SequentialSampler
+
+# ImageNet statistics used by the pretrained ResNet50 weights
+IMAGENET_MEAN = (0.485, 0.456, 0.406)
+IMAGENET_STD = (0.229, 0.224, 0.225)
+
+class StoreDataset(Dataset):
+    """
+    Batched dataset: indexed with a list of indices, returns a whole batch
+    (uint8 images in NCHW, int64 labels). Only the images that decoded are indexed.
+    """
+
+    def __init__(self, store, augment=False):
+        self.store = store
+        self.augment = augment
+
+    def __len__(self):
+        return len(self.store.valid_rows)
+
+    def __getitem__(self, indices):
+        # Sorted store rows read the memmap front to back
+        indices = np.sort(self.store.valid_rows[np.asarray(indices)])
+        images = self.store.images[indices]
+        labels = self.store.labels[indices]
+
+        if self.augment:
+            # Random horizontal flip, per image
+            flip = np.random.random(len(indices)) < 0.5
+            images = images.copy()
+            images[flip] = images[flip, :, ::-1]
+
+        images = torch.from_numpy(np.ascontiguousarray(images)).permute(0, 3, 1, 2)
+        return images, torch.from_numpy(labels)
+
+def _seed_worker(worker_id):
+    # NumPy augmentation must not repeat across workers
+    np.random.seed(torch.initial_seed() % 2 ** 32)
+
+def create_loader(store, batch_size=32, shuffle=False, augment=False, workers=4):
+    """
+    DataLoader yielding (uint8 images NCHW, labels) batches from a store
+    """
+    dataset = StoreDataset(store, augment=augment)
+    sampler = RandomSampler(range(len(dataset))) if shuffle else SequentialSampler(range(len(dataset)))
+    return DataLoader(
+        dataset,
+        sampler=BatchSampler(sampler, batch_size=batch_size, drop_last=False),
+        batch_size=None,  # the dataset returns whole batches
+        num_workers=workers,
+        pin_memory=torch.cuda.is_available(),
+        persistent_workers=workers > 0,
+        prefetch_factor=4 if workers > 0 else None,
+        worker_init_fn=_seed_worker
+    )
+
+def to_float(images, device, normalize=False):
+    """
+    Move a uint8 batch to the device and scale it to [0, 1] (like ToTensor),
+    optionally with ImageNet normalization
+    """
+    images = images.to(device, non_blocking=True).float().div_(255)
+    if normalize:
+        mean = torch.tensor(IMAGENET_MEAN, device=device).view(1, 3, 1, 1)
+        std = torch.tensor(IMAGENET_STD, device=device).view(1, 3, 1, 1)
+        images = images.sub_(mean).div_(std)
+    return images
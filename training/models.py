@@ -0,0 +1,62 @@
+"""
+Models of the CNN and ResNet50 experiments (experiments/*.ipynb)
+"""
+import torch.nn as nn
+import torch.nn.functional as F
+
+class FoodCNN(nn.Module):
+    """Three conv blocks and a dropout classifier, as in CNN_model_test.ipynb"""
+
+    def __init__(self, num_classes, image_size=224, dropout_rate=0.5):
+        super().__init__()
+        self.conv1 = nn.Conv2d(in_channels=3, out_channels=32, kernel_size=3, padding=1)
+        self.conv2 = nn.Conv2d(in_channels=32, out_channels=64, kernel_size=3, padding=1)
+        self.conv3 = nn.Conv2d(in_channels=64, out_channels=128, kernel_size=3, padding=1)
+        self.pool = nn.MaxPool2d(kernel_size=2, stride=2)
+
+        # Three poolings divide the image size by 8
+        self.fc1 = nn.Linear(in_features=128 * (image_size // 8) ** 2, out_features=512)
+        self.dropout = nn.Dropout(p=dropout_rate)
+        self.fc2 = nn.Linear(in_features=512, out_features=num_classes)
+
+    def forward(self, x):
+        x = self.pool(F.relu(self.conv1(x)))
+        x = self.pool(F.relu(self.conv2(x)))
+        x = self.pool(F.relu(self.conv3(x)))
+        x = x.flatten(1)
+        x = F.relu(self.fc1(x))
+        x = self.dropout(x)
+        return self.fc2(x)
+
+def create_head(num_classes, in_features=2048):
+    """Classifier head of the ResNet50 experiment (returns logits)"""
+    return nn.Sequential(
+        nn.Linear(in_features, 512),
+        nn.ReLU(),
+        nn.Dropout(0.2),
+        nn.Linear(512, num_classes)
+    )
+
+def create_resnet50(num_classes, pretrained=True):
+    """
+    Pretrained ResNet50 with frozen backbone and a new head, as in ResNet50_model_test.ipynb
+    (pretrained=False skips the ImageNet weights download when a checkpoint is loaded anyway)
+    """
+    from torchvision import models
+
+    model = models.resnet50(weights=models.ResNet50_Weights.IMAGENET1K_V1 if pretrained else None)
+    for param in model.parameters():
+        param.requires_grad = False
+    model.fc = create_head(num_classes, model.fc.in_features)
+    return model
+
+def create_model(name, num_classes, image_size=224, pretrained=True):
+    """
+    Returns:
+        tuple: (model, normalize) where normalize tells whether inputs need ImageNet normalization
+    """
+    if name == 'cnn':
+        return FoodCNN(num_classes, image_size), False
+    if name == 'resnet50':
+        return create_resnet50(num_classes, pretrained), True
+    raise ValueError(f"Unknown model: {name}")
@@ -0,0 +1,179 @@
+"""
+Decoded image store
+
+Decodes and resizes an ImageFolder-style dataset (see training/ingest.py) once into
+a memory-mapped uint8 array, so training epochs read pixels instead of decoding JPEGs:
+
+    <store>/images.u8     uint8 memmap, shape (count, size, size, 3)
+    <store>/labels.npy    int64 class index per image
+    <store>/index.json    classes, count, size, the source files and those that failed to decode
+
+Images that fail to decode are left as zeros in the array; valid_rows excludes them.
+
+Usage:
+    python -m training.store --images custom_vision/data/train --output stores/train-224
+"""
+import os
+import json
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from PIL import Image, ImageOps
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.webp')
+
+IMAGES_NAME = 'images.u8'
+LABELS_NAME = 'labels.npy'
+INDEX_NAME = 'index.json'
+
+# Images decoded per worker task
+CHUNK_SIZE = 256
+
+def scan_image_folder(image_dir):
+    """
+    List images the way torchvision's ImageFolder does: one class per
+    subdirectory, images found recursively (so ingest shards are included)
+
+    Returns:
+        tuple: (classes, [(relative_path, class_index), ...])
+    """
+    classes = sorted(entry.name for entry in os.scandir(image_dir) if entry.is_dir())
+    samples = []
+    for class_index, label in enumerate(classes):
+        for root, _, names in sorted(os.walk(os.path.join(image_dir, label))):
+            for name in sorted(names):
+                if name.lower().endswith(IMAGE_EXTENSIONS):
+                    samples.append((os.path.relpath(os.path.join(root, name), image_dir), class_index))
+    return classes, samples
+
+def _decode_chunk(args):
+    """
+    Decode, resize and write a chunk of images into the store.
+    Runs in a worker process; opens the memmap itself so no pixels are pickled.
+    """
+    image_dir, store_dir, count, size, start, paths = args
+    images = np.memmap(os.path.join(store_dir, IMAGES_NAME), dtype=np.uint8, mode='r+',
+                       shape=(count, size, size, 3))
+    failed = []
+    for offset, path in enumerate(paths):
+        try:
+            with Image.open(os.path.join(image_dir, path)) as image:
+                image = ImageOps.exif_transpose(image).convert('RGB')
+                # Same geometry as transforms.Resize((size, size)) in the experiments
+                images[start + offset] = np.asarray(image.resize((size, size), Image.Resampling.BILINEAR))
+        except Exception as e:
+            print(f"Failed to decode {path}: {e}")
+            images[start + offset] = 0
+            failed.append(path)
+    images.flush()
+    return failed
+
+def build_store(image_dir, store_dir, size=224, workers=None):
+    """
+    Build the store of an ImageFolder-style directory
+
+    Returns:
+        dict: the store index
+    """
+    classes, samples = scan_image_folder(image_dir)
+    if not samples:
+        raise ValueError(f"No images found in {image_dir}")
+    count = len(samples)
+    os.makedirs(store_dir, exist_ok=True)
+
+    # Allocate the full array on disk, workers fill it in place
+    np.memmap(os.path.join(store_dir, IMAGES_NAME), dtype=np.uint8, mode='w+',
+              shape=(count, size, size, 3)).flush()
+    np.save(os.path.join(store_dir, LABELS_NAME), np.array([label for _, label in samples], dtype=np.int64))
+
+    paths = [path for path, _ in samples]
+    tasks = [
+        (image_dir, store_dir, count, size, start, paths[start:start + CHUNK_SIZE])
+        for start in range(0, count, CHUNK_SIZE)
+    ]
+    failed = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for chunk_failed in executor.map(_decode_chunk, tasks):
+            failed.extend(chunk_failed)
+
+    index = {
+        'classes': classes,
+        'count': count,
+        'size': size,
+        'source': os.path.abspath(image_dir),
+        'files': paths,
+        'failed': failed
+    }
+    # Written last: a store without index.json is incomplete
+    with open(os.path.join(store_dir, INDEX_NAME), 'w', encoding='utf-8') as f:
+        json.dump(index, f, ensure_ascii=False)
+    print(f"Store built: {count} images, {len(classes)} classes, {len(failed)} failed -> {store_dir}")
+    return index
+
+def is_current(image_dir, store_dir, size):
+    """Whether the store exists and matches the images currently in image_dir"""
+    index_path = os.path.join(store_dir, INDEX_NAME)
+    if not os.path.exists(index_path):
+        return False
+    with open(index_path, encoding='utf-8') as f:
+        index = json.load(f)
+    classes, samples = scan_image_folder(image_dir)
+    return index['size'] == size and index['classes'] == classes and index['files'] == [path for path, _ in samples]
+
+def ensure_store(image_dir, store_dir, size=224, workers=None):
+    """Build the store unless an up-to-date one exists"""
+    if not is_current(image_dir, store_dir, size):
+        build_store(image_dir, store_dir, size, workers)
+    return ImageStore(store_dir)
+
+class ImageStore:
+    """
+    Read-only view of a built store.
+    The memmap is opened lazily, so each DataLoader worker maps the file itself
+    and pages are shared through the OS page cache.
+    """
+
+    def __init__(self, store_dir):
+        self.store_dir = store_dir
+        with open(os.path.join(store_dir, INDEX_NAME), encoding='utf-8') as f:
+            self.index = json.load(f)
+        self.classes = self.index['classes']
+        self.size = self.index['size']
+        self.labels = np.load(os.path.join(store_dir, LABELS_NAME))
+        # Rows of the images that decoded (failed ones are zeros that still have a label)
+        failed = set(self.index.get('failed', ()))
+        self.valid_rows = np.array(
+            [row for row, path in enumerate(self.index['files']) if path not in failed], dtype=np.int64
+        )
+        self._images = None
+
+    def __len__(self):
+        return self.index['count']
+
+    @property
+    def images(self):
+        """uint8 array of shape (count, size, size, 3)"""
+        if self._images is None:
+            self._images = np.memmap(os.path.join(self.store_dir, IMAGES_NAME), dtype=np.uint8, mode='r',
+                                     shape=(len(self), self.size, self.size, 3))
+        return self._images
+
+    def __getstate__(self):
+        # Don't pickle the mapping into worker processes
+        state = self.__dict__.copy()
+        state['_images'] = None
+        return state
+
+def main():
+    parser = argparse.ArgumentParser(description="Build a decoded image store")
+    parser.add_argument('--images', required=True, help="ImageFolder-style directory (e.g. custom_vision/data/train)")
+    parser.add_argument('--output', required=True, help="store directory")
+    parser.add_argument('--size', type=int, default=224, help="stored image size in px")
+    parser.add_argument('--workers', type=int, default=None, help="decoding processes, default: CPU count")
+    args = parser.parse_args()
+
+    build_store(args.images, args.output, args.size, args.workers)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Train the CNN or ResNet50 food classifier from a decoded image store
+
+The train and test splits of the dataset (see training/ingest.py) are decoded
+once into stores under <data>/.store/ and reused by later runs.
+
+Usage:
+    python -m training.train --data custom_vision/data --model resnet50 --epochs 30
+"""
+import os
+import time
+import argparse
+
+import torch
+import torch.nn as nn
+import torch.optim as optim
+
+from training.store import ensure_store
+from training.loader import create_loader, to_float
+from training.models import create_model
+
+def run_epoch(model, loader, criterion, device, normalize, optimizer=None):
+    """
+    Train (with optimizer) or evaluate for one epoch
+
+    Returns:
+        tuple: (average loss, accuracy in %)
+    """
+    model.train(optimizer is not None)
+    total_loss, correct, total = 0.0, 0, 0
+
+    with torch.set_grad_enabled(optimizer is not None):
+        for images, labels in loader:
+            images = to_float(images, device, normalize)
+            labels = labels.to(device, non_blocking=True)
+
+            outputs = model(images)
+            loss = criterion(outputs, labels)
+            if optimizer is not None:
+                optimizer.zero_grad(set_to_none=True)
+                loss.backward()
+                optimizer.step()
+
+            total_loss += loss.item() * labels.size(0)
+            correct += (outputs.argmax(dim=1) == labels).sum().item()
+            total += labels.size(0)
+
+    return total_loss / max(total, 1), 100 * correct / max(total, 1)
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the food classifier")
+    parser.add_argument('--data', default='custom_vision/data', help="dataset directory with train/ and test/")
+    parser.add_argument('--model', choices=('cnn', 'resnet50'), default='resnet50')
+    parser.add_argument('--epochs', type=int, default=30)
+    parser.add_argument('--batch-size', type=int, default=32)
+    parser.add_argument('--lr', type=float, default=None, help="default: 0.001 (cnn), 0.003 (resnet50)")
+    parser.add_argument('--size', type=int, default=224, help="input image size in px")
+    parser.add_argument('--workers', type=int, default=4, help="DataLoader worker processes")
+    parser.add_argument('--output', default=None, help="checkpoint path, default: models/<model>.pt")
+    args = parser.parse_args()
+
+    store_root = os.path.join(args.data, '.store')
+    train_store = ensure_store(os.path.join(args.data, 'train'), os.path.join(store_root, f'train-{args.size}'), args.size)
+    test_store = ensure_store(os.path.join(args.data, 'test'), os.path.join(store_root, f'test-{args.size}'), args.size)
+    if test_store.classes != train_store.classes:
+        raise ValueError("train and test splits have different classes")
+
+    train_loader = create_loader(train_store, args.batch_size, shuffle=True, augment=True, workers=args.workers)
+    test_loader = create_loader(test_store, args.batch_size, workers=args.workers)
+
+    device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+    model, normalize = create_model(args.model, len(train_store.classes), args.size)
+    model.to(device)
+
+    criterion = nn.CrossEntropyLoss()
+    params = [param for param in model.parameters() if param.requires_grad]
+    if args.model == 'cnn':
+        optimizer = optim.Adam(params, lr=args.lr or 0.001, weight_decay=0.0001)
+    else:
+        optimizer = optim.Adam(params, lr=args.lr or 0.003)
+
+    print(f"Training {args.model} on {device}: {len(train_store)} train / {len(test_store)} test images, "
+          f"{len(train_store.classes)} classes")
+    for epoch in range(1, args.epochs + 1):
+        start = time.perf_counter()
+        train_loss, train_acc = run_epoch(model, train_loader, criterion, device, normalize, optimizer)
+        test_loss, test_acc = run_epoch(model, test_loader, criterion, device, normalize)
+        print(f"Epoch {epoch}/{args.epochs} ({time.perf_counter() - start:.1f}s): "
+              f"train loss {train_loss:.3f} acc {train_acc:.1f}% | test loss {test_loss:.3f} acc {test_acc:.1f}%")
+
+    output = args.output or os.path.join('models', f'{args.model}.pt')
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    torch.save({
+        'model': args.model,
+        'state_dict': model.state_dict(),
+        'classes': train_store.classes,
+        'size': args.size,
+        'normalize': normalize
+    }, output)
+    print(f"Checkpoint saved to {output}")
+
+if __name__ == "__main__":
+    main()